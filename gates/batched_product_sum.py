@@ -0,0 +1,264 @@
+from functools import lru_cache
+from itertools import chain
+from typing import Callable, Dict, Optional, Sequence, Union
+
+import numpy as np
+from qiskit import QuantumCircuit
+from qiskit.circuit import Gate, ParameterVector
+
+from gates.beauregard.constant_adder import get_angles, partial_constant_angles
+from gates.qft import qft_gate, iqft_gate, qft_gate_resources, iqft_gate_resources
+from utils.circuit_creation import Registers, block_gate
+from utils.custom_typing import QRegsSpec
+from utils.gate_cache import cached_gate
+from utils.parameters import vector_values
+from utils.resources import RESOURCES_CACHE_SIZE, Resources, ResourceCounter, layout, join
+
+Angles = Union[np.ndarray, ParameterVector]
+# double controlled comparator builder (constant, n) of gates/mix or gates/takahashi and its resources
+Comparator = Callable[[int, int], Gate]
+ComparatorResources = Callable[[Optional[int], int], Resources]
+
+
+def overflow_size(n: int) -> int:
+    """ number of bits above n holding the sum of n constants below N < 2^n """
+    return n.bit_length()
+
+
+def batch_register_size(n: int) -> int:
+    """ qubits added to a multiplier by the batched schedule: accumulator of n + m qubits and m quotient bits """
+    return n + 2 * overflow_size(n)
+
+
+def batched_exact_from(n: int, batched_windows: bool = True, **_) -> int:
+    """ `approximation_degree` from which gates keep every rotation, transforms of the accumulator
+    span n + m qubits (`cached_gate` argument)
+    """
+    return n + overflow_size(n) - 1 if batched_windows else n
+
+
+@cached_gate(exact_from=batched_exact_from)
+def batched_product_sum(comparator: Comparator, constant: int, N: int, n: int,
+                        approximation_degree: Optional[int] = None) -> Gate:
+    """ y ^= 2^i * constant * x_i summed over i, modulo N, controlled by ctrl,
+    on qubits [ctrl, x (n), y (n), flag, acc (n + m), quotient (m)], see `_batched_product_sum`
+    """
+    width = n + overflow_size(n)
+    return _batched_product_sum(
+        partial_constant_angles(constant, N, n, width, approximation_degree=approximation_degree),
+        comparator, N, n, f'CC-BPS_({constant})_Mod_{N}', approximation_degree
+    )
+
+
+@cached_gate(exact_from=batched_exact_from)
+def parameterized_batched_product_sum(comparator: Comparator, N: int, n: int, prefix: str,
+                                      approximation_degree: Optional[int] = None) -> Gate:
+    """ product sum with angles of additions given by parameters named after `prefix`,
+    see `batched_product_sum_parameters`
+    """
+    width = n + overflow_size(n)
+    return _batched_product_sum(
+        [ParameterVector(f'{prefix}{i}', length=width) for i in range(n)],
+        comparator, N, n, f'CC-BPS_({prefix})_Mod_{N}', approximation_degree
+    )
+
+
+def batched_product_sum_parameters(constant: int, N: int, n: int, prefix: str,
+                                   approximation_degree: Optional[int] = None) -> Dict[str, float]:
+    width = n + overflow_size(n)
+    table = partial_constant_angles(constant, N, n, width, approximation_degree=approximation_degree)
+    values = {}
+    for i in range(n):
+        values.update(vector_values(f'{prefix}{i}', table[i]))
+    return values
+
+
+def _batched_product_sum(angle_rows: Sequence[Angles], comparator: Comparator, N: int, n: int, name: str,
+                         approximation_degree: Optional[int]) -> Gate:
+    """ all n additions share one Fourier window of the accumulator, which collects the sum s < 2^m * N
+    (m = `overflow_size(n)`) without reduction; the sum is then reduced modulo N by m comparisons with 2^k * N
+    outside of that window, the result is copied to y and everything is uncomputed, clearing the quotient bits
+    so it takes 2 (m + 1) windows and 2m comparators of at most n + m bits, instead of n windows and 2n comparators
+    of the adders of `_product_sum`; y must be clean or hold the result, as in both product sums of multipliers
+    """
+    if n == 1:
+        raise ValueError("Case n = 1 not supported")
+
+    return block_gate(name, _product_sum_regs(n), _append_batched_product_sum, angle_rows, comparator, N, n,
+                      approximation_degree)
+
+
+def _product_sum_regs(n: int) -> QRegsSpec:
+    return {
+        'ctrl': 1,
+        'x': n,
+        'y': n,
+        'flag': 1,
+        'acc': n + overflow_size(n),
+        'quotient': overflow_size(n)
+    }
+
+
+def _append_batched_product_sum(circuit: QuantumCircuit, qregs: Registers, angle_rows: Sequence[Angles],
+                                comparator: Comparator, N: int, n: int, approximation_degree: Optional[int]) -> None:
+    _, _, y_qreg, _, acc_qreg, _ = qregs
+
+    reduced_sum = _reduced_sum(angle_rows, comparator, N, n, approximation_degree)
+
+    circuit.append(reduced_sum, chain.from_iterable(qregs))
+    for i in range(n):
+        circuit.cx(acc_qreg[i], y_qreg[i])
+    circuit.append(reduced_sum.inverse(), chain.from_iterable(qregs))
+
+
+def _reduced_sum(angle_rows: Sequence[Angles], comparator: Comparator, N: int, n: int,
+                 approximation_degree: Optional[int]) -> Gate:
+    return block_gate('CC-RS', _product_sum_regs(n), _append_reduced_sum, angle_rows, comparator, N, n,
+                      approximation_degree)
+
+
+def _append_reduced_sum(circuit: QuantumCircuit, qregs: Registers, angle_rows: Sequence[Angles],
+                        comparator: Comparator, N: int, n: int, approximation_degree: Optional[int]) -> None:
+    m = overflow_size(n)
+    ctrl_qreg, x_qreg, y_qreg, flag_qreg, acc_qreg, quotient_qreg = qregs
+
+    # QFT of the clean accumulator
+    circuit.h(acc_qreg)
+    circuit.append(_accumulation(angle_rows, n), chain(ctrl_qreg, x_qreg, flag_qreg, acc_qreg))
+    circuit.append(iqft_gate(n + m, approximation_degree=approximation_degree), acc_qreg)
+
+    # flag is the second, always set control of comparators
+    circuit.x(flag_qreg)
+    borrowed = list(chain(x_qreg, y_qreg))
+    for k in reversed(range(m)):
+        width = n + m - k
+        circuit.append(
+            reduction_step(comparator, N, width, approximation_degree),
+            chain(ctrl_qreg, flag_qreg, acc_qreg[k:], borrowed[:width - 1], [quotient_qreg[k]])
+        )
+    circuit.x(flag_qreg)
+
+
+def _accumulation(angle_rows: Sequence[Angles], n: int) -> Gate:
+    regs = {
+        'ctrl': 1,
+        'x': n,
+        'flag': 1,
+        'acc': len(angle_rows[0])
+    }
+    return block_gate('CC-ACC', regs, _append_accumulation, angle_rows)
+
+
+def _append_accumulation(circuit: QuantumCircuit, qregs: Registers, angle_rows: Sequence[Angles]) -> None:
+    ctrl_qreg, x_qreg, flag_qreg, acc_qreg = qregs
+
+    for i, angles in enumerate(angle_rows):
+        circuit.ccx(ctrl_qreg[0], x_qreg[i], flag_qreg[0])
+        for j, angle in enumerate(angles):
+            circuit.cp(angle, flag_qreg[0], acc_qreg[j])
+        circuit.ccx(ctrl_qreg[0], x_qreg[i], flag_qreg[0])
+
+
+@cached_gate
+def reduction_step(comparator: Comparator, N: int, n: int, approximation_degree: Optional[int] = None) -> Gate:
+    """ subtract N from x if x >= N, controlled by both ctrl qubits, setting the clean qubit q
+    on qubits [ctrl (2), x (n), g (n - 1), q] with g borrowed (dirty)
+    """
+    regs = {
+        'ctrl': 2,
+        'x': n,
+        'g': n - 1,
+        'q': 1
+    }
+    return block_gate(f'CC-RED_Mod_{N}', regs, _append_reduction_step, comparator, N, n, approximation_degree)
+
+
+def _append_reduction_step(circuit: QuantumCircuit, qregs: Registers, comparator: Comparator, N: int, n: int,
+                           approximation_degree: Optional[int]) -> None:
+    ctrl_qreg, x_qreg, g_qreg, q_qreg = qregs
+
+    # the comparator sets q for x < N, so controlled by the first ctrl qubit it is toggled
+    circuit.append(comparator(N, n), chain.from_iterable(qregs))
+    circuit.cx(ctrl_qreg[0], q_qreg[0])
+
+    circuit.append(qft_gate(n, approximation_degree=approximation_degree), x_qreg)
+    for i, angle in enumerate(get_angles(N, n, approximation_degree)):
+        circuit.cp(-angle, q_qreg[0], x_qreg[i])
+    circuit.append(iqft_gate(n, approximation_degree=approximation_degree), x_qreg)
+
+
+@lru_cache(maxsize=RESOURCES_CACHE_SIZE)
+def batched_product_sum_resources(comparator_resources: ComparatorResources, N: int, n: int,
+                                  approximation_degree: Optional[int] = None) -> Resources:
+    """ resources of `batched_product_sum`, which do not depend on the constant """
+    if n == 1:
+        raise ValueError("Case n = 1 not supported")
+
+    m = overflow_size(n)
+    ctrl_qreg, x_qreg, y_qreg, flag_qreg, acc_qreg, quotient_qreg = layout(1, n, n, 1, n + m, m)
+    counter = ResourceCounter(3 * n + 2 + 2 * m)
+    qubits = join(ctrl_qreg, x_qreg, y_qreg, flag_qreg, acc_qreg, quotient_qreg)
+
+    reduced_sum = _reduced_sum_resources(comparator_resources, N, n, approximation_degree)
+
+    counter.append(reduced_sum, qubits)
+    for i in range(n):
+        counter.gate('cx', acc_qreg[i], y_qreg[i])
+    counter.append(reduced_sum, qubits)
+
+    return counter.resources()
+
+
+@lru_cache(maxsize=RESOURCES_CACHE_SIZE)
+def _reduced_sum_resources(comparator_resources: ComparatorResources, N: int, n: int,
+                           approximation_degree: Optional[int]) -> Resources:
+    m = overflow_size(n)
+    ctrl_qreg, x_qreg, y_qreg, flag_qreg, acc_qreg, quotient_qreg = layout(1, n, n, 1, n + m, m)
+    counter = ResourceCounter(3 * n + 2 + 2 * m)
+
+    counter.parallel('h', acc_qreg)
+    counter.append(_accumulation_resources(n, n + m), join(ctrl_qreg, x_qreg, flag_qreg, acc_qreg))
+    counter.append(iqft_gate_resources(n + m, approximation_degree=approximation_degree), acc_qreg)
+
+    counter.gate('x', flag_qreg[0])
+    borrowed = join(x_qreg, y_qreg)
+    for k in reversed(range(m)):
+        width = n + m - k
+        counter.append(
+            reduction_step_resources(comparator_resources, N, width, approximation_degree),
+            join(ctrl_qreg, flag_qreg, acc_qreg[k:], borrowed[:width - 1], quotient_qreg[k])
+        )
+    counter.gate('x', flag_qreg[0])
+
+    return counter.resources()
+
+
+@lru_cache(maxsize=RESOURCES_CACHE_SIZE)
+def _accumulation_resources(n: int, width: int) -> Resources:
+    ctrl_qreg, x_qreg, flag_qreg, acc_qreg = layout(1, n, 1, width)
+    counter = ResourceCounter(n + width + 2)
+
+    for i in range(n):
+        counter.gate('ccx', ctrl_qreg[0], x_qreg[i], flag_qreg[0])
+        for j in range(width):
+            counter.gate('cp', flag_qreg[0], acc_qreg[j])
+        counter.gate('ccx', ctrl_qreg[0], x_qreg[i], flag_qreg[0])
+
+    return counter.resources()
+
+
+@lru_cache(maxsize=RESOURCES_CACHE_SIZE)
+def reduction_step_resources(comparator_resources: ComparatorResources, N: int, n: int,
+                             approximation_degree: Optional[int] = None) -> Resources:
+    ctrl_qreg, x_qreg, g_qreg, q_qreg = layout(2, n, n - 1, 1)
+    counter = ResourceCounter(2 * n + 2)
+
+    counter.append(comparator_resources(N, n), join(ctrl_qreg, x_qreg, g_qreg, q_qreg))
+    counter.gate('cx', ctrl_qreg[0], q_qreg[0])
+
+    counter.append(qft_gate_resources(n, approximation_degree=approximation_degree), x_qreg)
+    for i in range(n):
+        counter.gate('cp', q_qreg[0], x_qreg[i])
+    counter.append(iqft_gate_resources(n, approximation_degree=approximation_degree), x_qreg)
+
+    return counter.resources()
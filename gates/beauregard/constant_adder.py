@@ -1,8 +1,13 @@
-from typing import Union
+from functools import lru_cache
+from typing import Optional, Sequence, Union
 
 import numpy as np
 from qiskit import QuantumCircuit
-from qiskit.circuit import ParameterVector, Gate
+from qiskit.circuit import ParameterExpression, ParameterVector, Gate, Qubit
+from qiskit.circuit.library import PhaseGate
+
+from utils.gate_cache import cached_gate
+from utils.resources import RESOURCES_CACHE_SIZE, Resources, controlled_name
 
 
 def phi_constant_adder(angles: Union[np.ndarray, ParameterVector]) -> Gate:
@@ -12,17 +17,69 @@ def phi_constant_adder(angles: Union[np.ndarray, ParameterVector]) -> Gate:
     return circuit.to_gate()
 
 
-def get_angles(constant: int, n: int) -> np.ndarray:
-    constant_bits = as_bits_reversed(constant, n)
+def append_phi_rotations(circuit: QuantumCircuit, angles: Union[np.ndarray, Sequence[ParameterExpression]],
+                         qubits: Sequence[Qubit], controls: Sequence[Qubit] = ()) -> None:
+    """ rotations of `phi_constant_adder(angles)` on qubits, each controlled by `controls`, one by one
+    without controlled adders constructed by Qiskit, as flat circuits take them and parameters stay bindable
+    """
+    for angle, qubit in zip(angles, qubits):
+        rotation = PhaseGate(angle)
+        circuit.append(rotation.control(len(controls)) if controls else rotation, [*controls, qubit])
+
+
+@cached_gate
+def phi_adder(constant: int, n: int, approximation_degree: Optional[int] = None) -> Gate:
+    return phi_constant_adder(get_angles(constant, n, approximation_degree))
+
+
+@cached_gate
+def controlled_phi_adder(constant: int, n: int, num_ctrl_qubits: int,
+                         approximation_degree: Optional[int] = None) -> Gate:
+    return phi_adder(constant, n, approximation_degree).control(num_ctrl_qubits)
+
+
+@lru_cache(maxsize=RESOURCES_CACHE_SIZE)
+def phi_adder_resources(n: int, num_ctrl_qubits: int = 0) -> Resources:
+    depth = 1 if num_ctrl_qubits == 0 else n
+    return Resources(n + num_ctrl_qubits, {controlled_name('p', num_ctrl_qubits): n}, depth)
+
+
+def get_angles(constant: int, n: int, approximation_degree: Optional[int] = None) -> np.ndarray:
+    return angle_table([constant], n, approximation_degree)[0]
+
+
+def angle_table(constants: Sequence[int], n: int, approximation_degree: Optional[int] = None) -> np.ndarray:
+    """ angles of phase adders of given constants, one row per constant
+    angle i is pi * (constant mod 2^(i + 1)) / 2^i, the phase added by the i + 1 lowest bits of the constant
+    bit j contributes pi / 2^(i - j); with `approximation_degree` d, contributions with i - j > d are dropped,
+    like rotations of approximate QFT
+    """
+    shifts = [0 if approximation_degree is None else max(0, i - approximation_degree) for i in range(n)]
+    if n < 62:
+        shift_array = np.array(shifts, dtype=np.int64)
+        powers = np.left_shift(1, np.arange(n, dtype=np.int64))
+        residues = np.asarray(constants, dtype=np.int64).reshape(-1, 1) % (2 * powers)
+        return np.pi * np.right_shift(residues, shift_array) / np.right_shift(powers, shift_array)
+
+    # exact division of Python integers, beyond the range of int64
+    return np.pi * np.array([[((constant % (1 << (i + 1))) >> shift) / (1 << (i - shift))
+                              for i, shift in enumerate(shifts)] for constant in constants],
+                            dtype=float).reshape(-1, n)
+
 
-    angles = np.zeros(n)
-    for i in range(n):
-        for j in range(i + 1):
-            k = i - j
-            if constant_bits[j] == '1':
-                angles[i] += pow(2, -k)
+@lru_cache(maxsize=1024)
+def partial_constant_angles(constant: int, N: int, count: int, n: int, complement: bool = False,
+                            approximation_degree: Optional[int] = None) -> np.ndarray:
+    """ `angle_table` of constants 2^i * constant mod N (or N minus them, with `complement`) for i < count
+    cached, so the returned table is read-only
+    """
+    partial_constants = [(pow(2, i, mod=N) * constant) % N for i in range(count)]
+    if complement:
+        partial_constants = [N - partial_constant for partial_constant in partial_constants]
 
-    return angles * np.pi
+    table = angle_table(partial_constants, n, approximation_degree)
+    table.setflags(write=False)
+    return table
 
 
 def as_bits_reversed(constant: int, n: int):
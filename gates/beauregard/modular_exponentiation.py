@@ -1,64 +1,194 @@
-from typing import Union
+from functools import lru_cache, partial
+from typing import Dict, List, Optional, Tuple, Union
 
 import numpy as np
-from qiskit import QuantumRegister, QuantumCircuit
-from qiskit.circuit import Instruction, Gate, ParameterVector
-from qiskit.circuit.library import QFT
-
-from gates.beauregard.constant_adder import phi_constant_adder, get_angles
+from qiskit import QuantumCircuit
+from qiskit.circuit import Instruction, ParameterVector
+
+from gates.beauregard.constant_adder import partial_constant_angles, phi_adder, \
+    controlled_phi_adder, phi_adder_resources, get_angles, append_phi_rotations
+from gates.qft import qft_gate, iqft_gate, qft_gate_resources, iqft_gate_resources
+from utils.circuit_creation import BlockGate, FlatCircuit, Registers, block_gate, create_circuit
+from utils.custom_typing import QRegsSpec
+from utils.gate_cache import cached_gate
+from utils.parallel_construction import build_gates
+from utils.parameters import vector_values
+from utils.resources import RESOURCES_CACHE_SIZE, Resources, ResourceCounter, layout, join
+
+Angles = Union[np.ndarray, ParameterVector]
+
+
+@cached_gate
+def modular_exponentiation_gate(constant: int, N: int, n: int, keep_fourier: bool = False,
+                                approximation_degree: Optional[int] = None) -> Instruction:
+    """ with `keep_fourier`, register b stays in Fourier space between multipliers, so QFT and inverse QFT
+    are applied to it once instead of in every multiplier
+    with `approximation_degree` d, QFTs and phase adders drop rotations by pi / 2^k with k > d
+    """
+    return ModularExponentiationGate(constant, N, n, keep_fourier, approximation_degree)
+
+
+class ModularExponentiationGate(BlockGate):
+    def __init__(self, constant: int, N: int, n: int, keep_fourier: bool = False,
+                 approximation_degree: Optional[int] = None) -> None:
+        super().__init__(f'{constant}^x mod {N}', _modular_exponentiation_regs(n), _append_modular_exponentiation,
+                         constant, N, n, keep_fourier, approximation_degree)
+        self.constant = constant
+        self.N = N
+        self.n = n
+        self.keep_fourier = keep_fourier
+        self.approximation_degree = approximation_degree
+
+
+def _append_modular_exponentiation(circuit: QuantumCircuit, qregs: Registers, constant: int, N: int, n: int,
+                                   keep_fourier: bool, approximation_degree: Optional[int]) -> None:
+    _append_multipliers(
+        circuit, qregs,
+        build_gates(controlled_modular_multiplication_gate,
+                    [(pow(constant, pow(2, i), mod=N), N, n, keep_fourier, approximation_degree)
+                     for i in range(2 * n)]),
+        n, keep_fourier, approximation_degree
+    )
+
+
+@cached_gate
+def parameterized_modular_exponentiation_gate(N: int, n: int, keep_fourier: bool = False,
+                                              approximation_degree: Optional[int] = None) -> Instruction:
+    """ modular exponentiation with multipliers parameterized by angles, see `modular_exponentiation_parameters` """
+    return block_gate(
+        f'a^x mod {N}', _modular_exponentiation_regs(n), _append_multipliers,
+        build_gates(parameterized_controlled_modular_multiplication_gate,
+                    [(N, n, f'm{i}', keep_fourier, approximation_degree) for i in range(2 * n)]),
+        n, keep_fourier, approximation_degree
+    )
+
+
+def modular_exponentiation_parameters(constant: int, N: int, n: int,
+                                      approximation_degree: Optional[int] = None) -> Dict[str, float]:
+    values = {}
+    for i in range(2 * n):
+        partial_constant = pow(constant, pow(2, i), mod=N)
+        values.update(controlled_modular_multiplication_parameters(partial_constant, N, n, f'm{i}',
+                                                                   approximation_degree))
+    return values
 
 
-def modular_exponentiation_gate(constant: int, N: int, n: int) -> Instruction:
-    up_qreg = QuantumRegister(2 * n, name='up')
-    down_qreg = QuantumRegister(n, name='down')
-    aux_qreg = QuantumRegister(n + 2, name='aux')
+def _modular_exponentiation_regs(n: int) -> QRegsSpec:
+    return {
+        'up': 2 * n,
+        'down': n,
+        'aux': n + 2
+    }
 
-    circuit = QuantumCircuit(up_qreg,
-                             down_qreg,
-                             aux_qreg,
-                             name=f'{constant}^x mod {N}')
 
-    qft = QFT(n + 1, do_swaps=False).to_gate()
-    iqft = qft.inverse()
+def _append_multipliers(circuit: QuantumCircuit, qregs: Registers, multipliers: List[Instruction], n: int,
+                        keep_fourier: bool, approximation_degree: Optional[int]) -> None:
+    up_qreg, down_qreg, aux_qreg = qregs
 
-    phi_add_N = phi_constant_adder(get_angles(N, n + 1))
-    iphi_add_N = phi_add_N.inverse()
-    c_phi_add_N = phi_add_N.control(1)
+    b_qubits = aux_qreg[:n + 1]
+    if keep_fourier:
+        circuit.append(qft_gate(n + 1, approximation_degree=approximation_degree), b_qubits)
 
-    for i in range(2 * n):
-        partial_constant = pow(constant, pow(2, i), mod=N)
-        modulo_multiplier = controlled_modular_multiplication_gate(partial_constant, N, n, c_phi_add_N, iphi_add_N, qft, iqft)
+    for i, modulo_multiplier in enumerate(multipliers):
         circuit.append(modulo_multiplier, [up_qreg[i], *down_qreg, *aux_qreg])
 
-    return circuit.to_instruction()
+    if keep_fourier:
+        circuit.append(iqft_gate(n + 1, approximation_degree=approximation_degree), b_qubits)
+
+
+@cached_gate
+def controlled_modular_multiplication_gate(a: int, N: int, n: int, keep_fourier: bool = False,
+                                           approximation_degree: Optional[int] = None) -> Instruction:
+    """ with `keep_fourier`, register b is expected and left in Fourier space (QFT of |0>) """
+    return ControlledModularMultiplicationGate(a, N, n, keep_fourier, approximation_degree)
+
+
+class ControlledModularMultiplicationGate(BlockGate):
+    def __init__(self, constant: int, N: int, n: int, keep_fourier: bool = False,
+                 approximation_degree: Optional[int] = None) -> None:
+        super().__init__('cmult_a_mod_N', _controlled_modular_multiplication_regs(n),
+                         _append_controlled_modular_multiplication, constant, N, n, keep_fourier,
+                         approximation_degree)
+        self.constant = constant
+        self.N = N
+        self.n = n
+        self.keep_fourier = keep_fourier
+        self.approximation_degree = approximation_degree
+
+
+def _append_controlled_modular_multiplication(circuit: QuantumCircuit, qregs: Registers, constant: int, N: int,
+                                              n: int, keep_fourier: bool,
+                                              approximation_degree: Optional[int]) -> None:
+    a_inv = pow(constant, -1, mod=N)
+    _append_multiplication(
+        circuit, qregs,
+        list(partial_constant_angles(constant, N, n, n + 1, approximation_degree=approximation_degree)),
+        list(partial_constant_angles(a_inv, N, n, n + 1, approximation_degree=approximation_degree)),
+        N, n, keep_fourier, approximation_degree
+    )
+
+
+@cached_gate
+def parameterized_controlled_modular_multiplication_gate(N: int, n: int, prefix: str, keep_fourier: bool = False,
+                                                         approximation_degree: Optional[int] = None) -> Instruction:
+    """ multiplier with angles of adders as parameters named after `prefix`,
+    see `controlled_modular_multiplication_parameters`
+    """
+    return block_gate(
+        'cmult_a_mod_N', _controlled_modular_multiplication_regs(n), _append_multiplication,
+        [ParameterVector(f'{prefix}_add{i}', length=n + 1) for i in range(n)],
+        [ParameterVector(f'{prefix}_sub{i}', length=n + 1) for i in range(n)],
+        N, n, keep_fourier, approximation_degree
+    )
+
+
+def controlled_modular_multiplication_parameters(a: int, N: int, n: int, prefix: str,
+                                                 approximation_degree: Optional[int] = None) -> Dict[str, float]:
+    a_inv = pow(a, -1, mod=N)
+    add_angles = partial_constant_angles(a, N, n, n + 1, approximation_degree=approximation_degree)
+    sub_angles = partial_constant_angles(a_inv, N, n, n + 1, approximation_degree=approximation_degree)
+    values = {}
+    for i in range(n):
+        values.update(vector_values(f'{prefix}_add{i}', add_angles[i]))
+        values.update(vector_values(f'{prefix}_sub{i}', sub_angles[i]))
+    return values
+
 
+def _controlled_modular_multiplication_regs(n: int) -> QRegsSpec:
+    return {
+        'ctrl': 1,
+        'x': n,
+        'b': n + 1,
+        'flag': 1
+    }
 
-def controlled_modular_multiplication_gate(a: int, N: int, n: int,
-                                           c_phi_add_N: Gate, iphi_add_N: Gate, qft: Gate, iqft: Gate) -> Instruction:
-    ctrl_qreg = QuantumRegister(1, 'ctrl')
-    x_qreg = QuantumRegister(n, 'x')
-    b_qreg = QuantumRegister(n + 1, 'b')
-    flag_qreg = QuantumRegister(1, 'flag')
 
-    circuit = QuantumCircuit(ctrl_qreg,
-                             x_qreg,
-                             b_qreg,
-                             flag_qreg,
-                             name='cmult_a_mod_N')
+def _append_multiplication(circuit: QuantumCircuit, qregs: Registers, add_angles: List[Angles],
+                           sub_angles: List[Angles], N: int, n: int, keep_fourier: bool,
+                           approximation_degree: Optional[int]) -> None:
+    ctrl_qreg, x_qreg, b_qreg, flag_qreg = qregs
 
-    angle_params = ParameterVector('angles', length=n + 1)
-    modulo_adder = _double_controlled_phi_add_mod_N(angle_params, c_phi_add_N, iphi_add_N, qft, iqft)
+    qft = qft_gate(n + 1, approximation_degree=approximation_degree)
+    iqft = iqft_gate(n + 1, approximation_degree=approximation_degree)
 
-    def append_adder(adder: QuantumCircuit, constant: int, idx: int):
-        partial_constant = (pow(2, idx, mod=N) * constant) % N
-        angles = get_angles(partial_constant, n + 1)
-        bound = adder.assign_parameters({angle_params: angles})
-        circuit.append(bound, [*ctrl_qreg, x_qreg[idx], *b_qreg, *flag_qreg])
+    angle_params, modulo_adder = _double_controlled_phi_add_mod_N_template(N, n, approximation_degree)
+    modulo_adder_inv = modulo_adder.inverse()
 
-    circuit.append(qft, b_qreg)
+    def append_adder(angles: Angles, idx: int, inverse: bool = False):
+        if isinstance(circuit, FlatCircuit):
+            # operations of the adder go to flat circuits directly, nested definitions bind the shared template
+            adder = block_gate('ccphi_add_a_mod_N', _double_controlled_phi_add_mod_N_regs(n),
+                               _append_double_controlled_phi_add_mod_N, angles, N, approximation_degree)
+            adder = adder.inverse() if inverse else adder
+        else:
+            adder = (modulo_adder_inv if inverse else modulo_adder).assign_parameters({angle_params: angles}).to_gate()
+        circuit.append(adder, [*ctrl_qreg, x_qreg[idx], *b_qreg, *flag_qreg])
+
+    if not keep_fourier:
+        circuit.append(qft, b_qreg)
 
     for i in range(n):
-        append_adder(modulo_adder, a, i)
+        append_adder(add_angles[i], i)
 
     circuit.append(iqft, b_qreg)
 
@@ -67,45 +197,63 @@ def controlled_modular_multiplication_gate(a: int, N: int, n: int,
 
     circuit.append(qft, b_qreg)
 
-    a_inv = pow(a, -1, mod=N)
-    modulo_adder_inv = modulo_adder.inverse()
     for i in reversed(range(n)):
-        append_adder(modulo_adder_inv, a_inv, i)
+        append_adder(sub_angles[i], i, inverse=True)
 
-    circuit.append(iqft, b_qreg)
+    if not keep_fourier:
+        circuit.append(iqft, b_qreg)
+
+
+@cached_gate
+def _double_controlled_phi_add_mod_N_template(N: int, n: int, approximation_degree: Optional[int] = None) \
+        -> Tuple[ParameterVector, QuantumCircuit]:
+    angle_params = ParameterVector('angles', length=n + 1)
+    circuit = create_circuit(_double_controlled_phi_add_mod_N_regs(n), 'ccphi_add_a_mod_N')
+    _append_double_controlled_phi_add_mod_N(circuit, circuit.qregs, angle_params, N, approximation_degree)
+    return angle_params, circuit
 
-    return circuit.to_instruction()
 
+def _double_controlled_phi_add_mod_N_regs(n: int) -> QRegsSpec:
+    return {
+        'ctrl': 2,
+        'b': n + 1,
+        'flag': 1
+    }
 
-def _double_controlled_phi_add_mod_N(angles: Union[np.ndarray, ParameterVector],
-                                     c_phi_add_N: Gate,
-                                     iphi_add_N: Gate,
-                                     qft: Gate,
-                                     iqft: Gate
-                                     ) -> QuantumCircuit:
-    ctrl_qreg = QuantumRegister(2, 'ctrl')
-    b_qreg = QuantumRegister(len(angles), 'b')
-    flag_qreg = QuantumRegister(1, 'flag')
 
-    circuit = QuantumCircuit(ctrl_qreg,
-                             b_qreg,
-                             flag_qreg,
-                             name='ccphi_add_a_mod_N')
+def _append_double_controlled_phi_add_mod_N(circuit: QuantumCircuit, qregs: Registers, angles: Angles, N: int,
+                                            approximation_degree: Optional[int]) -> None:
+    ctrl_qreg, b_qreg, flag_qreg = qregs
 
-    cc_phi_add_a = phi_constant_adder(angles).control(2)
-    cc_iphi_add_a = cc_phi_add_a.inverse()
+    qft = qft_gate(len(b_qreg), approximation_degree=approximation_degree)
+    iqft = iqft_gate(len(b_qreg), approximation_degree=approximation_degree)
 
-    circuit.append(cc_phi_add_a, [*ctrl_qreg, *b_qreg])
+    # rotations of the parameterized adder are appended one by one, as Qiskit binds parameters of controlled gates
+    # but not of the definitions of their base gates
+    cc_phi_add_a = partial(append_phi_rotations, circuit, angles, b_qreg, ctrl_qreg)
+    cc_iphi_add_a = partial(append_phi_rotations, circuit, [-angle for angle in angles], b_qreg, ctrl_qreg)
 
-    circuit.append(iphi_add_N, b_qreg)
+    if isinstance(circuit, FlatCircuit):
+        # rotations go to flat circuits directly, without controlled adders constructed by Qiskit
+        N_angles = get_angles(N, len(b_qreg), approximation_degree)
+        iphi_add_N = partial(append_phi_rotations, circuit, -N_angles, b_qreg)
+        c_phi_add_N = partial(append_phi_rotations, circuit, N_angles, b_qreg, flag_qreg)
+    else:
+        iphi_add_N = partial(circuit.append, phi_adder(N, len(b_qreg), approximation_degree).inverse(), b_qreg)
+        c_phi_add_N = partial(circuit.append, controlled_phi_adder(N, len(b_qreg), 1, approximation_degree),
+                              [*flag_qreg, *b_qreg])
+
+    cc_phi_add_a()
+
+    iphi_add_N()
 
     circuit.append(iqft, b_qreg)
     circuit.cx(b_qreg[-1], flag_qreg[0])
     circuit.append(qft, b_qreg)
 
-    circuit.append(c_phi_add_N, [*flag_qreg, *b_qreg])
+    c_phi_add_N()
 
-    circuit.append(cc_iphi_add_a, [*ctrl_qreg, *b_qreg])
+    cc_iphi_add_a()
 
     circuit.append(iqft, b_qreg)
     circuit.x(b_qreg[-1])
@@ -113,6 +261,86 @@ def _double_controlled_phi_add_mod_N(angles: Union[np.ndarray, ParameterVector],
     circuit.x(b_qreg[-1])
     circuit.append(qft, b_qreg)
 
-    circuit.append(cc_phi_add_a, [*ctrl_qreg, *b_qreg])
+    cc_phi_add_a()
+
+
+@lru_cache(maxsize=RESOURCES_CACHE_SIZE)
+def modular_exponentiation_gate_resources(constant: Optional[int], N: int, n: int, keep_fourier: bool = False,
+                                          approximation_degree: Optional[int] = None) -> Resources:
+    up_qreg, down_qreg, aux_qreg = layout(2 * n, n, n + 2)
+    counter = ResourceCounter(4 * n + 2)
+
+    if keep_fourier:
+        counter.append(qft_gate_resources(n + 1, approximation_degree=approximation_degree), aux_qreg[:n + 1])
+
+    for i in range(2 * n):
+        partial_constant = None if constant is None else pow(constant, pow(2, i), mod=N)
+        modulo_multiplier = controlled_modular_multiplication_gate_resources(partial_constant, N, n, keep_fourier,
+                                                                             approximation_degree)
+        counter.append(modulo_multiplier, join(up_qreg[i], down_qreg, aux_qreg))
+
+    if keep_fourier:
+        counter.append(iqft_gate_resources(n + 1, approximation_degree=approximation_degree), aux_qreg[:n + 1])
+
+    return counter.resources()
+
+
+@lru_cache(maxsize=RESOURCES_CACHE_SIZE)
+def controlled_modular_multiplication_gate_resources(a: Optional[int], N: int, n: int, keep_fourier: bool = False,
+                                                    approximation_degree: Optional[int] = None) -> Resources:
+    ctrl_qreg, x_qreg, b_qreg, flag_qreg = layout(1, n, n + 1, 1)
+    counter = ResourceCounter(2 * n + 3)
+
+    qft = qft_gate_resources(n + 1, approximation_degree=approximation_degree)
+    iqft = iqft_gate_resources(n + 1, approximation_degree=approximation_degree)
+    modulo_adder = _double_controlled_phi_add_mod_N_resources(N, n, approximation_degree)
+
+    if not keep_fourier:
+        counter.append(qft, b_qreg)
+    for i in range(n):
+        counter.append(modulo_adder, join(ctrl_qreg, x_qreg[i], b_qreg, flag_qreg))
+    counter.append(iqft, b_qreg)
+
+    for i in range(n):
+        counter.gate('cswap', ctrl_qreg[0], x_qreg[i], b_qreg[i])
+
+    counter.append(qft, b_qreg)
+    for i in reversed(range(n)):
+        counter.append(modulo_adder, join(ctrl_qreg, x_qreg[i], b_qreg, flag_qreg))
+    if not keep_fourier:
+        counter.append(iqft, b_qreg)
+
+    return counter.resources()
+
+
+@lru_cache(maxsize=RESOURCES_CACHE_SIZE)
+def _double_controlled_phi_add_mod_N_resources(N: int, n: int, approximation_degree: Optional[int] = None) -> Resources:
+    ctrl_qreg, b_qreg, flag_qreg = layout(2, n + 1, 1)
+    counter = ResourceCounter(n + 4)
+
+    qft = qft_gate_resources(n + 1, approximation_degree=approximation_degree)
+    iqft = iqft_gate_resources(n + 1, approximation_degree=approximation_degree)
+
+    phi_add_N = phi_adder_resources(n + 1)
+    c_phi_add_N = phi_adder_resources(n + 1, 1)
+    cc_phi_add_a = phi_adder_resources(n + 1, 2)
+
+    counter.append(cc_phi_add_a, join(ctrl_qreg, b_qreg))
+    counter.append(phi_add_N, b_qreg)
+
+    counter.append(iqft, b_qreg)
+    counter.gate('cx', b_qreg[-1], flag_qreg[0])
+    counter.append(qft, b_qreg)
+
+    counter.append(c_phi_add_N, join(flag_qreg, b_qreg))
+    counter.append(cc_phi_add_a, join(ctrl_qreg, b_qreg))
+
+    counter.append(iqft, b_qreg)
+    counter.gate('x', b_qreg[-1])
+    counter.gate('cx', b_qreg[-1], flag_qreg[0])
+    counter.gate('x', b_qreg[-1])
+    counter.append(qft, b_qreg)
+
+    counter.append(cc_phi_add_a, join(ctrl_qreg, b_qreg))
 
-    return circuit
+    return counter.resources()
@@ -0,0 +1,41 @@
+from functools import lru_cache
+from typing import Optional
+
+from qiskit import QuantumCircuit
+from qiskit.circuit import Gate
+
+from utils.bits import as_bits_reversed
+from utils.circuit_creation import Registers, block_gate
+from utils.custom_typing import QRegsSpec
+from utils.gate_cache import cached_gate
+from utils.resources import RESOURCES_CACHE_SIZE, Resources, resolve_constant
+
+
+@cached_gate
+def controlled_constant_load(constant: int, n: int) -> Gate:
+    """ controlled multiplication by the constant specialized to the input 1, |1> -> |constant> when ctrl is set
+    correct only for the input 1
+    """
+    return block_gate(f'C-Load({constant})', controlled_constant_load_regs(n), _append_controlled_constant_load,
+                      constant, n)
+
+
+def _append_controlled_constant_load(circuit: QuantumCircuit, qregs: Registers, constant: int, n: int) -> None:
+    ctrl_qreg, x_qreg = qregs
+
+    for i, bit in enumerate(as_bits_reversed(constant ^ 1, n)):
+        if bit == '1':
+            circuit.cx(ctrl_qreg[0], x_qreg[i])
+
+
+def controlled_constant_load_regs(n: int) -> QRegsSpec:
+    return {
+        'ctrl': 1,
+        'x': n
+    }
+
+
+@lru_cache(maxsize=RESOURCES_CACHE_SIZE)
+def controlled_constant_load_resources(constant: Optional[int], n: int) -> Resources:
+    flips = bin(resolve_constant(constant, n) ^ 1).count('1')
+    return Resources(n + 1, {'cx': flips} if flips else {}, flips)
@@ -1,18 +1,22 @@
+from functools import lru_cache
 from typing import Callable, List
 
-from qiskit import QuantumRegister
+from qiskit import QuantumCircuit
 from qiskit.circuit import Gate, Qubit
 from qiskit.circuit.library import CXGate, CCXGate
 
-from utils.circuit_creation import create_circuit
+from utils.circuit_creation import Registers, block_gate
 from utils.custom_typing import QRegsSpec
+from utils.gate_cache import cached_gate
+from utils.resources import RESOURCES_CACHE_SIZE, Resources, ResourceCounter, layout
 
 
+@cached_gate
 def adder(n: int) -> Gate:
     return _adder(n, adder_regs, CXGate, _cx_qubits)
 
 
-def _cx_qubits(qregs: List[QuantumRegister], i: int) -> List[Qubit]:
+def _cx_qubits(qregs: Registers, i: int) -> List[Qubit]:
     x_qreg, y_qreg = qregs
     return [x_qreg[i], y_qreg[i]]
 
@@ -24,6 +28,7 @@ def adder_regs(n: int) -> QRegsSpec:
     }
 
 
+@cached_gate
 def controlled_adder(n: int) -> Gate:
     return _adder(n, controlled_adder_regs, CCXGate, _ccx_qubits, 'C-')
 
@@ -35,7 +40,7 @@ def controlled_adder_regs(n: int) -> QRegsSpec:
     }
 
 
-def _ccx_qubits(qregs: List[QuantumRegister], i: int) -> List[Qubit]:
+def _ccx_qubits(qregs: Registers, i: int) -> List[Qubit]:
     ctrl_qreg, x_qreg, y_qreg = qregs
     return [ctrl_qreg[0], x_qreg[i], y_qreg[i]]
 
@@ -43,16 +48,20 @@ def _ccx_qubits(qregs: List[QuantumRegister], i: int) -> List[Qubit]:
 def _adder(n: int,
            regs_spec: Callable[[int], QRegsSpec],
            gate: Callable[[], Gate],
-           gate_qubits: Callable[[List[QuantumRegister], int], List[Qubit]],
+           gate_qubits: Callable[[Registers, int], List[Qubit]],
            prefix: str = '') -> Gate:
 
     regs_spec = regs_spec(n)
-    circuit = create_circuit(regs_spec, f'{prefix}Adder')
+    return block_gate(f'{prefix}Adder', regs_spec, _append_adder, n, list(regs_spec.keys()), gate, gate_qubits)
+
+
+def _append_adder(circuit: QuantumCircuit, qregs: Registers, n: int, keys: List[str],
+                  gate: Callable[[], Gate],
+                  gate_qubits: Callable[[Registers, int], List[Qubit]]) -> None:
     gate = gate()
 
-    keys = list(regs_spec.keys())
-    x_qreg = circuit.qregs[keys.index('x')]
-    y_qreg = circuit.qregs[keys.index('y')]
+    x_qreg = qregs[keys.index('x')]
+    y_qreg = qregs[keys.index('y')]
 
     for i in range(1, n):
         circuit.cx(x_qreg[i], y_qreg[i])
@@ -64,14 +73,54 @@ def _adder(n: int,
         circuit.ccx(x_qreg[i], y_qreg[i], x_qreg[i+1])
 
     for i in reversed(range(1, n)):
-        circuit.append(gate, gate_qubits(circuit.qregs, i))
+        circuit.append(gate, gate_qubits(qregs, i))
         circuit.ccx(x_qreg[i-1], y_qreg[i-1], x_qreg[i])
 
     for i in range(1, n-1):
         circuit.cx(x_qreg[i], x_qreg[i+1])
 
-    circuit.append(gate, gate_qubits(circuit.qregs, 0))
+    circuit.append(gate, gate_qubits(qregs, 0))
     for i in range(1, n):
         circuit.cx(x_qreg[i], y_qreg[i])
 
-    return circuit.to_gate()
+
+@lru_cache(maxsize=RESOURCES_CACHE_SIZE)
+def adder_resources(n: int) -> Resources:
+    return _adder_resources(n, adder_regs, 'cx')
+
+
+@lru_cache(maxsize=RESOURCES_CACHE_SIZE)
+def controlled_adder_resources(n: int) -> Resources:
+    return _adder_resources(n, controlled_adder_regs, 'ccx')
+
+
+def _adder_resources(n: int, regs_spec: Callable[[int], QRegsSpec], gate: str) -> Resources:
+    regs_spec = regs_spec(n)
+    qregs = dict(zip(regs_spec.keys(), layout(*regs_spec.values())))
+    counter = ResourceCounter(sum(regs_spec.values()))
+
+    x_qreg = qregs['x']
+    y_qreg = qregs['y']
+    ctrl_qubits = qregs.get('ctrl', [])
+
+    for i in range(1, n):
+        counter.gate('cx', x_qreg[i], y_qreg[i])
+
+    for i in reversed(range(1, n-1)):
+        counter.gate('cx', x_qreg[i], x_qreg[i+1])
+
+    for i in range(0, n-1):
+        counter.gate('ccx', x_qreg[i], y_qreg[i], x_qreg[i+1])
+
+    for i in reversed(range(1, n)):
+        counter.gate(gate, *ctrl_qubits, x_qreg[i], y_qreg[i])
+        counter.gate('ccx', x_qreg[i-1], y_qreg[i-1], x_qreg[i])
+
+    for i in range(1, n-1):
+        counter.gate('cx', x_qreg[i], x_qreg[i+1])
+
+    counter.gate(gate, *ctrl_qubits, x_qreg[0], y_qreg[0])
+    for i in range(1, n):
+        counter.gate('cx', x_qreg[i], y_qreg[i])
+
+    return counter.resources()
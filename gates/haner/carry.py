@@ -1,21 +1,25 @@
+from functools import lru_cache
 from itertools import chain
-from typing import Callable, List
+from typing import Callable, List, Optional
 
-from qiskit import QuantumCircuit, QuantumRegister
+from qiskit import QuantumCircuit
 from qiskit.circuit import Gate, Qubit
 from qiskit.circuit.library import CXGate, CCXGate
 
-from gates.haner.cccx import triple_controlled_not
+from gates.haner.cccx import triple_controlled_not, triple_controlled_not_resources
 from utils.bits import as_bits_reversed
-from utils.circuit_creation import create_circuit
+from utils.circuit_creation import Registers, block_gate
 from utils.custom_typing import QRegsSpec
+from utils.gate_cache import cached_gate
+from utils.resources import RESOURCES_CACHE_SIZE, Resources, ResourceCounter, layout, resolve_constant, join
 
 
+@cached_gate
 def carry(constant: int, n: int) -> Gate:
     return _carry(constant, n, carry_regs, CXGate, _cx_qubits)
 
 
-def _cx_qubits(qregs: List[QuantumRegister], n: int) -> List[Qubit]:
+def _cx_qubits(qregs: Registers, n: int) -> List[Qubit]:
     if n == 1:
         return list(chain.from_iterable(qregs))
     else:
@@ -42,11 +46,12 @@ def carry_regs(n: int) -> QRegsSpec:
         }
 
 
+@cached_gate
 def controlled_carry(constant: int, n: int) -> Gate:
     return _carry(constant, n, controlled_carry_regs, CCXGate, _ccx_qubits, 'C-')
 
 
-def _ccx_qubits(qregs: List[QuantumRegister], n: int) -> List[Qubit]:
+def _ccx_qubits(qregs: Registers, n: int) -> List[Qubit]:
     if n == 1:
         return list(chain.from_iterable(qregs))
     else:
@@ -67,11 +72,12 @@ def controlled_carry_regs(n: int) -> QRegsSpec:
     }
 
 
+@cached_gate
 def double_controlled_carry(constant: int, n: int) -> Gate:
     return _carry(constant, n, double_controlled_carry_regs, triple_controlled_not, _cccx_qubits, 'CC-')
 
 
-def _cccx_qubits(qregs: List[QuantumRegister], n: int) -> List[Qubit]:
+def _cccx_qubits(qregs: Registers, n: int) -> List[Qubit]:
     ctrl_qreg, x_qreg, g_qreg, c_qreg = qregs
     if n == 1:
         return list(chain(ctrl_qreg, x_qreg, c_qreg, g_qreg))
@@ -98,22 +104,27 @@ def _carry(constant: int,
            n: int,
            regs_spec: Callable[[int], QRegsSpec],
            gate: Callable[[], Gate],
-           gate_qubits: Callable[[List[QuantumRegister], int], List[Qubit]],
+           gate_qubits: Callable[[Registers, int], List[Qubit]],
            prefix: str = '') -> Gate:
 
     regs_spec = regs_spec(n)
-    circuit = create_circuit(regs_spec, f'{prefix}Carry_({constant})')
+    return block_gate(f'{prefix}Carry_({constant})', regs_spec, _append_carry, constant, n, list(regs_spec.keys()),
+                      gate, gate_qubits)
+
+
+def _append_carry(circuit: QuantumCircuit, qregs: Registers, constant: int, n: int, keys: List[str],
+                  gate: Callable[[], Gate],
+                  gate_qubits: Callable[[Registers, int], List[Qubit]]) -> None:
     gate = gate()
-    gate_qubits = gate_qubits(circuit.qregs, n)
+    gate_qubits = gate_qubits(qregs, n)
 
     if n == 1:
         if constant == 1:
             circuit.append(gate, gate_qubits)
     else:
-        keys = list(regs_spec.keys())
-        x_qreg = circuit.qregs[keys.index('x')]
-        g_qreg = circuit.qregs[keys.index('g')]
-        body = _carry_body(constant, n, x_qreg, g_qreg)
+        x_qreg = qregs[keys.index('x')]
+        g_qreg = qregs[keys.index('g')]
+        body = _carry_body(constant, n)
         body_qubits = list(chain(x_qreg, g_qreg))
 
         circuit.append(gate, gate_qubits)
@@ -121,11 +132,13 @@ def _carry(constant: int,
         circuit.append(gate, gate_qubits)
         circuit.append(body.inverse(), body_qubits)
 
-    return circuit.to_gate()
 
+def _carry_body(constant: int, n: int) -> Gate:
+    return block_gate(f'Carry_({constant})_body', {'x': n, 'g': n - 1}, _append_carry_body, constant, n)
 
-def _carry_body(constant: int, n: int, x_qreg: QuantumRegister, g_qreg: QuantumRegister) -> Gate:
-    circuit = QuantumCircuit(x_qreg, g_qreg, name=f'Carry_({constant})_body')
+
+def _append_carry_body(circuit: QuantumCircuit, qregs: Registers, constant: int, n: int) -> None:
+    x_qreg, g_qreg = qregs
     constant_bits = as_bits_reversed(constant, n)
 
     for i in reversed(range(2, n)):
@@ -144,4 +157,74 @@ def _carry_body(constant: int, n: int, x_qreg: QuantumRegister, g_qreg: QuantumR
     for i in range(2, n):
         circuit.ccx(g_qreg[i-2], x_qreg[i], g_qreg[i-1])
 
-    return circuit.to_gate()
+
+@lru_cache(maxsize=RESOURCES_CACHE_SIZE)
+def carry_resources(constant: Optional[int], n: int) -> Resources:
+    gate = Resources(2, {'cx': 1}, 1)
+    return _carry_resources(constant, n, carry_regs, gate, _cx_qubits)
+
+
+@lru_cache(maxsize=RESOURCES_CACHE_SIZE)
+def controlled_carry_resources(constant: Optional[int], n: int) -> Resources:
+    gate = Resources(3, {'ccx': 1}, 1)
+    return _carry_resources(constant, n, controlled_carry_regs, gate, _ccx_qubits)
+
+
+@lru_cache(maxsize=RESOURCES_CACHE_SIZE)
+def double_controlled_carry_resources(constant: Optional[int], n: int) -> Resources:
+    return _carry_resources(constant, n, double_controlled_carry_regs, triple_controlled_not_resources(), _cccx_qubits)
+
+
+def _carry_resources(constant: Optional[int],
+                     n: int,
+                     regs_spec: Callable[[int], QRegsSpec],
+                     gate: Resources,
+                     gate_qubits: Callable[[List[List[int]], int], List[int]]) -> Resources:
+
+    constant = resolve_constant(constant, n)
+    regs_spec = regs_spec(n)
+    qregs = layout(*regs_spec.values())
+    counter = ResourceCounter(sum(regs_spec.values()))
+    gate_qubits = gate_qubits(qregs, n)
+
+    if n == 1:
+        if constant == 1:
+            counter.append(gate, gate_qubits)
+    else:
+        keys = list(regs_spec.keys())
+        x_qreg = qregs[keys.index('x')]
+        g_qreg = qregs[keys.index('g')]
+        body = _carry_body_resources(constant, n)
+        body_qubits = join(x_qreg, g_qreg)
+
+        counter.append(gate, gate_qubits)
+        counter.append(body, body_qubits)
+        counter.append(gate, gate_qubits)
+        counter.append(body, body_qubits)
+
+    return counter.resources()
+
+
+@lru_cache(maxsize=RESOURCES_CACHE_SIZE)
+def _carry_body_resources(constant: int, n: int) -> Resources:
+    x_qreg, g_qreg = layout(n, n - 1)
+    counter = ResourceCounter(2 * n - 1)
+    constant_bits = as_bits_reversed(constant, n)
+
+    for i in reversed(range(2, n)):
+        if constant_bits[i] == '1':
+            counter.gate('cx', x_qreg[i], g_qreg[i-1])
+            counter.gate('x', x_qreg[i])
+        counter.gate('ccx', g_qreg[i-2], x_qreg[i], g_qreg[i-1])
+
+    if constant_bits[1] == '1':
+        counter.gate('cx', x_qreg[1], g_qreg[0])
+        counter.gate('x', x_qreg[1])
+
+    if constant_bits[0] == '1':
+        counter.gate('ccx', x_qreg[0], x_qreg[1], g_qreg[0])
+
+    for i in range(2, n):
+        counter.gate('ccx', g_qreg[i-2], x_qreg[i], g_qreg[i-1])
+
+    return counter.resources()
@@ -1,17 +1,26 @@
-from utils.circuit_creation import create_circuit
+from functools import lru_cache
+
+from qiskit import QuantumCircuit
+from qiskit.circuit import Gate
+
+from utils.circuit_creation import Registers, block_gate
 from utils.custom_typing import QRegsSpec
+from utils.gate_cache import cached_gate
+from utils.resources import RESOURCES_CACHE_SIZE, Resources, ResourceCounter, layout
+
 
+@cached_gate
+def triple_controlled_not() -> Gate:
+    return block_gate('CCCX', cccx_regs(), _append_triple_controlled_not)
 
-def triple_controlled_not():
-    circuit = create_circuit(cccx_regs(), 'CCCX')
-    ctrl_qreg, x_qreg, g_qreg = circuit.qregs
+
+def _append_triple_controlled_not(circuit: QuantumCircuit, qregs: Registers) -> None:
+    ctrl_qreg, x_qreg, g_qreg = qregs
 
     for _ in range(2):
         circuit.ccx(ctrl_qreg[2], g_qreg[0], x_qreg[0])
         circuit.ccx(ctrl_qreg[0], ctrl_qreg[1], g_qreg[0])
 
-    return circuit.to_gate()
-
 
 def cccx_regs() -> QRegsSpec:
     """ definition of CCCX registers
@@ -24,3 +33,15 @@ def cccx_regs() -> QRegsSpec:
         'x': 1,
         'g': 1
     }
+
+
+@lru_cache(maxsize=RESOURCES_CACHE_SIZE)
+def triple_controlled_not_resources() -> Resources:
+    ctrl_qreg, x_qreg, g_qreg = layout(*cccx_regs().values())
+    counter = ResourceCounter(5)
+
+    for _ in range(2):
+        counter.gate('ccx', ctrl_qreg[2], g_qreg[0], x_qreg[0])
+        counter.gate('ccx', ctrl_qreg[0], ctrl_qreg[1], g_qreg[0])
+
+    return counter.resources()
@@ -1,14 +1,19 @@
+from functools import lru_cache
 from itertools import chain
-from typing import Callable
+from typing import Callable, List, Optional
 
+from qiskit import QuantumCircuit
 from qiskit.circuit import Gate
 
 from gates.haner.carry import carry, carry_regs, controlled_carry, controlled_carry_regs, double_controlled_carry, \
-    double_controlled_carry_regs
-from utils.circuit_creation import create_circuit
+    double_controlled_carry_regs, carry_resources, controlled_carry_resources, double_controlled_carry_resources
+from utils.circuit_creation import Registers, block_gate
 from utils.custom_typing import QRegsSpec
+from utils.gate_cache import cached_gate
+from utils.resources import RESOURCES_CACHE_SIZE, Resources, ResourceCounter, layout, join
 
 
+@cached_gate
 def comparator(constant: int, n: int) -> Gate:
     return _comparator(constant, n, carry_regs, carry)
 
@@ -17,6 +22,7 @@ def comparator_regs(n: int) -> QRegsSpec:
     return carry_regs(n)
 
 
+@cached_gate
 def controlled_comparator(constant: int, n: int) -> Gate:
     return _comparator(constant, n, controlled_carry_regs, controlled_carry, 'C-')
 
@@ -25,6 +31,7 @@ def controlled_comparator_regs(n: int) -> QRegsSpec:
     return controlled_carry_regs(n)
 
 
+@cached_gate
 def double_controlled_comparator(constant: int, n: int) -> Gate:
     return _comparator(constant, n, double_controlled_carry_regs, double_controlled_carry, 'CC-')
 
@@ -40,16 +47,51 @@ def _comparator(constant: int,
                 prefix: str = '') -> Gate:
 
     regs_spec = regs_spec(n)
-    circuit = create_circuit(regs_spec, f'{prefix}Comp_({constant})')
+    return block_gate(f'{prefix}Comp_({constant})', regs_spec, _append_comparator, constant, n,
+                      list(regs_spec.keys()), gate)
 
-    keys = list(regs_spec.keys())
-    x_qreg = circuit.qregs[keys.index('x')]
+
+def _append_comparator(circuit: QuantumCircuit, qregs: Registers, constant: int, n: int, keys: List[str],
+                       gate: Callable[[int, int], Gate]) -> None:
+    x_qreg = qregs[keys.index('x')]
 
     circuit.x(x_qreg)
     circuit.append(
         gate(constant, n),
-        chain.from_iterable(circuit.qregs)
+        chain.from_iterable(qregs)
     )
     circuit.x(x_qreg)
 
-    return circuit.to_gate()
+
+@lru_cache(maxsize=RESOURCES_CACHE_SIZE)
+def comparator_resources(constant: Optional[int], n: int) -> Resources:
+    return _comparator_resources(constant, n, carry_regs, carry_resources)
+
+
+@lru_cache(maxsize=RESOURCES_CACHE_SIZE)
+def controlled_comparator_resources(constant: Optional[int], n: int) -> Resources:
+    return _comparator_resources(constant, n, controlled_carry_regs, controlled_carry_resources)
+
+
+@lru_cache(maxsize=RESOURCES_CACHE_SIZE)
+def double_controlled_comparator_resources(constant: Optional[int], n: int) -> Resources:
+    return _comparator_resources(constant, n, double_controlled_carry_regs, double_controlled_carry_resources)
+
+
+def _comparator_resources(constant: Optional[int],
+                          n: int,
+                          regs_spec: Callable[[int], QRegsSpec],
+                          gate: Callable[[Optional[int], int], Resources]) -> Resources:
+
+    regs_spec = regs_spec(n)
+    qregs = layout(*regs_spec.values())
+    counter = ResourceCounter(sum(regs_spec.values()))
+
+    keys = list(regs_spec.keys())
+    x_qreg = qregs[keys.index('x')]
+
+    counter.parallel('x', x_qreg)
+    counter.append(gate(constant, n), join(*qregs))
+    counter.parallel('x', x_qreg)
+
+    return counter.resources()
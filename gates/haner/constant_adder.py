@@ -1,16 +1,26 @@
+from functools import lru_cache
 from itertools import chain
+from typing import Optional
 
+from qiskit import QuantumCircuit
 from qiskit.circuit import Gate
 
-from gates.haner.carry import controlled_carry
-from gates.haner.incrementer import controlled_incrementer
-from utils.circuit_creation import create_circuit
+from gates.haner.carry import controlled_carry, controlled_carry_resources
+from gates.haner.incrementer import controlled_incrementer, controlled_incrementer_resources
+from utils.circuit_creation import Registers, block_gate
 from utils.custom_typing import QRegsSpec
+from utils.gate_cache import cached_gate
+from utils.resources import RESOURCES_CACHE_SIZE, Resources, ResourceCounter, layout, resolve_constant, join
 
 
+@cached_gate
 def controlled_constant_adder(constant: int, n: int) -> Gate:
-    circuit = create_circuit(controlled_constant_adder_regs(n), f'C-Add_({constant})')
-    ctrl_qreg, x_qreg, g_qreg = circuit.qregs
+    return block_gate(f'C-Add_({constant})', controlled_constant_adder_regs(n), _append_controlled_constant_adder,
+                      constant, n)
+
+
+def _append_controlled_constant_adder(circuit: QuantumCircuit, qregs: Registers, constant: int, n: int) -> None:
+    ctrl_qreg, x_qreg, g_qreg = qregs
 
     if n == 1:
         if constant == 1:
@@ -45,8 +55,6 @@ def controlled_constant_adder(constant: int, n: int) -> Gate:
         circuit.append(controlled_constant_adder(low_part, mid), chain(ctrl_qreg, low_qreg, g_qreg))
         circuit.append(controlled_constant_adder(high_part, n - mid), chain(ctrl_qreg, high_qreg, g_qreg))
 
-    return circuit.to_gate()
-
 
 def controlled_constant_adder_regs(n: int) -> QRegsSpec:
     return {
@@ -54,3 +62,45 @@ def controlled_constant_adder_regs(n: int) -> QRegsSpec:
         'x': n,
         'g': 1
     }
+
+
+@lru_cache(maxsize=RESOURCES_CACHE_SIZE)
+def controlled_constant_adder_resources(constant: Optional[int], n: int) -> Resources:
+    constant = resolve_constant(constant, n)
+    ctrl_qreg, x_qreg, g_qreg = layout(*controlled_constant_adder_regs(n).values())
+    counter = ResourceCounter(n + 2)
+
+    if n == 1:
+        if constant == 1:
+            counter.gate('cx', ctrl_qreg[0], x_qreg[0])
+    else:
+        mid = n // 2 + n % 2
+
+        low_part = constant & ((1 << mid) - 1)
+        high_part = constant >> mid
+
+        low_qreg = x_qreg[:mid]
+        high_qreg = x_qreg[mid:]
+
+        carry = controlled_carry_resources(low_part, mid)
+        inc = controlled_incrementer_resources(n - mid)
+
+        inc_regs = join(g_qreg, high_qreg, low_qreg[:len(high_qreg)])
+        carry_regs = join(ctrl_qreg, low_qreg, high_qreg[:(mid - 1)], g_qreg)
+
+        counter.append(inc, inc_regs)
+
+        for i in range(len(high_qreg)):
+            counter.gate('cx', g_qreg[0], high_qreg[i])
+
+        counter.append(carry, carry_regs)
+        counter.append(inc, inc_regs)
+        counter.append(carry, carry_regs)
+
+        for i in range(len(high_qreg)):
+            counter.gate('cx', g_qreg[0], high_qreg[i])
+
+        counter.append(controlled_constant_adder_resources(low_part, mid), join(ctrl_qreg, low_qreg, g_qreg))
+        counter.append(controlled_constant_adder_resources(high_part, n - mid), join(ctrl_qreg, high_qreg, g_qreg))
+
+    return counter.resources()
@@ -1,22 +1,34 @@
+from functools import lru_cache
 from itertools import chain
+from typing import Optional
 
+from qiskit import QuantumCircuit
 from qiskit.circuit import Gate
 
-from gates.haner.comparator import double_controlled_comparator, double_controlled_comparator_regs
-from gates.haner.constant_adder import controlled_constant_adder
-from utils.circuit_creation import create_circuit
+from gates.haner.comparator import double_controlled_comparator, double_controlled_comparator_regs, \
+    double_controlled_comparator_resources
+from gates.haner.constant_adder import controlled_constant_adder, controlled_constant_adder_resources
+from utils.circuit_creation import Registers, block_gate
 from utils.custom_typing import QRegsSpec
+from utils.gate_cache import cached_gate
+from utils.resources import RESOURCES_CACHE_SIZE, Resources, ResourceCounter, layout, join
 
 
+@cached_gate
 def double_controlled_constant_modulo_adder(constant: int, N: int, n: int) -> Gate:
-    circuit = create_circuit(double_controlled_constant_modulo_adder_regs(n), f'CC-Add_({constant})_Mod_{N}')
-    ctrl_qreg, x_qreg, g_qreg, flag_qreg = circuit.qregs
+    return block_gate(f'CC-Add_({constant})_Mod_{N}', double_controlled_constant_modulo_adder_regs(n),
+                      _append_double_controlled_constant_modulo_adder, constant, N, n)
+
+
+def _append_double_controlled_constant_modulo_adder(circuit: QuantumCircuit, qregs: Registers, constant: int, N: int,
+                                                    n: int) -> None:
+    ctrl_qreg, x_qreg, g_qreg, flag_qreg = qregs
 
     adder_regs = list(chain(flag_qreg, x_qreg, [g_qreg[0]]))
 
     circuit.append(
         double_controlled_comparator(N - constant, n),
-        circuit.qubits
+        chain.from_iterable(qregs)
     )
     circuit.append(
         controlled_constant_adder(constant, n),
@@ -29,12 +41,11 @@ def double_controlled_constant_modulo_adder(constant: int, N: int, n: int) -> Ga
     )
     circuit.append(
         double_controlled_comparator(constant, n),
-        circuit.qubits
+        chain.from_iterable(qregs)
     )
 
-    return circuit.to_gate()
-
 
+@cached_gate
 def _controlled_constant_subtractor(constant: int, n: int) -> Gate:
     adder = controlled_constant_adder(constant, n)
     return adder.inverse()
@@ -43,3 +54,22 @@ def _controlled_constant_subtractor(constant: int, n: int) -> Gate:
 def double_controlled_constant_modulo_adder_regs(n: int) -> QRegsSpec:
     spec = double_controlled_comparator_regs(n)
     return {(name if name != 'c' else 'flag'): size for (name, size) in spec.items()}
+
+
+@lru_cache(maxsize=RESOURCES_CACHE_SIZE)
+def double_controlled_constant_modulo_adder_resources(constant: Optional[int], N: int, n: int) -> Resources:
+    regs_spec = double_controlled_constant_modulo_adder_regs(n)
+    ctrl_qreg, x_qreg, g_qreg, flag_qreg = layout(*regs_spec.values())
+    counter = ResourceCounter(sum(regs_spec.values()))
+    qubits = join(ctrl_qreg, x_qreg, g_qreg, flag_qreg)
+
+    adder_regs = join(flag_qreg, x_qreg, g_qreg[0])
+    complement = None if constant is None else N - constant
+
+    counter.append(double_controlled_comparator_resources(complement, n), qubits)
+    counter.append(controlled_constant_adder_resources(constant, n), adder_regs)
+    counter.gate('ccx', ctrl_qreg[0], ctrl_qreg[1], flag_qreg[0])
+    counter.append(controlled_constant_adder_resources(complement, n), adder_regs)
+    counter.append(double_controlled_comparator_resources(constant, n), qubits)
+
+    return counter.resources()
@@ -1,18 +1,31 @@
+from functools import lru_cache
 from itertools import chain
+from typing import Optional
 
+import numpy as np
+from qiskit import QuantumCircuit
 from qiskit.circuit import Gate
 
-from gates.haner.constant_modulo_adder import double_controlled_constant_modulo_adder
-from utils.circuit_creation import create_circuit
+from gates.haner.constant_modulo_adder import double_controlled_constant_modulo_adder, \
+    double_controlled_constant_modulo_adder_resources
+from utils.circuit_creation import Registers, block_gate
 from utils.custom_typing import QRegsSpec
+from utils.gate_cache import cached_gate
+from utils.resources import RESOURCES_CACHE_SIZE, Resources, ResourceCounter, layout, join
 
 
+@cached_gate
 def controlled_constant_modulo_multiplier(constant: int, N: int, n: int) -> Gate:
     if n == 1:
         raise ValueError("Creating circuit for n = 1 not supported")
 
-    circuit = create_circuit(controlled_constant_modulo_multiplier_regs(n), f'CC-Mult_({constant})_Mod_{N}')
-    ctrl_qreg, x_qreg, y_qreg, flag_qreg = circuit.qregs
+    return block_gate(f'CC-Mult_({constant})_Mod_{N}', controlled_constant_modulo_multiplier_regs(n),
+                      _append_controlled_constant_modulo_multiplier, constant, N, n)
+
+
+def _append_controlled_constant_modulo_multiplier(circuit: QuantumCircuit, qregs: Registers, constant: int, N: int,
+                                                  n: int) -> None:
+    ctrl_qreg, x_qreg, y_qreg, flag_qreg = qregs
 
     for i in reversed(range(n)):
         partial_constant = (pow(2, i) * constant) % N
@@ -25,8 +38,6 @@ def controlled_constant_modulo_multiplier(constant: int, N: int, n: int) -> Gate
             chain(ctrl_qreg, [x_qreg[i]], y_qreg, g_qreg, flag_qreg)
         )
 
-    return circuit.to_gate()
-
 
 def controlled_constant_modulo_multiplier_regs(n: int) -> QRegsSpec:
     if n == 1:
@@ -38,3 +49,22 @@ def controlled_constant_modulo_multiplier_regs(n: int) -> QRegsSpec:
         'y': n,
         'flag': 1
     }
+
+
+@lru_cache(maxsize=RESOURCES_CACHE_SIZE)
+def controlled_constant_modulo_multiplier_resources(constant: Optional[int], N: int, n: int) -> Resources:
+    regs_spec = controlled_constant_modulo_multiplier_regs(n)
+    ctrl_qreg, x_qreg, y_qreg, flag_qreg = layout(*regs_spec.values())
+    counter = ResourceCounter(sum(regs_spec.values()))
+
+    for i in reversed(range(n)):
+        partial_constant = None if constant is None else (pow(2, i) * constant) % N
+
+        g_qreg = np.delete(x_qreg, i)
+
+        counter.append(
+            double_controlled_constant_modulo_adder_resources(partial_constant, N, n),
+            join(ctrl_qreg, x_qreg[i], y_qreg, g_qreg, flag_qreg)
+        )
+
+    return counter.resources()
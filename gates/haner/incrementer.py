@@ -1,14 +1,18 @@
+from functools import lru_cache
 from itertools import chain
 from typing import Callable, List
 
-from qiskit import QuantumRegister
+from qiskit import QuantumCircuit
 from qiskit.circuit import Gate, Qubit
 
-from gates.haner.adder import adder, controlled_adder
-from utils.circuit_creation import create_circuit
+from gates.haner.adder import adder, controlled_adder, adder_resources, controlled_adder_resources
+from utils.circuit_creation import Registers, block_gate
 from utils.custom_typing import QRegsSpec
+from utils.gate_cache import cached_gate
+from utils.resources import RESOURCES_CACHE_SIZE, Resources, ResourceCounter, layout, join
 
 
+@cached_gate
 def incrementer(n: int) -> Gate:
     return _incrementer(n, incrementer_regs, _subtractor, _substractor_qubits)
 
@@ -20,15 +24,17 @@ def incrementer_regs(n: int) -> QRegsSpec:
     }
 
 
+@cached_gate
 def _subtractor(n: int) -> Gate:
     return adder(n).inverse()
 
 
-def _substractor_qubits(qregs: List[QuantumRegister]) -> List[Qubit]:
+def _substractor_qubits(qregs: Registers) -> List[Qubit]:
     x_qreg, g_qreg = qregs
     return list(chain(g_qreg, x_qreg))
 
 
+@cached_gate
 def controlled_incrementer(n: int) -> Gate:
     return _incrementer(n, controlled_incrementer_regs, _controlled_subtractor, _controlled_substractor_qubits, 'C-')
 
@@ -40,11 +46,12 @@ def controlled_incrementer_regs(n: int) -> QRegsSpec:
     }
 
 
+@cached_gate
 def _controlled_subtractor(n: int) -> Gate:
     return controlled_adder(n).inverse()
 
 
-def _controlled_substractor_qubits(qregs: List[QuantumRegister]) -> List[Qubit]:
+def _controlled_substractor_qubits(qregs: Registers) -> List[Qubit]:
     ctrl_qreg, x_qreg, g_qreg = qregs
     return list(chain(ctrl_qreg, g_qreg, x_qreg))
 
@@ -52,20 +59,43 @@ def _controlled_substractor_qubits(qregs: List[QuantumRegister]) -> List[Qubit]:
 def _incrementer(n: int,
                  regs_spec: Callable[[int], QRegsSpec],
                  gate: Callable[[int], Gate],
-                 gate_qubits: Callable[[List[QuantumRegister]], List[Qubit]],
+                 gate_qubits: Callable[[Registers], List[Qubit]],
                  prefix: str = '') -> Gate:
 
     regs_spec = regs_spec(n)
-    circuit = create_circuit(regs_spec, f'{prefix}Inc')
+    return block_gate(f'{prefix}Inc', regs_spec, _append_incrementer, n, list(regs_spec.keys()), gate, gate_qubits)
 
-    keys = list(regs_spec.keys())
-    g_qreg = circuit.qregs[keys.index('g')]
+
+def _append_incrementer(circuit: QuantumCircuit, qregs: Registers, n: int, keys: List[str],
+                        gate: Callable[[int], Gate],
+                        gate_qubits: Callable[[Registers], List[Qubit]]) -> None:
+    g_qreg = qregs[keys.index('g')]
 
     for _ in range(2):
         circuit.append(
             gate(n),
-            gate_qubits(circuit.qregs)
+            gate_qubits(qregs)
         )
         circuit.x(g_qreg)
 
-    return circuit.to_gate()
+
+@lru_cache(maxsize=RESOURCES_CACHE_SIZE)
+def incrementer_resources(n: int) -> Resources:
+    x_qreg, g_qreg = layout(*incrementer_regs(n).values())
+    return _incrementer_resources(adder_resources(n), join(g_qreg, x_qreg), g_qreg)
+
+
+@lru_cache(maxsize=RESOURCES_CACHE_SIZE)
+def controlled_incrementer_resources(n: int) -> Resources:
+    ctrl_qreg, x_qreg, g_qreg = layout(*controlled_incrementer_regs(n).values())
+    return _incrementer_resources(controlled_adder_resources(n), join(ctrl_qreg, g_qreg, x_qreg), g_qreg)
+
+
+def _incrementer_resources(subtractor: Resources, subtractor_qubits: List[int], g_qreg: List[int]) -> Resources:
+    counter = ResourceCounter(subtractor.num_qubits)
+
+    for _ in range(2):
+        counter.append(subtractor, subtractor_qubits)
+        counter.parallel('x', g_qreg)
+
+    return counter.resources()
@@ -1,26 +1,44 @@
+from functools import lru_cache
 from itertools import chain
+from typing import Optional
 
+from qiskit import QuantumCircuit
 from qiskit.circuit import Gate
 
 from gates.haner.constant_modulo_multiplier import controlled_constant_modulo_multiplier, \
-    controlled_constant_modulo_multiplier_regs
-from utils.circuit_creation import create_circuit
+    controlled_constant_modulo_multiplier_regs, controlled_constant_modulo_multiplier_resources
+from utils.circuit_creation import BlockGate, Registers
 from utils.custom_typing import QRegsSpec
+from utils.gate_cache import cached_gate
+from utils.parallel_construction import build_gates
+from utils.resources import RESOURCES_CACHE_SIZE, Resources, ResourceCounter, layout, join
 
 
+@cached_gate
 def modular_exponentiation_gate(constant: int, N: int, n: int) -> Gate:
-    circuit = create_circuit(modular_exponentiation_gate_regs(n), f'Exp({constant})_Mod_{N}')
-    x_qreg, y_qreg, aux_qreg = circuit.qregs
+    return ModularExponentiationGate(constant, N, n)
 
-    for i in range(2 * n):
-        partial_constant = get_partial_constant(constant, i, N)
+
+class ModularExponentiationGate(BlockGate):
+    def __init__(self, constant: int, N: int, n: int) -> None:
+        super().__init__(f'Exp({constant})_Mod_{N}', modular_exponentiation_gate_regs(n),
+                         _append_modular_exponentiation, constant, N, n)
+        self.constant = constant
+        self.N = N
+        self.n = n
+
+
+def _append_modular_exponentiation(circuit: QuantumCircuit, qregs: Registers, constant: int, N: int, n: int) -> None:
+    x_qreg, y_qreg, aux_qreg = qregs
+
+    multipliers = build_gates(controlled_modular_multiplication_gate,
+                              [(get_partial_constant(constant, i, N), N, n) for i in range(2 * n)])
+    for i, multiplier in enumerate(multipliers):
         circuit.append(
-            controlled_modular_multiplication_gate(partial_constant, N, n),
+            multiplier,
             list(chain([x_qreg[i]], y_qreg, aux_qreg))
         )
 
-    return circuit.to_gate()
-
 
 def modular_exponentiation_gate_regs(n: int) -> QRegsSpec:
     return {
@@ -34,13 +52,27 @@ def get_partial_constant(constant: int, i: int, N: int) -> int:
     return pow(constant, pow(2, i), mod=N)
 
 
+@cached_gate
 def controlled_modular_multiplication_gate(constant, N, n) -> Gate:
-    circuit = create_circuit(controlled_modular_multiplication_gate_regs(n), f'C-U({constant})_Mod_{N}')
-    ctrl_qreg, x_qreg, aux_qreg, flag_qreg = circuit.qregs
+    return ControlledModularMultiplicationGate(constant, N, n)
+
+
+class ControlledModularMultiplicationGate(BlockGate):
+    def __init__(self, constant: int, N: int, n: int) -> None:
+        super().__init__(f'C-U({constant})_Mod_{N}', controlled_modular_multiplication_gate_regs(n),
+                         _append_controlled_modular_multiplication, constant, N, n)
+        self.constant = constant
+        self.N = N
+        self.n = n
+
+
+def _append_controlled_modular_multiplication(circuit: QuantumCircuit, qregs: Registers, constant: int, N: int,
+                                              n: int) -> None:
+    ctrl_qreg, x_qreg, aux_qreg, flag_qreg = qregs
 
     circuit.append(
         controlled_constant_modulo_multiplier(constant, N, n),
-        chain.from_iterable(circuit.qregs)
+        chain.from_iterable(qregs)
     )
 
     for i in range(n):
@@ -49,12 +81,44 @@ def controlled_modular_multiplication_gate(constant, N, n) -> Gate:
     constant_inv = pow(constant, -1, mod=N)
     circuit.append(
         controlled_constant_modulo_multiplier(constant_inv, N, n).inverse(),
-        chain.from_iterable(circuit.qregs)
+        chain.from_iterable(qregs)
     )
 
-    return circuit.to_gate()
-
 
 def controlled_modular_multiplication_gate_regs(n: int) -> QRegsSpec:
     spec = controlled_constant_modulo_multiplier_regs(n)
     return {(name if name != 'y' else 'aux'): size for (name, size) in spec.items()}
+
+
+@lru_cache(maxsize=RESOURCES_CACHE_SIZE)
+def modular_exponentiation_gate_resources(constant: Optional[int], N: int, n: int) -> Resources:
+    regs_spec = modular_exponentiation_gate_regs(n)
+    x_qreg, y_qreg, aux_qreg = layout(*regs_spec.values())
+    counter = ResourceCounter(sum(regs_spec.values()))
+
+    for i in range(2 * n):
+        partial_constant = None if constant is None else get_partial_constant(constant, i, N)
+        counter.append(
+            controlled_modular_multiplication_gate_resources(partial_constant, N, n),
+            join(x_qreg[i], y_qreg, aux_qreg)
+        )
+
+    return counter.resources()
+
+
+@lru_cache(maxsize=RESOURCES_CACHE_SIZE)
+def controlled_modular_multiplication_gate_resources(constant: Optional[int], N: int, n: int) -> Resources:
+    regs_spec = controlled_modular_multiplication_gate_regs(n)
+    ctrl_qreg, x_qreg, aux_qreg, flag_qreg = layout(*regs_spec.values())
+    counter = ResourceCounter(sum(regs_spec.values()))
+    qubits = join(ctrl_qreg, x_qreg, aux_qreg, flag_qreg)
+
+    counter.append(controlled_constant_modulo_multiplier_resources(constant, N, n), qubits)
+
+    for i in range(n):
+        counter.gate('cswap', ctrl_qreg[0], x_qreg[i], aux_qreg[i])
+
+    constant_inv = None if constant is None else pow(constant, -1, mod=N)
+    counter.append(controlled_constant_modulo_multiplier_resources(constant_inv, N, n), qubits)
+
+    return counter.resources()
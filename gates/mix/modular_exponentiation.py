@@ -1,130 +1,468 @@
+from functools import lru_cache
 from itertools import chain
+from typing import Dict, List, Optional, Tuple, Union
 
-from qiskit import QuantumRegister, QuantumCircuit
-from qiskit.circuit import Gate
-from qiskit.circuit.library import QFT
+import numpy as np
+from qiskit import QuantumCircuit
+from qiskit.circuit import Gate, ParameterVector
 
-from gates.beauregard.constant_adder import get_angles, phi_constant_adder
-from gates.mix.comparator import double_controlled_comparator
+from gates.batched_product_sum import batch_register_size, batched_exact_from, batched_product_sum, \
+    batched_product_sum_parameters, batched_product_sum_resources, parameterized_batched_product_sum
+from gates.beauregard.constant_adder import get_angles, partial_constant_angles
+from gates.mix.comparator import double_controlled_comparator, double_controlled_comparator_resources, \
+    parameterized_double_controlled_comparator, double_controlled_comparator_parameters
+from gates.qft import qft_gate, iqft_gate, qft_gate_resources, iqft_gate_resources
+from utils.circuit_creation import BlockGate, FlatCircuit, Registers, block_gate, create_circuit
+from utils.custom_typing import QRegsSpec
+from utils.gate_cache import cached_gate
+from utils.parallel_construction import build_gates
+from utils.parameters import vector_values
+from utils.resources import RESOURCES_CACHE_SIZE, Resources, ResourceCounter, layout, join
 
+Angles = Union[np.ndarray, ParameterVector]
 
-def modular_exponentiation_gate(constant: int, N: int, n: int) -> Gate:
-    x_qreg = QuantumRegister(2 * n, name='x')
-    y_qreg = QuantumRegister(n, name='y')
-    aux_qreg = QuantumRegister(n + 1, name='aux')
 
-    circuit = QuantumCircuit(x_qreg,
-                             y_qreg,
-                             aux_qreg,
-                             name=f'Exp({constant})_Mod_{N}')
+@cached_gate(exact_from=batched_exact_from)
+def modular_exponentiation_gate(constant: int, N: int, n: int, approximation_degree: Optional[int] = None,
+                                batched_windows: bool = False) -> Gate:
+    """ with `approximation_degree` d, QFTs and phase adders drop rotations by pi / 2^k with k > d
+    with `batched_windows`, multipliers add in one Fourier window per product sum, see `batched_product_sum`;
+    the aux register grows by `batch_register_size(n)` qubits
+    """
+    return ModularExponentiationGate(constant, N, n, approximation_degree, batched_windows)
 
-    qft = QFT(n, do_swaps=False).to_gate()
-    iqft = qft.inverse()
 
+class ModularExponentiationGate(BlockGate):
+    def __init__(self, constant: int, N: int, n: int, approximation_degree: Optional[int] = None,
+                 batched_windows: bool = False) -> None:
+        super().__init__(f'Exp({constant})_Mod_{N}', _modular_exponentiation_regs(n, batched_windows),
+                         _append_modular_exponentiation, constant, N, n, approximation_degree, batched_windows)
+        self.constant = constant
+        self.N = N
+        self.n = n
+        self.approximation_degree = approximation_degree
+        self.batched_windows = batched_windows
+
+
+def _append_modular_exponentiation(circuit: QuantumCircuit, qregs: Registers, constant: int, N: int, n: int,
+                                   approximation_degree: Optional[int], batched_windows: bool) -> None:
+    _append_multipliers(
+        circuit, qregs,
+        build_gates(controlled_modular_multiplication_gate,
+                    [(pow(constant, pow(2, i), mod=N), N, n, approximation_degree, batched_windows)
+                     for i in range(2 * n)])
+    )
+
+
+@cached_gate(exact_from=batched_exact_from)
+def parameterized_modular_exponentiation_gate(N: int, n: int, approximation_degree: Optional[int] = None,
+                                              batched_windows: bool = False) -> Gate:
+    """ modular exponentiation with multipliers parameterized by angles, see `modular_exponentiation_parameters` """
+    return block_gate(
+        f'Exp(a)_Mod_{N}', _modular_exponentiation_regs(n, batched_windows), _append_multipliers,
+        build_gates(parameterized_controlled_modular_multiplication_gate,
+                    [(N, n, f'm{i}', approximation_degree, batched_windows) for i in range(2 * n)])
+    )
+
+
+def modular_exponentiation_parameters(constant: int, N: int, n: int, approximation_degree: Optional[int] = None,
+                                      batched_windows: bool = False) -> Dict[str, float]:
+    values = {}
     for i in range(2 * n):
         partial_constant = pow(constant, pow(2, i), mod=N)
+        values.update(controlled_modular_multiplication_parameters(partial_constant, N, n, f'm{i}',
+                                                                   approximation_degree, batched_windows))
+    return values
+
+
+def _modular_exponentiation_regs(n: int, batched_windows: bool) -> QRegsSpec:
+    return {
+        'x': 2 * n,
+        'y': n,
+        'aux': n + 1 + (batch_register_size(n) if batched_windows else 0)
+    }
+
+
+def _append_multipliers(circuit: QuantumCircuit, qregs: Registers, multipliers: List[Gate]) -> None:
+    x_qreg, y_qreg, aux_qreg = qregs
+
+    for i, multiplier in enumerate(multipliers):
         circuit.append(
-            controlled_modular_multiplication_gate(partial_constant, N, n, qft, iqft),
+            multiplier,
             list(chain([x_qreg[i]], y_qreg, aux_qreg))
         )
 
-    return circuit.to_gate()
 
+@cached_gate(exact_from=batched_exact_from)
+def controlled_modular_multiplication_gate(constant: int, N: int, n: int, approximation_degree: Optional[int] = None,
+                                           batched_windows: bool = False) -> Gate:
+    return ControlledModularMultiplicationGate(constant, N, n, approximation_degree, batched_windows)
 
-def controlled_modular_multiplication_gate(constant: int, N: int, n: int, qft: Gate, iqft: Gate) -> Gate:
-    ctrl_qreg = QuantumRegister(1, name='ctrl')
-    x_qreg = QuantumRegister(n, name='x')
-    aux_qreg = QuantumRegister(n, name='aux')
-    flag_qreg = QuantumRegister(1, name='flag')
 
-    circuit = QuantumCircuit(ctrl_qreg,
-                             x_qreg,
-                             aux_qreg,
-                             flag_qreg,
-                             name=f'C-MM({constant})_Mod_{N}')
+class ControlledModularMultiplicationGate(BlockGate):
+    def __init__(self, constant: int, N: int, n: int, approximation_degree: Optional[int] = None,
+                 batched_windows: bool = False) -> None:
+        super().__init__(f'C-MM({constant})_Mod_{N}', _controlled_modular_multiplication_regs(n, batched_windows),
+                         _append_controlled_modular_multiplication, constant, N, n, approximation_degree,
+                         batched_windows)
+        self.constant = constant
+        self.N = N
+        self.n = n
+        self.approximation_degree = approximation_degree
+        self.batched_windows = batched_windows
+
+
+def _append_controlled_modular_multiplication(circuit: QuantumCircuit, qregs: Registers, constant: int, N: int,
+                                              n: int, approximation_degree: Optional[int],
+                                              batched_windows: bool) -> None:
+    constant_inv = pow(constant, -1, mod=N)
+    if batched_windows:
+        _append_product_sums(
+            circuit, qregs,
+            batched_product_sum(double_controlled_comparator, constant, N, n, approximation_degree),
+            batched_product_sum(double_controlled_comparator, constant_inv, N, n, approximation_degree),
+            n
+        )
+    else:
+        _append_product_sums(
+            circuit, qregs,
+            _controlled_modular_product_sum_operator(constant, N, n, approximation_degree),
+            _controlled_modular_product_sum_operator(constant_inv, N, n, approximation_degree),
+            n
+        )
+
+
+@cached_gate(exact_from=batched_exact_from)
+def parameterized_controlled_modular_multiplication_gate(N: int, n: int, prefix: str,
+                                                         approximation_degree: Optional[int] = None,
+                                                         batched_windows: bool = False) -> Gate:
+    """ multiplier with constants of its adders as parameters named after `prefix`,
+    see `controlled_modular_multiplication_parameters`
+    """
+    regs = _controlled_modular_multiplication_regs(n, batched_windows)
+    if batched_windows:
+        return block_gate(
+            f'C-MM({prefix})_Mod_{N}', regs, _append_product_sums,
+            parameterized_batched_product_sum(double_controlled_comparator, N, n, f'{prefix}_mul',
+                                              approximation_degree),
+            parameterized_batched_product_sum(double_controlled_comparator, N, n, f'{prefix}_inv',
+                                              approximation_degree),
+            n
+        )
+    return block_gate(
+        f'C-MM({prefix})_Mod_{N}', regs, _append_product_sums,
+        _parameterized_controlled_modular_product_sum_operator(N, n, f'{prefix}_mul', approximation_degree),
+        _parameterized_controlled_modular_product_sum_operator(N, n, f'{prefix}_inv', approximation_degree),
+        n
+    )
+
+
+def controlled_modular_multiplication_parameters(constant: int, N: int, n: int, prefix: str,
+                                                 approximation_degree: Optional[int] = None,
+                                                 batched_windows: bool = False) -> Dict[str, float]:
+    constant_inv = pow(constant, -1, mod=N)
+    if batched_windows:
+        return {
+            **batched_product_sum_parameters(constant, N, n, f'{prefix}_mul', approximation_degree),
+            **batched_product_sum_parameters(constant_inv, N, n, f'{prefix}_inv', approximation_degree)
+        }
+    return {
+        **_controlled_modular_product_sum_operator_parameters(constant, N, n, f'{prefix}_mul', approximation_degree),
+        **_controlled_modular_product_sum_operator_parameters(constant_inv, N, n, f'{prefix}_inv',
+                                                              approximation_degree)
+    }
+
+
+def _controlled_modular_multiplication_regs(n: int, batched_windows: bool) -> QRegsSpec:
+    """ registers of batched product sums follow the flag """
+    return {
+        'ctrl': 1,
+        'x': n,
+        'aux': n,
+        'flag': 1,
+        'batch': batch_register_size(n) if batched_windows else 0
+    }
+
+
+def _append_product_sums(circuit: QuantumCircuit, qregs: Registers, product_sum: Gate, product_sum_inv: Gate,
+                         n: int) -> None:
+    ctrl_qreg, x_qreg, aux_qreg, _, _ = qregs
 
     circuit.append(
-        _controlled_modular_product_sum_operator(constant, N, n, qft, iqft),
-        chain.from_iterable(circuit.qregs)
+        product_sum,
+        chain.from_iterable(qregs)
     )
 
     for i in range(n):
         circuit.cswap(ctrl_qreg[0], x_qreg[i], aux_qreg[i])
 
-    constant_inv = pow(constant, -1, mod=N)
     circuit.append(
-        _controlled_modular_product_sum_operator(constant_inv, N, n, qft, iqft).inverse(),
-        chain.from_iterable(circuit.qregs)
+        product_sum_inv.inverse(),
+        chain.from_iterable(qregs)
+    )
+
+
+@cached_gate
+def _controlled_modular_product_sum_operator(constant: int, N: int, n: int,
+                                             approximation_degree: Optional[int] = None) -> Gate:
+    return _product_sum(
+        [_double_controlled_modular_adder(_partial_constant(constant, i, N), N, n, approximation_degree)
+         for i in range(n)],
+        n, f'CC-MPS_({constant})_Mod_{N}'
     )
 
-    return circuit.to_gate()
 
+@cached_gate
+def _parameterized_controlled_modular_product_sum_operator(N: int, n: int, prefix: str,
+                                                           approximation_degree: Optional[int] = None) -> Gate:
+    return _product_sum(
+        [_parameterized_double_controlled_modular_adder(n, f'{prefix}{i}', approximation_degree) for i in range(n)],
+        n, f'CC-MPS_({prefix})_Mod_{N}'
+    )
+
+
+def _controlled_modular_product_sum_operator_parameters(constant: int, N: int, n: int, prefix: str,
+                                                        approximation_degree: Optional[int]) -> Dict[str, float]:
+    add_angles = partial_constant_angles(constant, N, n, n, approximation_degree=approximation_degree)
+    sub_angles = partial_constant_angles(constant, N, n, n, complement=True,
+                                         approximation_degree=approximation_degree)
+    values = {}
+    for i in range(n):
+        values.update(_double_controlled_modular_adder_parameters(_partial_constant(constant, i, N), N, n,
+                                                                  f'{prefix}{i}', add_angles[i], sub_angles[i]))
+    return values
+
+
+def _partial_constant(constant: int, i: int, N: int) -> int:
+    return (pow(2, i, mod=N) * constant) % N
 
-def _controlled_modular_product_sum_operator(constant: int, N: int, n: int, qft: Gate, iqft: Gate) -> Gate:
+
+def _product_sum(adders: List[Gate], n: int, name: str) -> Gate:
     if n == 1:
         raise ValueError("Case n = 1 not supported")
 
-    ctrl_qreg = QuantumRegister(1, name='ctrl')
-    x_qreg = QuantumRegister(n, name='x')
-    y_qreg = QuantumRegister(n, name='y')
-    flag_qreg = QuantumRegister(1, name='flag')
+    regs = {
+        'ctrl': 1,
+        'x': n,
+        'y': n,
+        'flag': 1
+    }
+    return block_gate(name, regs, _append_product_sum, adders, n)
 
-    circuit = QuantumCircuit(ctrl_qreg,
-                             x_qreg,
-                             y_qreg,
-                             flag_qreg,
-                             name=f'CC-MPS_({constant})_Mod_{N}')
 
-    for i in reversed(range(n)):
-        partial_constant = (pow(2, i, mod=N) * constant) % N
+def _append_product_sum(circuit: QuantumCircuit, qregs: Registers, adders: List[Gate], n: int) -> None:
+    ctrl_qreg, x_qreg, y_qreg, flag_qreg = qregs
 
+    for i in reversed(range(n)):
         g_qreg = x_qreg[:]
         g_qreg.pop(i)
 
         circuit.append(
-            _double_controlled_modular_adder(partial_constant, N, n, qft, iqft),
+            adders[i],
             chain(ctrl_qreg, [x_qreg[i]], y_qreg, g_qreg, flag_qreg)
         )
 
-    return circuit.to_gate()
+
+@cached_gate
+def _double_controlled_modular_adder(constant: int, N: int, n: int, approximation_degree: Optional[int] = None) -> Gate:
+    return _modular_adder(
+        double_controlled_comparator(N - constant, n),
+        get_angles(constant, n, approximation_degree),
+        get_angles(N - constant, n, approximation_degree),
+        double_controlled_comparator(constant, n),
+        n, f'CC-MA_({constant})_Mod_{N}', approximation_degree
+    )
+
+
+@cached_gate
+def _parameterized_double_controlled_modular_adder(n: int, prefix: str,
+                                                   approximation_degree: Optional[int] = None) -> Gate:
+    return _modular_adder(
+        parameterized_double_controlled_comparator(n, f'{prefix}_cmp'),
+        ParameterVector(f'{prefix}_add', length=n),
+        ParameterVector(f'{prefix}_sub', length=n),
+        parameterized_double_controlled_comparator(n, f'{prefix}_cmp_inv'),
+        n, f'CC-MA_({prefix})', approximation_degree
+    )
+
+
+def _double_controlled_modular_adder_parameters(constant: int, N: int, n: int, prefix: str,
+                                                add_angles: np.ndarray, sub_angles: np.ndarray) -> Dict[str, float]:
+    return {
+        **double_controlled_comparator_parameters(N - constant, n, f'{prefix}_cmp'),
+        **vector_values(f'{prefix}_add', add_angles),
+        **vector_values(f'{prefix}_sub', sub_angles),
+        **double_controlled_comparator_parameters(constant, n, f'{prefix}_cmp_inv')
+    }
 
 
-def _double_controlled_modular_adder(constant: int, N: int, n: int,
-                                     qft: Gate,
-                                     iqft: Gate) -> Gate:
-    ctrl_qreg = QuantumRegister(2, name='ctrl')
-    x_qreg = QuantumRegister(n, name='x')
-    g_qreg = QuantumRegister(n - 1 if n >= 2 else 1, name='g')
-    flag_qreg = QuantumRegister(1, name='flag')
+def _modular_adder(comparator: Gate, add_angles: Angles, sub_angles: Angles, comparator_inv: Gate, n: int,
+                   name: str, approximation_degree: Optional[int]) -> Gate:
+    """ add the constant to x modulo N, controlled by both ctrl qubits
+    both phase additions share a single Fourier window; `batched_product_sum` shares one between all adders
+    """
+    regs = {
+        'ctrl': 2,
+        'x': n,
+        'g': n - 1 if n >= 2 else 1,
+        'flag': 1
+    }
+    return block_gate(name, regs, _append_modular_adder, comparator, add_angles, sub_angles, comparator_inv, n,
+                      approximation_degree)
 
-    circuit = QuantumCircuit(ctrl_qreg,
-                             x_qreg,
-                             g_qreg,
-                             flag_qreg,
-                             name=f'CC-MA_({constant})_Mod_{N}')
 
-    adder_regs = list(chain(flag_qreg, x_qreg))
+def _append_modular_adder(circuit: QuantumCircuit, qregs: Registers, comparator: Gate, add_angles: Angles,
+                          sub_angles: Angles, comparator_inv: Gate, n: int,
+                          approximation_degree: Optional[int]) -> None:
+    ctrl_qreg, x_qreg, _, flag_qreg = qregs
 
     circuit.append(
-        double_controlled_comparator(N - constant, n),
-        circuit.qubits
+        comparator,
+        chain.from_iterable(qregs)
     )
 
-    circuit.append(qft, x_qreg)
+    circuit.append(qft_gate(n, approximation_degree=approximation_degree), x_qreg)
+    if isinstance(circuit, FlatCircuit):
+        # rotations go to flat circuits directly, nested definitions bind the shared template
+        _append_double_controlled_phase_adder(circuit, [ctrl_qreg, x_qreg, flag_qreg], add_angles, sub_angles)
+    else:
+        add_params, sub_params, phase_adder = _double_controlled_phase_adder_template(n)
+        bound_phase_adder = phase_adder.assign_parameters({
+            add_params: add_angles,
+            sub_params: sub_angles
+        }).to_gate()
+        circuit.append(
+            bound_phase_adder,
+            chain(ctrl_qreg, x_qreg, flag_qreg)
+        )
+    circuit.append(iqft_gate(n, approximation_degree=approximation_degree), x_qreg)
+
     circuit.append(
-        phi_constant_adder(get_angles(constant, n)).control(1),
-        adder_regs
+        comparator_inv,
+        chain.from_iterable(qregs)
     )
+
+
+@cached_gate
+def _double_controlled_phase_adder_template(n: int) -> Tuple[ParameterVector, ParameterVector, QuantumCircuit]:
+    circuit = create_circuit({'ctrl': 2, 'x': n, 'flag': 1}, 'CC-PA')
+
+    add_params = ParameterVector('add', length=n)
+    sub_params = ParameterVector('sub', length=n)
+    _append_double_controlled_phase_adder(circuit, circuit.qregs, add_params, sub_params)
+
+    return add_params, sub_params, circuit
+
+
+def _append_double_controlled_phase_adder(circuit: QuantumCircuit, qregs: Registers, add_angles: Angles,
+                                          sub_angles: Angles) -> None:
+    ctrl_qreg, x_qreg, flag_qreg = qregs
+
+    for i, angle in enumerate(add_angles):
+        circuit.cp(angle, flag_qreg[0], x_qreg[i])
     circuit.ccx(ctrl_qreg[0], ctrl_qreg[1], flag_qreg[0])
-    circuit.append(
-        phi_constant_adder(get_angles(N - constant, n)).control(1).inverse(),
-        adder_regs
-    )
-    circuit.append(iqft, x_qreg)
+    for i, angle in enumerate(sub_angles):
+        circuit.cp(-angle, flag_qreg[0], x_qreg[i])
 
-    circuit.append(
-        double_controlled_comparator(constant, n),
-        circuit.qubits
-    )
 
-    return circuit.to_gate()
+@lru_cache(maxsize=RESOURCES_CACHE_SIZE)
+def modular_exponentiation_gate_resources(constant: Optional[int], N: int, n: int,
+                                          approximation_degree: Optional[int] = None,
+                                          batched_windows: bool = False) -> Resources:
+    batch_size = batch_register_size(n) if batched_windows else 0
+    x_qreg, y_qreg, aux_qreg = layout(2 * n, n, n + 1 + batch_size)
+    counter = ResourceCounter(4 * n + 1 + batch_size)
+
+    for i in range(2 * n):
+        partial_constant = None if constant is None else pow(constant, pow(2, i), mod=N)
+        counter.append(
+            controlled_modular_multiplication_gate_resources(partial_constant, N, n, approximation_degree,
+                                                             batched_windows),
+            join(x_qreg[i], y_qreg, aux_qreg)
+        )
+
+    return counter.resources()
+
+
+@lru_cache(maxsize=RESOURCES_CACHE_SIZE)
+def controlled_modular_multiplication_gate_resources(constant: Optional[int], N: int, n: int,
+                                                     approximation_degree: Optional[int] = None,
+                                                     batched_windows: bool = False) -> Resources:
+    batch_size = batch_register_size(n) if batched_windows else 0
+    ctrl_qreg, x_qreg, aux_qreg, flag_qreg, batch_qreg = layout(1, n, n, 1, batch_size)
+    counter = ResourceCounter(2 * n + 2 + batch_size)
+    qubits = join(ctrl_qreg, x_qreg, aux_qreg, flag_qreg, batch_qreg)
+
+    constant_inv = None if constant is None else pow(constant, -1, mod=N)
+    if batched_windows:
+        product_sum = batched_product_sum_resources(double_controlled_comparator_resources, N, n,
+                                                    approximation_degree)
+        product_sum_inv = product_sum
+    else:
+        product_sum = _controlled_modular_product_sum_operator_resources(constant, N, n, approximation_degree)
+        product_sum_inv = _controlled_modular_product_sum_operator_resources(constant_inv, N, n,
+                                                                             approximation_degree)
+
+    counter.append(product_sum, qubits)
+
+    for i in range(n):
+        counter.gate('cswap', ctrl_qreg[0], x_qreg[i], aux_qreg[i])
+
+    counter.append(product_sum_inv, qubits)
+
+    return counter.resources()
+
+
+@lru_cache(maxsize=RESOURCES_CACHE_SIZE)
+def _controlled_modular_product_sum_operator_resources(constant: Optional[int], N: int, n: int,
+                                                       approximation_degree: Optional[int] = None) -> Resources:
+    if n == 1:
+        raise ValueError("Case n = 1 not supported")
+
+    ctrl_qreg, x_qreg, y_qreg, flag_qreg = layout(1, n, n, 1)
+    counter = ResourceCounter(2 * n + 2)
+
+    for i in reversed(range(n)):
+        partial_constant = None if constant is None else (pow(2, i, mod=N) * constant) % N
+
+        g_qreg = np.delete(x_qreg, i)
+
+        counter.append(
+            _double_controlled_modular_adder_resources(partial_constant, N, n, approximation_degree),
+            join(ctrl_qreg, x_qreg[i], y_qreg, g_qreg, flag_qreg)
+        )
+
+    return counter.resources()
+
+
+@lru_cache(maxsize=RESOURCES_CACHE_SIZE)
+def _double_controlled_modular_adder_resources(constant: Optional[int], N: int, n: int,
+                                               approximation_degree: Optional[int] = None) -> Resources:
+    ctrl_qreg, x_qreg, g_qreg, flag_qreg = layout(2, n, n - 1 if n >= 2 else 1, 1)
+    counter = ResourceCounter(n + len(g_qreg) + 3)
+    qubits = join(ctrl_qreg, x_qreg, g_qreg, flag_qreg)
+
+    complement = None if constant is None else N - constant
+    counter.append(double_controlled_comparator_resources(complement, n), qubits)
+
+    counter.append(qft_gate_resources(n, approximation_degree=approximation_degree), x_qreg)
+    counter.append(_double_controlled_phase_adder_resources(n), join(ctrl_qreg, x_qreg, flag_qreg))
+    counter.append(iqft_gate_resources(n, approximation_degree=approximation_degree), x_qreg)
+
+    counter.append(double_controlled_comparator_resources(constant, n), qubits)
+
+    return counter.resources()
+
+
+@lru_cache(maxsize=RESOURCES_CACHE_SIZE)
+def _double_controlled_phase_adder_resources(n: int) -> Resources:
+    ctrl_qreg, x_qreg, flag_qreg = layout(2, n, 1)
+    counter = ResourceCounter(n + 3)
+
+    for i in range(n):
+        counter.gate('cp', flag_qreg[0], x_qreg[i])
+    counter.gate('ccx', ctrl_qreg[0], ctrl_qreg[1], flag_qreg[0])
+    for i in range(n):
+        counter.gate('cp', flag_qreg[0], x_qreg[i])
+
+    return counter.resources()
@@ -0,0 +1,26 @@
+import numpy as np
+from qiskit import QuantumCircuit, QuantumRegister, ClassicalRegister
+from qiskit.circuit import Instruction
+
+
+class PhaseCorrection(Instruction):
+    """ phase correction of a round of the semi-classical QFT, applied as one operation reading k measured bits:
+    P(-pi * v / 2^k) on the qubit, where v is the value of the bits (the first one is the least significant),
+    i.e. the angle is looked up from the phase table of the round
+    backends without the operation execute its definition, one correction conditioned on each bit
+    """
+
+    def __init__(self, num_clbits: int) -> None:
+        super().__init__('phase_correction', 1, num_clbits, [])
+
+    def angle(self, value: int) -> float:
+        return -np.pi * value / float(pow(2, self.num_clbits))
+
+    def _define(self) -> None:
+        # every bit in its own register, as Qiskit conditions only on whole registers
+        x_qreg = QuantumRegister(1, 'x')
+        cregs = [ClassicalRegister(1, f'c{j}') for j in range(self.num_clbits)]
+        circuit = QuantumCircuit(x_qreg, *cregs, name=self.name)
+        for j, creg in enumerate(cregs):
+            circuit.p(self.angle(pow(2, j)), x_qreg[0]).c_if(creg, 1)
+        self.definition = circuit
@@ -0,0 +1,82 @@
+from functools import lru_cache
+from typing import Optional
+
+from qiskit import QuantumCircuit
+from qiskit.circuit import Gate
+from qiskit.circuit.library import QFT
+
+from utils.gate_cache import cached_gate
+from utils.lazy_gate import LazyGate
+from utils.resources import RESOURCES_CACHE_SIZE, Resources
+
+
+@cached_gate
+def qft_gate(n: int, do_swaps: bool = False, approximation_degree: Optional[int] = None) -> Gate:
+    """ with `approximation_degree` d, rotations by pi / 2^k with k > d are dropped """
+    return QFTGate(n, do_swaps, approximation_degree=approximation_degree)
+
+
+@cached_gate
+def iqft_gate(n: int, do_swaps: bool = False, approximation_degree: Optional[int] = None) -> Gate:
+    return QFTGate(n, do_swaps, inverse=True, approximation_degree=approximation_degree)
+
+
+class QFTGate(LazyGate):
+    """ QFT (or its inverse) kept as its own class, so that simulators can apply it as a Fourier transform
+    `approximation_degree` is None for the exact transform, also when no rotation of the gate is dropped
+    """
+
+    def __init__(self, n: int, do_swaps: bool = False, inverse: bool = False,
+                 approximation_degree: Optional[int] = None) -> None:
+        super().__init__('qft_dg' if inverse else 'qft', n)
+        self.n = n
+        self.do_swaps = do_swaps
+        self.is_inverse = inverse
+        self.approximation_degree = exact_degree(n, approximation_degree)
+
+    def inverse(self) -> 'QFTGate':
+        builder = qft_gate if self.is_inverse else iqft_gate
+        return builder(self.n, self.do_swaps, self.approximation_degree)
+
+    def _build(self) -> QuantumCircuit:
+        # Qiskit's approximation degree is the number of the smallest rotations dropped from every qubit
+        dropped = 0 if self.approximation_degree is None else self.n - 1 - self.approximation_degree
+        gate = QFT(self.n, approximation_degree=dropped, do_swaps=self.do_swaps).to_gate()
+        return gate.inverse().definition if self.is_inverse else gate.definition
+
+
+def exact_degree(n: int, approximation_degree: Optional[int]) -> Optional[int]:
+    """ None when a transform of n qubits with `approximation_degree` keeps all rotations """
+    if approximation_degree is None or approximation_degree >= n - 1:
+        return None
+    return approximation_degree
+
+
+@lru_cache(maxsize=RESOURCES_CACHE_SIZE)
+def qft_gate_resources(n: int, do_swaps: bool = False, approximation_degree: Optional[int] = None) -> Resources:
+    approximation_degree = exact_degree(n, approximation_degree)
+    if approximation_degree is None:
+        gates = {'h': n, 'cp': n * (n - 1) // 2}
+        depth = 2 * n - 1
+    else:
+        gates = {'h': n, 'cp': sum(min(j, approximation_degree) for j in range(n))}
+        depth = _approximate_qft_depth(n, approximation_degree)
+
+    if do_swaps and n >= 2:
+        gates['swap'] = n // 2
+        depth += 1
+
+    return Resources(n, {name: count for name, count in gates.items() if count}, depth)
+
+
+def iqft_gate_resources(n: int, do_swaps: bool = False, approximation_degree: Optional[int] = None) -> Resources:
+    return qft_gate_resources(n, do_swaps, approximation_degree)
+
+
+def _approximate_qft_depth(n: int, approximation_degree: int) -> int:
+    layers = [0] * n
+    for j in reversed(range(n)):
+        layers[j] += 1
+        for k in reversed(range(j - min(j, approximation_degree), j)):
+            layers[j] = layers[k] = max(layers[j], layers[k]) + 1
+    return max(layers, default=0)
@@ -1,22 +1,53 @@
+from functools import lru_cache
 from itertools import chain
+from typing import Dict, Optional, Sequence, Union
 
-from qiskit import QuantumRegister, QuantumCircuit
-from qiskit.circuit import Gate
+import numpy as np
+from qiskit import QuantumCircuit
+from qiskit.circuit import Gate, ParameterExpression, ParameterVector, Qubit
 
 from gates.beauregard.constant_adder import as_bits_reversed
+from utils.circuit_creation import Registers, block_gate
+from utils.gate_cache import cached_gate
+from utils.parameters import vector_values
+from utils.resources import RESOURCES_CACHE_SIZE, Resources, ResourceCounter, layout, resolve_constant, join
 
+Bit = Union[str, ParameterExpression]
+Bits = Union[str, Sequence[ParameterExpression]]
 
+
+@cached_gate
 def double_controlled_comparator(constant: int, n: int) -> Gate:
-    ctrl_qreg = QuantumRegister(2, name='ctrl')
-    x_qreg = QuantumRegister(n, name='x')
-    g_qreg = QuantumRegister(n - 1 if n >= 2 else 1, name='g')
-    c_qreg = QuantumRegister(1, name='c')
+    return _double_controlled_comparator(as_bits_reversed(constant, n), n, f'CC-CMP_({constant})')
+
+
+@cached_gate
+def parameterized_double_controlled_comparator(n: int, prefix: str) -> Gate:
+    """ comparator with bits of the constant given by angles 0 or pi of parameters named after `prefix`,
+    see `double_controlled_comparator_parameters`
+    """
+    if n == 1:
+        raise ValueError("Case n = 1 not supported")
+    return _double_controlled_comparator(ParameterVector(prefix, length=n), n, f'CC-CMP_({prefix})')
+
+
+def double_controlled_comparator_parameters(constant: int, n: int, prefix: str) -> Dict[str, float]:
+    return vector_values(prefix, [np.pi * int(bit) for bit in as_bits_reversed(constant, n)])
+
 
-    circuit = QuantumCircuit(ctrl_qreg,
-                             x_qreg,
-                             g_qreg,
-                             c_qreg,
-                             name=f'CC-CMP_({constant})')
+def _double_controlled_comparator(constant_bits: Bits, n: int, name: str) -> Gate:
+    regs = {
+        'ctrl': 2,
+        'x': n,
+        'g': n - 1 if n >= 2 else 1,
+        'c': 1
+    }
+    return block_gate(name, regs, _append_double_controlled_comparator, constant_bits, n)
+
+
+def _append_double_controlled_comparator(circuit: QuantumCircuit, qregs: Registers, constant_bits: Bits,
+                                         n: int) -> None:
+    ctrl_qreg, x_qreg, g_qreg, c_qreg = qregs
 
     cccx = _triple_controlled_not()
     cccx_qubits = list(chain(ctrl_qreg, x_qreg, c_qreg, g_qreg)) if n == 1 \
@@ -25,10 +56,10 @@ def double_controlled_comparator(constant: int, n: int) -> Gate:
     circuit.x(x_qreg)
 
     if n == 1:
-        if constant == 1:
+        if constant_bits[0] == '1':
             circuit.append(cccx, cccx_qubits)
     else:
-        body = _carry_body(constant, n, x_qreg, g_qreg)
+        body = _carry_body(constant_bits, n)
         body_qubits = list(chain(x_qreg, g_qreg))
 
         circuit.append(cccx, cccx_qubits)
@@ -38,48 +69,136 @@ def double_controlled_comparator(constant: int, n: int) -> Gate:
 
     circuit.x(x_qreg)
 
-    return circuit.to_gate()
 
+def _carry_body(constant_bits: Bits, n: int) -> Gate:
+    return block_gate('Carry_body', {'x': n, 'g': n - 1}, _append_carry_body, constant_bits, n)
 
-def _carry_body(constant: int, n: int, x_qreg: QuantumRegister, g_qreg: QuantumRegister) -> Gate:
-    constant_bits = as_bits_reversed(constant, n)
-    circuit = QuantumCircuit(x_qreg, g_qreg)
+
+def _append_carry_body(circuit: QuantumCircuit, qregs: Registers, constant_bits: Bits, n: int) -> None:
+    x_qreg, g_qreg = qregs
 
     for i in reversed(range(2, n)):
-        if constant_bits[i] == '1':
-            circuit.x(x_qreg[i])
+        _x_if(circuit, constant_bits[i], x_qreg[i])
         circuit.ccx(g_qreg[i - 2], x_qreg[i], g_qreg[i - 1])
-        if constant_bits[i] == '1':
-            circuit.x(x_qreg[i])
+        _x_if(circuit, constant_bits[i], x_qreg[i])
 
-    if constant_bits[1] == '1':
-        circuit.cx(x_qreg[1], g_qreg[0])
-        circuit.x(x_qreg[1])
+    _cx_if(circuit, constant_bits[1], x_qreg[1], g_qreg[0])
+    _x_if(circuit, constant_bits[1], x_qreg[1])
 
-    if constant_bits[0] == '1':
-        circuit.ccx(x_qreg[0], x_qreg[1], g_qreg[0])
+    _ccx_if(circuit, constant_bits[0], x_qreg[0], x_qreg[1], g_qreg[0])
 
     for i in range(2, n):
-        if constant_bits[i] == '1':
-            circuit.cx(x_qreg[i], g_qreg[i - 1])
-            circuit.x(x_qreg[i])
+        _cx_if(circuit, constant_bits[i], x_qreg[i], g_qreg[i - 1])
+        _x_if(circuit, constant_bits[i], x_qreg[i])
         circuit.ccx(g_qreg[i - 2], x_qreg[i], g_qreg[i - 1])
 
-    return circuit.to_gate()
 
+def _x_if(circuit: QuantumCircuit, bit: Bit, qubit: Qubit) -> None:
+    if isinstance(bit, ParameterExpression):
+        # X^b = H P(pi b) H
+        circuit.h(qubit)
+        circuit.p(bit, qubit)
+        circuit.h(qubit)
+    elif bit == '1':
+        circuit.x(qubit)
+
+
+def _cx_if(circuit: QuantumCircuit, bit: Bit, control: Qubit, target: Qubit) -> None:
+    if isinstance(bit, ParameterExpression):
+        circuit.h(target)
+        circuit.cp(bit, control, target)
+        circuit.h(target)
+    elif bit == '1':
+        circuit.cx(control, target)
+
+
+def _ccx_if(circuit: QuantumCircuit, bit: Bit, control_0: Qubit, control_1: Qubit, target: Qubit) -> None:
+    if isinstance(bit, ParameterExpression):
+        circuit.h(target)
+        circuit.mcp(bit, [control_0, control_1], target)
+        circuit.h(target)
+    elif bit == '1':
+        circuit.ccx(control_0, control_1, target)
 
+
+@cached_gate
 def _triple_controlled_not() -> Gate:
-    ctrl_qreg = QuantumRegister(3, name='ctrl')
-    x_qreg = QuantumRegister(1, name='x')
-    g_qreg = QuantumRegister(1, name='g')
+    return block_gate('CCCX', {'ctrl': 3, 'x': 1, 'g': 1}, _append_triple_controlled_not)
+
 
-    circuit = QuantumCircuit(ctrl_qreg,
-                             x_qreg,
-                             g_qreg,
-                             name='CCCX')
+def _append_triple_controlled_not(circuit: QuantumCircuit, qregs: Registers) -> None:
+    ctrl_qreg, x_qreg, g_qreg = qregs
 
     for _ in range(2):
         circuit.ccx(ctrl_qreg[2], g_qreg[0], x_qreg[0])
         circuit.ccx(ctrl_qreg[0], ctrl_qreg[1], g_qreg[0])
 
-    return circuit.to_gate()
+
+@lru_cache(maxsize=RESOURCES_CACHE_SIZE)
+def double_controlled_comparator_resources(constant: Optional[int], n: int) -> Resources:
+    constant = resolve_constant(constant, n)
+    ctrl_qreg, x_qreg, g_qreg, c_qreg = layout(2, n, n - 1 if n >= 2 else 1, 1)
+    counter = ResourceCounter(n + len(g_qreg) + 3)
+
+    cccx = _triple_controlled_not_resources()
+    cccx_qubits = join(ctrl_qreg, x_qreg, c_qreg, g_qreg) if n == 1 \
+        else join(ctrl_qreg, g_qreg[n - 2], c_qreg, x_qreg[0])
+
+    counter.parallel('x', x_qreg)
+
+    if n == 1:
+        if constant == 1:
+            counter.append(cccx, cccx_qubits)
+    else:
+        body = _carry_body_resources(constant, n)
+        body_qubits = join(x_qreg, g_qreg)
+
+        counter.append(cccx, cccx_qubits)
+        counter.append(body, body_qubits)
+        counter.append(cccx, cccx_qubits)
+        counter.append(body, body_qubits)
+
+    counter.parallel('x', x_qreg)
+
+    return counter.resources()
+
+
+@lru_cache(maxsize=RESOURCES_CACHE_SIZE)
+def _carry_body_resources(constant: int, n: int) -> Resources:
+    x_qreg, g_qreg = layout(n, n - 1)
+    counter = ResourceCounter(2 * n - 1)
+    constant_bits = as_bits_reversed(constant, n)
+
+    for i in reversed(range(2, n)):
+        if constant_bits[i] == '1':
+            counter.gate('x', x_qreg[i])
+        counter.gate('ccx', g_qreg[i - 2], x_qreg[i], g_qreg[i - 1])
+        if constant_bits[i] == '1':
+            counter.gate('x', x_qreg[i])
+
+    if constant_bits[1] == '1':
+        counter.gate('cx', x_qreg[1], g_qreg[0])
+        counter.gate('x', x_qreg[1])
+
+    if constant_bits[0] == '1':
+        counter.gate('ccx', x_qreg[0], x_qreg[1], g_qreg[0])
+
+    for i in range(2, n):
+        if constant_bits[i] == '1':
+            counter.gate('cx', x_qreg[i], g_qreg[i - 1])
+            counter.gate('x', x_qreg[i])
+        counter.gate('ccx', g_qreg[i - 2], x_qreg[i], g_qreg[i - 1])
+
+    return counter.resources()
+
+
+@lru_cache(maxsize=RESOURCES_CACHE_SIZE)
+def _triple_controlled_not_resources() -> Resources:
+    ctrl_qreg, x_qreg, g_qreg = layout(3, 1, 1)
+    counter = ResourceCounter(5)
+
+    for _ in range(2):
+        counter.gate('ccx', ctrl_qreg[2], g_qreg[0], x_qreg[0])
+        counter.gate('ccx', ctrl_qreg[0], ctrl_qreg[1], g_qreg[0])
+
+    return counter.resources()
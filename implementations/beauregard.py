@@ -1,33 +1,65 @@
-from qiskit import QuantumCircuit
+from typing import Any, Dict, Optional
+
 from qiskit.circuit import Instruction
-from qiskit.circuit.library import QFT
 
-from gates.beauregard.modular_exponentiation import modular_exponentiation_gate, controlled_modular_multiplication_gate
-from gates.beauregard.constant_adder import phi_constant_adder, get_angles
+from gates.beauregard.modular_exponentiation import modular_exponentiation_gate, controlled_modular_multiplication_gate, \
+    modular_exponentiation_gate_resources, controlled_modular_multiplication_gate_resources, \
+    parameterized_modular_exponentiation_gate, parameterized_controlled_modular_multiplication_gate, \
+    controlled_modular_multiplication_parameters
 from implementations.shor import Shor
+from utils.resources import Resources
 
 
 class BeauregardShor(Shor):
-    def _construct_circuit_with_semiclassical_QFT(self, a: int, N: int, n: int) -> QuantumCircuit:
-        self._qft = QFT(n + 1, do_swaps=False).to_gate()
-        self._iqft = self._qft.inverse()
+    def __init__(self, *args, keep_fourier: bool = False, **kwargs) -> None:
+        """ with `keep_fourier`, register b of multipliers stays in Fourier space between them,
+        saving a QFT and an inverse QFT for every multiplier but the first and the last
+        """
+        super().__init__(*args, **kwargs)
+        self._keep_fourier = keep_fourier
 
-        phi_add_N = phi_constant_adder(get_angles(N, n + 1))
-        self._iphi_add_N = phi_add_N.inverse()
-        self._c_phi_add_N = phi_add_N.control(1)
+    @property
+    def keep_fourier(self) -> bool:
+        return self._keep_fourier
 
-        return super()._construct_circuit_with_semiclassical_QFT(a, N, n)
+    def _construction_options(self) -> Dict[str, Any]:
+        return {**super()._construction_options(), 'keep_fourier': self._keep_fourier}
 
     def _get_aux_register_size(self, n: int) -> int:
         return n + 2
 
+    def _fourier_aux_size(self, n: int) -> int:
+        return n + 1 if self._keep_fourier else 0
+
     @property
     def _prefix(self) -> str:
         return 'Beauregard'
 
+    @property
+    def _parameterizable(self) -> bool:
+        return True
+
     def _modular_exponentiation_gate(self, constant: int, N: int, n: int) -> Instruction:
-        return modular_exponentiation_gate(constant, N, n)
+        return modular_exponentiation_gate(constant, N, n, self._keep_fourier, self._approximation_degree)
 
     def _modular_multiplication_gate(self, constant: int, N: int, n: int) -> Instruction:
-        return controlled_modular_multiplication_gate(constant, N, n, self._c_phi_add_N, self._iphi_add_N, self._qft,
-                                                      self._iqft)
+        return controlled_modular_multiplication_gate(constant, N, n, self._keep_fourier,
+                                                      self._approximation_degree)
+
+    def _parameterized_modular_exponentiation_gate(self, N: int, n: int) -> Instruction:
+        return parameterized_modular_exponentiation_gate(N, n, self._keep_fourier, self._approximation_degree)
+
+    def _parameterized_modular_multiplication_gate(self, N: int, n: int, prefix: str) -> Instruction:
+        return parameterized_controlled_modular_multiplication_gate(N, n, prefix, self._keep_fourier,
+                                                                    self._approximation_degree)
+
+    def _modular_multiplication_parameters(self, constant: int, N: int, n: int, prefix: str) -> Dict[str, float]:
+        return controlled_modular_multiplication_parameters(constant, N, n, prefix, self._approximation_degree)
+
+    def _modular_exponentiation_gate_resources(self, constant: Optional[int], N: int, n: int) -> Resources:
+        return modular_exponentiation_gate_resources(constant, N, n, self._keep_fourier,
+                                                     self._approximation_degree)
+
+    def _modular_multiplication_gate_resources(self, constant: Optional[int], N: int, n: int) -> Resources:
+        return controlled_modular_multiplication_gate_resources(constant, N, n, self._keep_fourier,
+                                                                self._approximation_degree)
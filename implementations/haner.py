@@ -1,7 +1,11 @@
+from typing import Optional
+
 from qiskit.circuit import Instruction
 
-from gates.haner.modular_exponentiation import modular_exponentiation_gate, controlled_modular_multiplication_gate
+from gates.haner.modular_exponentiation import modular_exponentiation_gate, controlled_modular_multiplication_gate, \
+    modular_exponentiation_gate_resources, controlled_modular_multiplication_gate_resources
 from implementations.shor import Shor
+from utils.resources import Resources
 
 
 class HanerShor(Shor):
@@ -17,3 +21,9 @@ class HanerShor(Shor):
 
     def _modular_multiplication_gate(self, constant: int, N: int, n: int) -> Instruction:
         return controlled_modular_multiplication_gate(constant, N, n)
+
+    def _modular_exponentiation_gate_resources(self, constant: Optional[int], N: int, n: int) -> Resources:
+        return modular_exponentiation_gate_resources(constant, N, n)
+
+    def _modular_multiplication_gate_resources(self, constant: Optional[int], N: int, n: int) -> Resources:
+        return controlled_modular_multiplication_gate_resources(constant, N, n)
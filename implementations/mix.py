@@ -1,27 +1,65 @@
-from qiskit import QuantumCircuit
+from typing import Any, Dict, Optional
+
 from qiskit.circuit import Instruction
-from qiskit.circuit.library import QFT
 
-from gates.mix.modular_exponentiation import modular_exponentiation_gate, controlled_modular_multiplication_gate
+from gates.batched_product_sum import batch_register_size
+from gates.mix.modular_exponentiation import modular_exponentiation_gate, controlled_modular_multiplication_gate, \
+    modular_exponentiation_gate_resources, controlled_modular_multiplication_gate_resources, \
+    parameterized_modular_exponentiation_gate, parameterized_controlled_modular_multiplication_gate, \
+    controlled_modular_multiplication_parameters
 from implementations.shor import Shor
+from utils.resources import Resources
 
 
 class MixShor(Shor):
-    def _construct_circuit_with_semiclassical_QFT(self, a: int, N: int, n: int) -> QuantumCircuit:
-        self._qft = QFT(n, do_swaps=False).to_gate()
-        self._iqft = self._qft.inverse()
+    def __init__(self, *args, batched_windows: bool = False, **kwargs) -> None:
+        """ with `batched_windows`, each product sum of multipliers adds all its constants in one Fourier window
+        and reduces the sum modulo N afterwards, at the cost of `batch_register_size(n)` more aux qubits,
+        see `gates.batched_product_sum`
+        """
+        super().__init__(*args, **kwargs)
+        self._batched_windows = batched_windows
+
+    @property
+    def batched_windows(self) -> bool:
+        return self._batched_windows
 
-        return super()._construct_circuit_with_semiclassical_QFT(a, N, n)
+    def _construction_options(self) -> Dict[str, Any]:
+        return {**super()._construction_options(), 'batched_windows': self._batched_windows}
 
     def _get_aux_register_size(self, n: int) -> int:
-        return n + 1
+        return n + 1 + (batch_register_size(n) if self._batched_windows else 0)
 
     @property
     def _prefix(self) -> str:
         return 'Mix'
 
+    @property
+    def _parameterizable(self) -> bool:
+        return True
+
     def _modular_exponentiation_gate(self, constant: int, N: int, n: int) -> Instruction:
-        return modular_exponentiation_gate(constant, N, n)
+        return modular_exponentiation_gate(constant, N, n, self._approximation_degree, self._batched_windows)
 
     def _modular_multiplication_gate(self, constant: int, N: int, n: int) -> Instruction:
-        return controlled_modular_multiplication_gate(constant, N, n, self._qft, self._iqft)
\ No newline at end of file
+        return controlled_modular_multiplication_gate(constant, N, n, self._approximation_degree,
+                                                      self._batched_windows)
+
+    def _parameterized_modular_exponentiation_gate(self, N: int, n: int) -> Instruction:
+        return parameterized_modular_exponentiation_gate(N, n, self._approximation_degree, self._batched_windows)
+
+    def _parameterized_modular_multiplication_gate(self, N: int, n: int, prefix: str) -> Instruction:
+        return parameterized_controlled_modular_multiplication_gate(N, n, prefix, self._approximation_degree,
+                                                                    self._batched_windows)
+
+    def _modular_multiplication_parameters(self, constant: int, N: int, n: int, prefix: str) -> Dict[str, float]:
+        return controlled_modular_multiplication_parameters(constant, N, n, prefix, self._approximation_degree,
+                                                            self._batched_windows)
+
+    def _modular_exponentiation_gate_resources(self, constant: Optional[int], N: int, n: int) -> Resources:
+        return modular_exponentiation_gate_resources(constant, N, n, self._approximation_degree,
+                                                     self._batched_windows)
+
+    def _modular_multiplication_gate_resources(self, constant: Optional[int], N: int, n: int) -> Resources:
+        return controlled_modular_multiplication_gate_resources(constant, N, n, self._approximation_degree,
+                                                                self._batched_windows)
@@ -12,7 +12,7 @@
 # copyright notice, and modified files need to carry a notice indicating
 # that they have been altered from the originals.
 
-from typing import Union, Tuple, Optional
+from typing import Any, Dict, List, Union, Tuple, Optional
 
 import numpy as np
 from abc import ABC, abstractmethod
@@ -21,28 +21,106 @@ from itertools import chain
 from qiskit import QuantumRegister, AncillaRegister, QuantumCircuit, ClassicalRegister
 from qiskit.algorithms import AlgorithmResult
 from qiskit.circuit import Instruction
-from qiskit.circuit.library import QFT
 
 import logging
 import math
+import pstats
+import random
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, FIRST_COMPLETED, wait
+from collections import Counter
+from contextlib import nullcontext
 from fractions import Fraction
+from functools import lru_cache
+from threading import Lock
 
 from qiskit.providers import BaseBackend, Backend
+from qiskit.result import Result
 from qiskit.utils import QuantumInstance
-from qiskit.utils.validation import validate_min
+from qiskit.utils.validation import validate_min, validate_range_exclusive
+from sympy import factorint, isprime, perfect_power, primerange
+
+from gates.constant_load import controlled_constant_load, controlled_constant_load_resources
+from gates.phase_correction import PhaseCorrection
+from gates.qft import qft_gate, iqft_gate, qft_gate_resources, iqft_gate_resources
+from utils.circuit_creation import FlatCircuit
+from utils.circuit_store import CircuitStore, CircuitKey, transpilation_target
+from utils.lazy_gate import define_lazy_gates
+from utils.parallel_construction import ConstructionPool, define_gates, parallel_construction
+from utils.parameters import bind_by_name, simplify_bound_phases
+from utils.profiling import PhaseRecorder, Profiling, Span
+from utils.resources import Resources, ResourceCounter, layout, join
 
 
 logger = logging.getLogger(__name__)
 
+TRIAL_DIVISION_BOUND = 1000
+
 
 class Shor(ABC):
 
     def __init__(self,
                  quantum_instance: Optional[
-                     Union[QuantumInstance, BaseBackend, Backend]] = None) -> None:
+                     Union[QuantumInstance, BaseBackend, Backend]] = None,
+                 circuit_store: Optional[CircuitStore] = None,
+                 bind_bases: bool = False,
+                 batch_shots: Optional[int] = None,
+                 profiling: Optional[Profiling] = None,
+                 flat: bool = False,
+                 known_input: bool = False,
+                 construction_processes: int = 1,
+                 feed_forward: bool = False,
+                 approximation_degree: Optional[int] = None,
+                 confidence: Optional[float] = None) -> None:
+        """ with `bind_bases`, one circuit parameterized by a is built and transpiled per N and circuit type,
+        and get_order only binds it to the given a
+        with `batch_shots`, get_order executes batches of that many shots and stops as soon as the order is found,
+        spending at most `run_config.shots` shots; with `confidence` c, batches of a pair also stop once an exact,
+        noiseless circuit would have revealed its order with probability at least c (see `miss_probability`),
+        as further shots are then unlikely to help, e.g. on noisy backends
+        durations of phases of get_order are always recorded, `profiling` adds cProfile, tracemalloc and a callback
+        with `flat`, constructed circuits consist of leaf operations only, without nested gates to unroll;
+        gate builders append their operations directly into the circuit (see `FlatCircuit`), so all of them
+        are constructed right away, while nested circuits leave lazy gates to transpilation;
+        compare both with `python -m utils.benchmark --modes nested flat`
+        with `known_input`, the first multiplier, which always acts on |1>, is replaced by controlled X gates loading
+        its constant; such circuits cannot be parameterized by a
+        with `construction_processes` > 1, the 2n multipliers of modular exponentiation (or of semi-classical
+        circuits) are constructed in a pool of that many processes
+        with `feed_forward`, each round of semi-classical circuits applies its phase correction as one operation
+        reading the measured bits (see `PhaseCorrection`), instead of one conditioned rotation per measured bit
+        with `approximation_degree` = d, rotations by pi / 2^k with k > d are dropped everywhere: in QFTs
+        (approximate QFT), in phase adders (contributions of low bits of constants) and in phase corrections
+        of semi-classical circuits; see `simulation.approximation.approximation_report` for the savings and
+        the success probability
+        """
+        self._validate_bind_bases(bind_bases, known_input)
         self._quantum_instance = None
         if quantum_instance:
             self.quantum_instance = quantum_instance
+        self._circuit_store = circuit_store
+        self._bind_bases = bind_bases
+        self._parameterized_circuits = {}
+        # concurrent attempts of factorize share the quantum instance (whose run config batches adjust)
+        # and the parameterized circuits
+        self._execution_lock = Lock()
+        self._circuits_lock = Lock()
+        self._batch_shots = None
+        if batch_shots is not None:
+            self.batch_shots = batch_shots
+        self._confidence = None
+        if confidence is not None:
+            self.confidence = confidence
+        self._profiling = profiling
+        self._flat = flat
+        self._known_input = known_input
+        validate_min('construction_processes', construction_processes, 1)
+        self._construction_processes = construction_processes
+        # owned by the instance, so that concurrent constructions of its circuits share the worker processes
+        self._construction_pool = ConstructionPool(construction_processes)
+        self._feed_forward = feed_forward
+        if approximation_degree is not None:
+            validate_min('approximation_degree', approximation_degree, 1)
+        self._approximation_degree = approximation_degree
 
     @property
     def quantum_instance(self) -> Optional[QuantumInstance]:
@@ -55,6 +133,71 @@ class Shor(ABC):
             quantum_instance = QuantumInstance(quantum_instance)
         self._quantum_instance = quantum_instance
 
+    @property
+    def circuit_store(self) -> Optional[CircuitStore]:
+        return self._circuit_store
+
+    @circuit_store.setter
+    def circuit_store(self, circuit_store: Optional[CircuitStore]) -> None:
+        self._circuit_store = circuit_store
+
+    @property
+    def bind_bases(self) -> bool:
+        return self._bind_bases
+
+    @bind_bases.setter
+    def bind_bases(self, bind_bases: bool) -> None:
+        self._validate_bind_bases(bind_bases, self._known_input)
+        self._bind_bases = bind_bases
+
+    def _validate_bind_bases(self, bind_bases: bool, known_input: bool) -> None:
+        if not bind_bases:
+            return
+        if not self._parameterizable:
+            raise ValueError(f'{self._prefix} circuits cannot be parameterized by the base a.')
+        if known_input:
+            raise ValueError('Circuits with known input cannot be parameterized by the base a.')
+
+    @property
+    def batch_shots(self) -> Optional[int]:
+        return self._batch_shots
+
+    @batch_shots.setter
+    def batch_shots(self, batch_shots: Optional[int]) -> None:
+        if batch_shots is not None:
+            validate_min('batch_shots', batch_shots, 1)
+        self._batch_shots = batch_shots
+
+    @property
+    def confidence(self) -> Optional[float]:
+        return self._confidence
+
+    @confidence.setter
+    def confidence(self, confidence: Optional[float]) -> None:
+        if confidence is not None:
+            validate_range_exclusive('confidence', confidence, 0, 1)
+        self._confidence = confidence
+
+    @property
+    def profiling(self) -> Optional[Profiling]:
+        return self._profiling
+
+    @profiling.setter
+    def profiling(self, profiling: Optional[Profiling]) -> None:
+        self._profiling = profiling
+
+    @property
+    def flat(self) -> bool:
+        return self._flat
+
+    @property
+    def known_input(self) -> bool:
+        return self._known_input
+
+    @property
+    def approximation_degree(self) -> Optional[int]:
+        return self._approximation_degree
+
     def factor(self, a: int, N: int, semi_classical: bool) -> Optional[Tuple[int, int]]:
         shor_result = self.get_order(a, N, semi_classical)
         if shor_result.order:
@@ -66,46 +209,348 @@ class Shor(ABC):
 
         return None
 
-    def get_order(self, a: int, N: int, semi_classical=False) -> 'ShorResult':
-        self._validate_input(a, N)
+    def factorize(self, N: int, semi_classical: bool = False, attempts: int = 10, concurrency: int = 1,
+                  trial_division_bound: int = TRIAL_DIVISION_BOUND, seed: Optional[int] = None) -> 'FactorizationResult':
+        """ find a non-trivial factorization of N, choosing bases a automatically
+        cheap classical checks (even N, perfect power, trial division by primes below `trial_division_bound`) come
+        first, then up to `attempts` random bases are tried; a base sharing a factor with N is a factor by itself,
+        others are passed to get_order, `concurrency` of them at once; their construction overlaps,
+        while their executions (and batches) take turns on the shared quantum instance
+        """
+        validate_min('N', N, 2)
+        validate_min('attempts', attempts, 1)
+        validate_min('concurrency', concurrency, 1)
+        if concurrency > 1 and self._profiling is not None:
+            # cProfile and tracemalloc are global, so spans of concurrent attempts would capture each other
+            raise ValueError('Concurrent attempts cannot be combined with profiling.')
+        if isprime(N):
+            raise ValueError(f'The input N needs to be composite. Provided N = {N}.')
+
+        result = FactorizationResult()
+        factor, result.method = self._classical_factor(N, trial_division_bound)
+        if factor:
+            result.factors = factor, N // factor
+            return result
+
+        rng = random.Random(seed)
+        # a = N - 1 has the trivial order 2
+        max_bases = N - 3
+
+        executor = ThreadPoolExecutor(max_workers=concurrency)
+        pending = {}
+        try:
+            while True:
+                while len(pending) < concurrency and result.attempts + len(pending) < attempts:
+                    if len(result.bases) == max_bases:
+                        break
+                    a = rng.randrange(2, N - 1)
+                    while a in result.bases:
+                        a = rng.randrange(2, N - 1)
+                    result.bases.append(a)
+
+                    guess = math.gcd(a, N)
+                    if guess != 1:
+                        logger.info(f'Base a = {a} shares factor {guess} with N.')
+                        result.factors, result.method, result.base = (guess, N // guess), 'gcd', a
+                        return result
+
+                    pending[executor.submit(self.get_order, a, N, semi_classical)] = a
+
+                if not pending:
+                    logger.info(f'No factors found after {result.attempts} attempts.')
+                    return result
+
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    a = pending.pop(future)
+                    shor_result = future.result()
+                    result.attempts += 1
+                    result.total_shots += shor_result.total_shots
+                    if not shor_result.order:
+                        continue
+
+                    factors = self._get_factors(shor_result.order, a, N)
+                    if factors and 1 not in factors:
+                        result.factors, result.method = factors, 'order'
+                        result.base, result.order = a, shor_result.order
+                        return result
+        finally:
+            # attempts already running cannot be cancelled, they are waited for
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=True)
 
-        result = ShorResult()
+    @staticmethod
+    def _classical_factor(N: int, trial_division_bound: int) -> Tuple[Optional[int], Optional[str]]:
+        if N % 2 == 0:
+            return 2, 'even'
 
-        circuit = self.construct_circuit(a, N, semi_classical, measurement=True)
-        counts = self.quantum_instance.execute(circuit).get_counts(circuit)
+        power = perfect_power(N)
+        if power:
+            return power[0], 'perfect power'
 
-        result.total_counts = len(counts)
-        result.total_shots = self.quantum_instance.run_config.shots
+        for p in primerange(3, trial_division_bound):
+            if N % p == 0:
+                return p, 'trial division'
 
-        for measurement, shots in counts.items():
-            measurement = self._parse_measurement(measurement, semi_classical)
-            order = self._get_order(measurement, a, N)
-            if order:
-                if order == 1:
-                    logger.info('Skip trivial order.')
-                    continue
+        return None, None
 
-                if result.order and not result.order == order:
-                    logger.error(f'Currently computed order {order} differs from already stored: {result.order}.')
-                    continue
+    def factor_many(self, pairs: List[Tuple[int, int]], semi_classical: bool = False,
+                    processes: int = 1) -> List[Optional[Tuple[int, int]]]:
+        """ `factor` for every pair (a, N), see `get_orders` """
+        factors = []
+        for (a, N), shor_result in zip(pairs, self.get_orders(pairs, semi_classical, processes)):
+            factors.append(self._get_factors(shor_result.order, a, N) if shor_result.order else None)
+        return factors
 
-                result.order = order
-                result.successful_counts += 1
-                result.successful_shots += shots
+    def get_order(self, a: int, N: int, semi_classical=False) -> 'ShorResult':
+        return self.get_orders([(a, N)], semi_classical)[0]
+
+    def get_orders(self, pairs: List[Tuple[int, int]], semi_classical: bool = False,
+                   processes: int = 1) -> List['ShorResult']:
+        """ find orders for every pair (a, N), executing all circuits in a single job (one job per batch of shots)
+        with `processes` > 1, circuits are constructed in a process pool
+        with `batch_shots`, pairs whose order is found are not executed in following batches
+        spans of phases (construction, definition of lazy gates, transpilation, execution, post-processing)
+        of the whole call, and cProfile statistics, are shared by all returned results
+        """
+        for a, N in pairs:
+            self._validate_input(a, N)
+        validate_min('processes', processes, 1)
+        if not pairs:
+            return []
+
+        recorder = PhaseRecorder(self._profiling)
+        with recorder.phase('construction'):
+            circuits, had_transpiled = self._executable_circuits(pairs, semi_classical, processes)
+
+        # transpiled separately (as QuantumInstance.execute would do) to be timed on its own
+        if not had_transpiled and hasattr(self.quantum_instance, 'transpile'):
+            # definitions of lazy gates would otherwise be constructed inside of the transpilation
+            with recorder.phase('definition'):
+                for circuit in circuits:
+                    define_lazy_gates(circuit)
+            with recorder.phase('transpilation'):
+                circuits = self.quantum_instance.transpile(circuits)
+            had_transpiled = True
+
+        if self._batch_shots is None:
+            with recorder.phase('execution'):
+                result, shots = self._execute(circuits, had_transpiled)
+            with recorder.phase('post-processing'):
+                results = [self._process_counts(result.get_counts(i), shots, a, N, semi_classical)
+                           for i, (a, N) in enumerate(pairs)]
+            return self._with_spans(results, recorder)
+
+        run_config = self.quantum_instance.run_config
+        max_shots, seed = run_config.shots, getattr(run_config, 'seed_simulator', None)
+        counts = [Counter() for _ in pairs]
+        results = [ShorResult() for _ in pairs]
+        remaining = list(range(len(pairs)))
+        total_shots, batch = 0, 0
+        while remaining and total_shots < max_shots:
+            # batches with the same seed would repeat the same samples
+            with recorder.phase('execution'):
+                result, shots = self._execute([circuits[i] for i in remaining], had_transpiled,
+                                              min(self._batch_shots, max_shots - total_shots),
+                                              None if seed is None else seed + batch)
+            total_shots += shots
+            batch += 1
+
+            with recorder.phase('post-processing'):
+                for j, i in enumerate(remaining):
+                    a, N = pairs[i]
+                    counts[i].update(result.get_counts(j))
+                    results[i] = self._process_counts(counts[i], total_shots, a, N, semi_classical)
+            remaining = [i for i in remaining if not results[i].order]
+            if self._confidence is not None:
+                remaining = [i for i in remaining if miss_probability(total_shots, pairs[i][1]) > 1 - self._confidence]
+
+        logger.info(f'Stopped after {batch} batches, {total_shots} of {max_shots} shots.')
+        return self._with_spans(results, recorder)
+
+    def _execute(self, circuits: List[QuantumCircuit], had_transpiled: bool, shots: Optional[int] = None,
+                 seed: Optional[int] = None) -> Tuple[Result, int]:
+        """ execute circuits with `shots` and `seed` (defaults of the run config when None), which are set
+        on the run config only for this execution; executions of concurrent attempts take turns
+        """
+        with self._execution_lock:
+            run_config = self.quantum_instance.run_config
+            default_shots, default_seed = run_config.shots, getattr(run_config, 'seed_simulator', None)
+            try:
+                if shots is not None:
+                    run_config.shots = shots
+                if seed is not None:
+                    run_config.seed_simulator = seed
+                return self.quantum_instance.execute(circuits, had_transpiled=had_transpiled), run_config.shots
+            finally:
+                run_config.shots = default_shots
+                if seed is not None:
+                    run_config.seed_simulator = default_seed
+
+    @staticmethod
+    def _with_spans(results: List['ShorResult'], recorder: PhaseRecorder) -> List['ShorResult']:
+        spans, stats = recorder.spans, recorder.stats()
+        for result in results:
+            result.spans, result.profile = spans, stats
+        return results
+
+    def _process_counts(self, counts: Dict[str, int], total_shots: int,
+                        a: int, N: int, semi_classical: bool) -> 'ShorResult':
+        result = ShorResult()
+        result.total_counts = len(counts)
+        result.total_shots = total_shots
+
+        # the most frequent outcomes are the most likely to lie on peaks, so they are combined first
+        measurements = sorted(((self._parse_measurement(measurement, semi_classical), shots)
+                               for measurement, shots in counts.items()), key=lambda item: (-item[1], item[0]))
+        result.order, result.required_counts = self._reconstruct_order([m for m, _ in measurements], a, N)
+        if result.order:
+            result.required_shots = total_shots
+
+        if result.order:
+            for measurement, shots in measurements:
+                denominator = self._get_denominator(measurement, N)
+                if denominator > 1 and result.order % denominator == 0:
+                    result.successful_counts += 1
+                    result.successful_shots += shots
 
         return result
 
-    def construct_circuit(self, a: int, N: int, semi_classical: bool = False, measurement: bool = True):
+    def _executable_circuits(self, pairs: List[Tuple[int, int]], semi_classical: bool,
+                             processes: int) -> Tuple[List[QuantumCircuit], bool]:
+        if processes > 1 and not self._bind_bases:
+            arguments = [(type(self), self._construction_options(), self._circuit_store, a, N, semi_classical)
+                         for a, N in pairs]
+            with ProcessPoolExecutor(max_workers=processes) as executor:
+                circuits = list(executor.map(_construct_measured_circuit, arguments))
+            if self._circuit_store is None:
+                return circuits, False
+            # the store holds constructed circuits now, transpiled ones are taken from it below
+
+        executables = [self._executable_circuit(a, N, semi_classical) for a, N in pairs]
+        # every circuit is either transpiled or not, depending only on the quantum instance
+        return [circuit for circuit, _ in executables], executables[0][1]
+
+    def _executable_circuit(self, a: int, N: int, semi_classical: bool) -> Tuple[QuantumCircuit, bool]:
+        if self._bind_bases:
+            circuit = self.transpile_circuit(None, N, semi_classical)
+            if circuit is None:
+                return self.bind_circuit(self.construct_circuit(None, N, semi_classical), a), False
+            return self.bind_circuit(circuit, a), True
+
+        if self._circuit_store is not None:
+            circuit = self.transpile_circuit(a, N, semi_classical)
+            if circuit is not None:
+                return circuit, True
+
+        return self.construct_circuit(a, N, semi_classical, measurement=True), False
+
+    def transpile_circuit(self, a: Optional[int], N: int, semi_classical: bool = False) -> Optional[QuantumCircuit]:
+        """ return measured circuit transpiled by the quantum instance, reusing the one from the circuit store
+        parameterized circuits (a = None) are also kept in memory
+        returns None when the transpilation of the quantum instance cannot be keyed
+        """
+        target = transpilation_target(self.quantum_instance)
+        if target is None:
+            return None
+
+        key = self._circuit_key(a, N, semi_classical, True, target)
+        # concurrent attempts binding the same parameterized circuit wait for the one constructing it
+        with self._circuits_lock if a is None else nullcontext():
+            if key in self._parameterized_circuits:
+                return self._parameterized_circuits[key]
+
+            circuit = self._circuit_store.load(key) if self._circuit_store is not None else None
+            if circuit is None:
+                circuit = self.quantum_instance.transpile(self.construct_circuit(a, N, semi_classical))[0]
+                if self._circuit_store is not None:
+                    self._circuit_store.save(key, circuit)
+
+            if a is None:
+                self._parameterized_circuits[key] = circuit
+            return circuit
+
+    def bind_circuit(self, circuit: QuantumCircuit, a: int) -> QuantumCircuit:
+        """ bind circuit constructed (or transpiled) for a = None to the base a
+        bits of constants are bound to phases 0 or pi of H P H blocks, which are then replaced by nothing or X
+        (also controlled), as in circuits constructed for a, see `simplify_bound_phases`
+        """
+        N, semi_classical = circuit.metadata['N'], circuit.metadata['semi_classical']
         self._validate_input(a, N)
 
+        n = N.bit_length()
+        values = {}
+        for k in range(2 * n):
+            values.update(self._modular_multiplication_parameters(pow(a, pow(2, k), mod=N), N, n, f'm{k}'))
+
+        bound = simplify_bound_phases(bind_by_name(circuit, values))
+        bound.name = self._get_name(a, N, semi_classical)
+        bound.metadata = {**circuit.metadata, 'a': a}
+        return bound
+
+    def construct_circuit(self, a: Optional[int], N: int, semi_classical: bool = False, measurement: bool = True):
+        """ with a = None, construct circuit parameterized by a, see `bind_circuit` """
+        self._validate_input(2 if a is None else a, N)
+        if a is None and self._known_input:
+            raise ValueError('Circuits with known input cannot be parameterized by the base a.')
+
+        key = self._circuit_key(a, N, semi_classical, measurement)
+        if self._circuit_store is not None:
+            circuit = self._circuit_store.load(key)
+            if circuit is not None:
+                return circuit
+
+        n = N.bit_length()
+
+        if semi_classical and not measurement:
+            raise ValueError('Semi-classical implementation have to contain measurement parts.')
+
+        with parallel_construction(self._construction_pool, self._flat):
+            if semi_classical:
+                circuit = self._construct_circuit_with_semiclassical_QFT(a, N, n)
+            else:
+                circuit = self._construct_circuit(a, N, n, measurement)
+            if self._construction_processes > 1:
+                # the pool is used by lazy gates only while their definitions are constructed;
+                # exponentiation gates send their multipliers to the workers
+                define_gates(instruction for instruction, _, _ in circuit.data)
+                define_lazy_gates(circuit)
+
+        circuit.metadata = {'a': a, 'N': N, 'semi_classical': semi_classical}
+
+        if self._circuit_store is not None:
+            define_lazy_gates(circuit)
+            self._circuit_store.save(key, circuit)
+        return circuit
+
+    def _circuit_key(self, a: Optional[int], N: int, semi_classical: bool, measurement: bool,
+                     target: Optional[str] = None) -> CircuitKey:
+        options = ''.join(f', {name}={value}' for name, value in sorted(self._construction_options().items()))
+        return CircuitKey(f'{type(self).__name__}{options}', a, N, semi_classical, measurement, target)
+
+    def _construction_options(self) -> Dict[str, Any]:
+        """ keyword arguments of the implementation which change constructed circuits """
+        options = {'flat': self._flat, 'known_input': self._known_input,
+                   'feed_forward': self._feed_forward, 'approximation_degree': self._approximation_degree}
+        return {name: value for name, value in options.items() if value}
+
+    def estimate_resources(self, N: int, semi_classical: bool = False, a: Optional[int] = None,
+                           measurement: bool = True) -> Resources:
+        """ count qubits, gates and block depth (an upper bound of depth, see `Resources`) of the circuit returned by
+        `construct_circuit` without constructing it
+        without `a`, arithmetic gates are counted for constants with alternating bits
+        """
+        self._validate_input(2 if a is None else a, N)
+
         n = N.bit_length()
 
         if semi_classical:
             if not measurement:
                 raise ValueError('Semi-classical implementation have to contain measurement parts.')
-            return self._construct_circuit_with_semiclassical_QFT(a, N, n)
+            return self._estimate_resources_with_semiclassical_QFT(a, N, n)
         else:
-            return self._construct_circuit(a, N, n, measurement)
+            return self._estimate_resources(a, N, n, measurement)
 
     @staticmethod
     def _validate_input(a: int, N: int):
@@ -124,43 +569,57 @@ class Shor(ABC):
         return int(measurement, base=2)
 
     @staticmethod
-    def _get_order(measurement: int, a: int, N: int) -> Union[int, None]:
-        if measurement == 0:
-            logger.info('Measurement = 0, order is trivial: r = 1.')
-            return 1
-
-        logger.info(f'Measurement = {measurement}.')
+    def _get_denominator(measurement: int, N: int) -> int:
+        """ denominator of continued fraction approximation of the measured phase, a divisor of the order
+        for outcomes close to peaks
+        """
+        n = N.bit_length()
+        phase = Fraction(measurement, pow(2, 2 * n))
+        fraction = phase.limit_denominator(N)
+        logger.info(f'Measurement = {measurement}, fractional approximation of phase: {fraction}.')
+        return fraction.denominator
+
+    @classmethod
+    def _reconstruct_order(cls, measurements: List[int], a: int, N: int) -> Tuple[Optional[int], Optional[int]]:
+        """ combine denominators of measurements, in given order, until the LCM of some of them (or its small
+        multiple) is a period of a; return the order and the number of measurements used, (None, None) when not found
+        LCMs of every subset of denominators are kept, so outcomes off the peaks do not spoil the others
+        """
         n = N.bit_length()
-        phase = measurement / pow(2, 2 * n)
-        logger.info(f'Measured phase = {phase}.')
-        fraction = Fraction(phase).limit_denominator(N)
-        logger.info(f'Fractional approximation: {fraction}.')
+        candidates = {1}
+        for used, measurement in enumerate(measurements, start=1):
+            denominator = cls._get_denominator(measurement, N)
+            combined = {candidate * denominator // math.gcd(candidate, denominator) for candidate in candidates}
+            combined = sorted(candidate for candidate in combined - candidates if candidate < N)
 
-        r = fraction.denominator
+            for candidate in combined:
+                for i in range(1, n):
+                    r = i * candidate
+                    if r < N and pow(a, r, mod=N) == 1:
+                        order = cls._reduce_period(r, a, N)
+                        logger.info(f'Success, order: r = {order} from {used} measurements.')
+                        return order, used
 
-        if pow(a, r, mod=N) == 1:
-            logger.info(f'Success, order: r = {r} from measurement {measurement}.')
-            return r
-        else:
-            logger.info(f'Denominator {r} is not the order. '
-                        f'Trying multiplication for case when numerator and denominator had a common factor.')
-            r0 = r
-            for i in range(2, n):
-                r = i * r0
-                if pow(a, r, mod=N) == 1:
-                    logger.info(f'Success, order: r = {i}*{r0} = {r}.')
-                    return r
-
-            logger.info(f'Multiplication failed, maximum test factor = {n} was too small.')
-            return None
+            candidates.update(combined)
+
+        logger.info(f'Order not found, candidates: {sorted(candidates)}.')
+        return None, None
+
+    @staticmethod
+    def _reduce_period(r: int, a: int, N: int) -> int:
+        """ smallest divisor of the period r which is still a period of a, i.e. the order """
+        for p in factorint(r):
+            while r % p == 0 and pow(a, r // p, mod=N) == 1:
+                r //= p
+        return r
 
     @staticmethod
     def _get_factors(r: int, a: int, N: int) -> Optional[Tuple[int, int]]:
-        if r % N == 1:
+        if r % 2 == 1:
             logger.info('Odd order, cannot find factors.')
             return None
 
-        guess = math.gcd(pow(a, r // 2) + 1, N)
+        guess = math.gcd(pow(a, r // 2, mod=N) + 1, N)
         if guess in [1, N]:
             logger.info(f'Trivial factor found: {guess}.')
             return 1, N
@@ -168,23 +627,42 @@ class Shor(ABC):
             logger.info(f'Non-trivial factor found: {guess}.')
             return guess, N // guess
 
-    def _construct_circuit(self, a: int, N: int, n: int, measurement: bool) -> QuantumCircuit:
+    def _create_circuit(self, *regs, name: str) -> QuantumCircuit:
+        """ flat circuits take the leaf operations of appended gates, see `FlatCircuit` """
+        if self._flat:
+            return FlatCircuit(*regs, name=name)
+        return QuantumCircuit(*regs, name=name)
+
+    def _define_multipliers(self, multipliers: List[Instruction]) -> None:
+        """ with more construction processes, multipliers appended one by one are defined by the workers first,
+        as flat circuits would take their operations in this process
+        """
+        if self._construction_processes > 1:
+            define_gates(multipliers)
+
+    def _construct_circuit(self, a: Optional[int], N: int, n: int, measurement: bool) -> QuantumCircuit:
         x_qreg = QuantumRegister(2 * n, 'x')
         y_qreg = QuantumRegister(n, 'y')
         aux_qreg = AncillaRegister(self._get_aux_register_size(n), 'aux')
 
-        circuit = QuantumCircuit(x_qreg, y_qreg, aux_qreg, name=self._get_name(a, N))
+        circuit = self._create_circuit(x_qreg, y_qreg, aux_qreg, name=self._get_name(a, N, False))
 
         circuit.h(x_qreg)
         circuit.x(y_qreg[0])
 
-        modular_exponentiation_gate = self._modular_exponentiation_gate(a, N, n)
-        circuit.append(
-            modular_exponentiation_gate,
-            circuit.qubits
-        )
+        if self._known_input:
+            self._append_multiplications_with_known_input(circuit, a, N, n, x_qreg, y_qreg, aux_qreg)
+        else:
+            if a is None:
+                modular_exponentiation_gate = self._parameterized_modular_exponentiation_gate(N, n)
+            else:
+                modular_exponentiation_gate = self._modular_exponentiation_gate(a, N, n)
+            circuit.append(
+                modular_exponentiation_gate,
+                circuit.qubits
+            )
 
-        iqft = QFT(len(x_qreg)).inverse().to_gate()
+        iqft = iqft_gate(len(x_qreg), do_swaps=True, approximation_degree=self._approximation_degree)
         circuit.append(
             iqft,
             x_qreg
@@ -197,45 +675,179 @@ class Shor(ABC):
 
         return circuit
 
-    def _construct_circuit_with_semiclassical_QFT(self, a: int, N: int, n: int) -> QuantumCircuit:
+    def _append_multiplications_with_known_input(self, circuit: QuantumCircuit, a: int, N: int, n: int,
+                                                 x_qreg: QuantumRegister, y_qreg: QuantumRegister,
+                                                 aux_qreg: AncillaRegister) -> None:
+        """ counterpart of the modular exponentiation gate with the first multiplier replaced by a constant load """
+        fourier_qubits = aux_qreg[:self._fourier_aux_size(n)]
+        if fourier_qubits:
+            circuit.append(qft_gate(len(fourier_qubits), approximation_degree=self._approximation_degree),
+                           fourier_qubits)
+
+        multipliers = [self._modular_multiplication_gate(pow(a, pow(2, i), mod=N), N, n) for i in range(1, 2 * n)]
+        self._define_multipliers(multipliers)
+
+        circuit.append(controlled_constant_load(a, n), chain([x_qreg[0]], y_qreg))
+        for i, multiplier in enumerate(multipliers, start=1):
+            circuit.append(
+                multiplier,
+                chain([x_qreg[i]], y_qreg, aux_qreg)
+            )
+
+        if fourier_qubits:
+            circuit.append(iqft_gate(len(fourier_qubits), approximation_degree=self._approximation_degree),
+                           fourier_qubits)
+
+    def _construct_circuit_with_semiclassical_QFT(self, a: Optional[int], N: int, n: int) -> QuantumCircuit:
         x_qreg = QuantumRegister(1, 'x')
         y_qreg = QuantumRegister(n, 'y')
         aux_qreg = AncillaRegister(self._get_aux_register_size(n), 'aux')
 
         x_creg = [ClassicalRegister(1, f'xV{i}') for i in range(2 * n)]
 
-        name = f'{self._get_name(a, N)} (semi-classical QFT)'
-        circuit = QuantumCircuit(x_qreg, y_qreg, aux_qreg, *x_creg, name=name)
+        circuit = self._create_circuit(x_qreg, y_qreg, aux_qreg, *x_creg, name=self._get_name(a, N, True))
 
         circuit.x(y_qreg[0])
 
+        fourier_qubits = aux_qreg[:self._fourier_aux_size(n)]
+        if fourier_qubits:
+            circuit.append(qft_gate(len(fourier_qubits), approximation_degree=self._approximation_degree),
+                           fourier_qubits)
+
         max_i = 2 * n - 1
+        multipliers = []
         for i in range(0, 2 * n):
+            if i == 0 and self._known_input:
+                multipliers.append(controlled_constant_load(pow(a, pow(2, max_i), mod=N), n))
+            elif a is None:
+                multipliers.append(self._parameterized_modular_multiplication_gate(N, n, f'm{max_i - i}'))
+            else:
+                partial_constant = pow(a, pow(2, max_i - i), mod=N)
+                multipliers.append(self._modular_multiplication_gate(partial_constant, N, n))
+        self._define_multipliers(multipliers)
+
+        for i, multiplier in enumerate(multipliers):
             circuit.h(x_qreg)
 
-            partial_constant = pow(a, pow(2, max_i - i), mod=N)
-            modular_multiplication_gate = self._modular_multiplication_gate(partial_constant, N, n)
-            circuit.append(
-                modular_multiplication_gate,
-                chain([x_qreg[0]], y_qreg, aux_qreg)
-            )
+            if i == 0 and self._known_input:
+                circuit.append(multiplier, chain([x_qreg[0]], y_qreg))
+            else:
+                circuit.append(multiplier, chain([x_qreg[0]], y_qreg, aux_qreg))
 
-            for j in range(i):
-                angle = -np.pi / float(pow(2, i - j))
-                circuit.p(angle, x_qreg[0]).c_if(x_creg[j], 1)
+            # a single corrected bit keeps its conditioned rotation, which is one operation already
+            corrected = x_creg[self._first_corrected_bit(i):i]
+            if self._feed_forward and len(corrected) > 1:
+                circuit.append(PhaseCorrection(len(corrected)), [x_qreg[0]], [creg[0] for creg in corrected])
+            else:
+                for j in range(self._first_corrected_bit(i), i):
+                    angle = -np.pi / float(pow(2, i - j))
+                    circuit.p(angle, x_qreg[0]).c_if(x_creg[j], 1)
 
             circuit.h(x_qreg)
             circuit.measure(x_qreg[0], x_creg[i][0])
             circuit.x(x_qreg).c_if(x_creg[i], 1)
 
+        if fourier_qubits:
+            circuit.append(iqft_gate(len(fourier_qubits), approximation_degree=self._approximation_degree),
+                           fourier_qubits)
+
         return circuit
 
+    def _estimate_resources(self, a: Optional[int], N: int, n: int, measurement: bool) -> Resources:
+        x_qreg, y_qreg, aux_qreg = layout(2 * n, n, self._get_aux_register_size(n))
+        counter = ResourceCounter(len(x_qreg) + len(y_qreg) + len(aux_qreg))
+
+        counter.parallel('h', x_qreg)
+        counter.gate('x', y_qreg[0])
+
+        if self._known_input:
+            fourier_qubits = aux_qreg[:self._fourier_aux_size(n)]
+            if len(fourier_qubits):
+                counter.append(qft_gate_resources(len(fourier_qubits), False, self._approximation_degree),
+                               fourier_qubits)
+
+            counter.append(controlled_constant_load_resources(a, n), join(x_qreg[0], y_qreg))
+            for i in range(1, 2 * n):
+                partial_constant = None if a is None else pow(a, pow(2, i), mod=N)
+                counter.append(
+                    self._modular_multiplication_gate_resources(partial_constant, N, n),
+                    join(x_qreg[i], y_qreg, aux_qreg)
+                )
+
+            if len(fourier_qubits):
+                counter.append(iqft_gate_resources(len(fourier_qubits), False, self._approximation_degree),
+                               fourier_qubits)
+        else:
+            counter.append(
+                self._modular_exponentiation_gate_resources(a, N, n),
+                join(x_qreg, y_qreg, aux_qreg)
+            )
+
+        counter.append(
+            iqft_gate_resources(len(x_qreg), do_swaps=True, approximation_degree=self._approximation_degree),
+            x_qreg
+        )
+
+        if measurement:
+            counter.parallel('measure', x_qreg)
+
+        return counter.resources()
+
+    def _estimate_resources_with_semiclassical_QFT(self, a: Optional[int], N: int, n: int) -> Resources:
+        x_qreg, y_qreg, aux_qreg = layout(1, n, self._get_aux_register_size(n))
+        counter = ResourceCounter(len(x_qreg) + len(y_qreg) + len(aux_qreg))
+
+        counter.gate('x', y_qreg[0])
+
+        fourier_qubits = aux_qreg[:self._fourier_aux_size(n)]
+        if len(fourier_qubits):
+            counter.append(qft_gate_resources(len(fourier_qubits), approximation_degree=self._approximation_degree),
+                           fourier_qubits)
+
+        max_i = 2 * n - 1
+        for i in range(0, 2 * n):
+            counter.gate('h', x_qreg[0])
+
+            partial_constant = None if a is None else pow(a, pow(2, max_i - i), mod=N)
+            if i == 0 and self._known_input:
+                counter.append(controlled_constant_load_resources(partial_constant, n), join(x_qreg, y_qreg))
+            else:
+                counter.append(
+                    self._modular_multiplication_gate_resources(partial_constant, N, n),
+                    join(x_qreg, y_qreg, aux_qreg)
+                )
+
+            corrected = i - self._first_corrected_bit(i)
+            if self._feed_forward and corrected > 1:
+                counter.gate('phase_correction', x_qreg[0])
+            else:
+                counter.append(Resources(1, {'p': 1}, 1), x_qreg, times=corrected)
+
+            counter.gate('h', x_qreg[0])
+            counter.gate('measure', x_qreg[0])
+            counter.gate('x', x_qreg[0])
+
+        if len(fourier_qubits):
+            counter.append(iqft_gate_resources(len(fourier_qubits), approximation_degree=self._approximation_degree),
+                           fourier_qubits)
+
+        return counter.resources()
+
+    def _first_corrected_bit(self, i: int) -> int:
+        """ first measured bit whose phase correction is kept in round i of the semi-classical circuit """
+        return 0 if self._approximation_degree is None else max(0, i - self._approximation_degree)
+
     @abstractmethod
     def _get_aux_register_size(self, n: int) -> int:
         raise NotImplemented
 
-    def _get_name(self, a: int, N: int) -> str:
-        return f'{self._prefix} Shor(a={a}, N={N})'
+    def _fourier_aux_size(self, n: int) -> int:
+        """ number of leading aux qubits which multipliers of the semi-classical circuit expect in Fourier space """
+        return 0
+
+    def _get_name(self, a: Optional[int], N: int, semi_classical: bool) -> str:
+        name = f'{self._prefix} Shor(a={a}, N={N})' if a is not None else f'{self._prefix} Shor(N={N})'
+        return f'{name} (semi-classical QFT)' if semi_classical else name
 
     @property
     @abstractmethod
@@ -250,6 +862,54 @@ class Shor(ABC):
     def _modular_multiplication_gate(self, constant: int, N: int, n: int) -> Instruction:
         raise NotImplemented
 
+    @property
+    def _parameterizable(self) -> bool:
+        """ whether the `_parameterized_*` gates are implemented, as required by `bind_bases` """
+        return False
+
+    def _parameterized_modular_exponentiation_gate(self, N: int, n: int) -> Instruction:
+        raise NotImplementedError(f'{self._prefix} circuits cannot be parameterized by the base a.')
+
+    def _parameterized_modular_multiplication_gate(self, N: int, n: int, prefix: str) -> Instruction:
+        raise NotImplementedError(f'{self._prefix} circuits cannot be parameterized by the base a.')
+
+    def _modular_multiplication_parameters(self, constant: int, N: int, n: int, prefix: str) -> Dict[str, float]:
+        raise NotImplementedError(f'{self._prefix} circuits cannot be parameterized by the base a.')
+
+    @abstractmethod
+    def _modular_exponentiation_gate_resources(self, constant: Optional[int], N: int, n: int) -> Resources:
+        raise NotImplementedError
+
+    @abstractmethod
+    def _modular_multiplication_gate_resources(self, constant: Optional[int], N: int, n: int) -> Resources:
+        raise NotImplementedError
+
+
+@lru_cache(maxsize=None)
+def miss_probability(shots: int, N: int) -> float:
+    """ upper bound of the probability that `shots` shots of an exact, noiseless order finding circuit for N
+    do not reveal the order r of any base, i.e. (1 - p)^shots for the probability p of revealing it by a single shot:
+    the outcome lies closest to s / r for s coprime to r with probability at least 4 / pi^2 * phi(r) / r,
+    and phi(r) / r is smallest for the largest primorial below N
+    """
+    ratio, primorial = 1.0, 1
+    for prime in primerange(2, N):
+        primorial *= prime
+        if primorial >= N:
+            break
+        ratio *= 1 - 1 / prime
+
+    return (1 - 4 / np.pi ** 2 * ratio) ** shots
+
+
+def _construct_measured_circuit(argument: Tuple[type, Dict[str, Any], Optional[CircuitStore], int, int, bool]) \
+        -> QuantumCircuit:
+    shor_class, options, circuit_store, a, N, semi_classical = argument
+    circuit = shor_class(circuit_store=circuit_store, **options).construct_circuit(a, N, semi_classical,
+                                                                                   measurement=True)
+    define_lazy_gates(circuit)
+    return circuit
+
 
 class ShorResult(AlgorithmResult):
 
@@ -260,6 +920,10 @@ class ShorResult(AlgorithmResult):
         self._successful_counts = 0
         self._total_shots = 0
         self._successful_shots = 0
+        self._required_counts = None
+        self._required_shots = None
+        self._spans = []
+        self._profile = None
 
     @property
     def order(self) -> Optional[int]:
@@ -277,6 +941,26 @@ class ShorResult(AlgorithmResult):
     def total_counts(self, value: int) -> None:
         self._total_counts = value
 
+    @property
+    def required_counts(self) -> Optional[int]:
+        """ number of the most frequent distinct outcomes combined until the order was confirmed """
+        return self._required_counts
+
+    @required_counts.setter
+    def required_counts(self, value: Optional[int]) -> None:
+        self._required_counts = value
+
+    @property
+    def required_shots(self) -> Optional[int]:
+        """ cumulative number of shots executed when the order was first verified: all shots of a single job,
+        with `batch_shots` the shots of the batches up to the one after which it was verified
+        """
+        return self._required_shots
+
+    @required_shots.setter
+    def required_shots(self, value: Optional[int]) -> None:
+        self._required_shots = value
+
     @property
     def successful_counts(self) -> int:
         return self._successful_counts
@@ -300,3 +984,90 @@ class ShorResult(AlgorithmResult):
     @successful_shots.setter
     def successful_shots(self, value: int) -> None:
         self._successful_shots = value
+
+    @property
+    def spans(self) -> List[Span]:
+        """ durations of phases of the get_order (or get_orders) call, in order """
+        return self._spans
+
+    @spans.setter
+    def spans(self, value: List[Span]) -> None:
+        self._spans = value
+
+    @property
+    def profile(self) -> Optional[pstats.Stats]:
+        """ cProfile statistics of the phases, with `Profiling(cprofile=True)` """
+        return self._profile
+
+    @profile.setter
+    def profile(self, value: Optional[pstats.Stats]) -> None:
+        self._profile = value
+
+
+class FactorizationResult(AlgorithmResult):
+    """ method is one of 'even', 'perfect power', 'trial division', 'gcd' (of a random base and N) and 'order' """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._factors = None
+        self._method = None
+        self._base = None
+        self._order = None
+        self._bases = []
+        self._attempts = 0
+        self._total_shots = 0
+
+    @property
+    def factors(self) -> Optional[Tuple[int, int]]:
+        return self._factors
+
+    @factors.setter
+    def factors(self, value: Tuple[int, int]) -> None:
+        self._factors = value
+
+    @property
+    def method(self) -> Optional[str]:
+        return self._method
+
+    @method.setter
+    def method(self, value: str) -> None:
+        self._method = value
+
+    @property
+    def base(self) -> Optional[int]:
+        """ base a which gave the factors """
+        return self._base
+
+    @base.setter
+    def base(self, value: int) -> None:
+        self._base = value
+
+    @property
+    def order(self) -> Optional[int]:
+        return self._order
+
+    @order.setter
+    def order(self, value: int) -> None:
+        self._order = value
+
+    @property
+    def bases(self) -> List[int]:
+        """ randomly chosen bases, in order of choice """
+        return self._bases
+
+    @property
+    def attempts(self) -> int:
+        """ number of finished get_order runs """
+        return self._attempts
+
+    @attempts.setter
+    def attempts(self, value: int) -> None:
+        self._attempts = value
+
+    @property
+    def total_shots(self) -> int:
+        return self._total_shots
+
+    @total_shots.setter
+    def total_shots(self, value: int) -> None:
+        self._total_shots = value
@@ -0,0 +1,56 @@
+from fractions import Fraction
+from typing import Iterable, List, NamedTuple, Optional, Type
+
+from implementations.shor import Shor
+from simulation.branching_simulator import BranchingQuantumInstance
+from simulation.order_finding_distribution import multiplicative_order
+from simulation.permutation_compiler import compile_permutations
+from simulation.sparse_simulator import PHASE_GATES, SparseStatevector
+from utils.resources import Resources
+
+
+class ApproximationReport(NamedTuple):
+    """ resources and success probability of the circuit with `approximation_degree` (None for the exact circuit)
+    `success_probability` is the probability of measuring an outcome whose denominator (> 1) divides the order,
+    as counted by `ShorResult.successful_shots`
+    """
+    approximation_degree: Optional[int]
+    resources: Resources
+    rotations: int
+    success_probability: Optional[float]
+
+
+def approximation_report(shor_class: Type[Shor], N: int, degrees: Iterable[Optional[int]], a: Optional[int] = None,
+                         semi_classical: bool = False, **options) -> List[ApproximationReport]:
+    """ compare circuits of `shor_class` constructed with `options` and each of approximation `degrees`
+    resources are estimated without constructing circuits; success probabilities are simulated only for given `a`:
+    full circuits by `SparseStatevector`, semi-classical ones by `BranchingQuantumInstance`, which applies exact
+    multipliers, so only the approximation of QFT and phase corrections is accounted for
+    """
+    reports = []
+    for degree in degrees:
+        shor = shor_class(approximation_degree=degree, **options)
+        resources = shor.estimate_resources(N, semi_classical, a)
+        rotations = sum(count for name, count in resources.gates.items() if name in PHASE_GATES)
+        success_probability = None if a is None else _success_probability(shor, a, N, semi_classical)
+        reports.append(ApproximationReport(degree, resources, rotations, success_probability))
+    return reports
+
+
+def _success_probability(shor: Shor, a: int, N: int, semi_classical: bool) -> float:
+    n = N.bit_length()
+    if semi_classical:
+        circuit = shor.construct_circuit(a, N, semi_classical=True)
+        distribution = {int(outcome.replace(' ', ''), base=2): probability for outcome, probability
+                        in BranchingQuantumInstance(assume_exact=True).outcome_distribution(circuit).items()}
+    else:
+        circuit = compile_permutations(shor.construct_circuit(a, N, measurement=False))
+        distribution = SparseStatevector.from_instruction(circuit).probabilities(range(2 * n))
+
+    order = multiplicative_order(a, N)
+    successful = 0.0
+    for measurement, probability in distribution.items():
+        denominator = Fraction(measurement, pow(2, 2 * n)).limit_denominator(N).denominator
+        if denominator > 1 and order % denominator == 0:
+            successful += probability
+    return successful
@@ -0,0 +1,228 @@
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from qiskit import ClassicalRegister, QuantumCircuit
+from qiskit.assembler.run_config import RunConfig
+from qiskit.circuit import Clbit, Instruction
+from qiskit.result import Result
+
+from gates.batched_product_sum import batched_exact_from
+from simulation.order_finding_distribution import PROBABILITY_TOLERANCE, multiplicative_order
+from simulation.permutation_compiler import MULTIPLIERS, ModularMultiplicationPermutation
+from utils.resources import LEAF_OPERATIONS
+
+IGNORED_OPERATIONS = {'barrier', 'id'}
+MAX_CLBITS = 64
+
+
+class _Branches(NamedTuple):
+    """ branches of the state of semi-classical circuit, one row per distinct history of measured bits
+    the work register always holds a superposition of powers a^j mod N, so it is stored as amplitudes over
+    positions j in the orbit of a, separately for |0> (`zero`) and |1> (`one`) of the control qubit;
+    `weight` is the number of shots or the probability of the branch
+    """
+    zero: np.ndarray
+    one: np.ndarray
+    memory: np.ndarray
+    weight: np.ndarray
+
+    @classmethod
+    def initial(cls, order: int, weight: Union[int, float]) -> '_Branches':
+        zero = np.zeros((1, order), dtype=np.complex128)
+        zero[0, 0] = 1
+        return cls(zero, np.zeros_like(zero), np.zeros(1, dtype=np.uint64), np.array([weight]))
+
+    def select(self, rows: np.ndarray) -> '_Branches':
+        return _Branches(self.zero[rows], self.one[rows], self.memory[rows], self.weight[rows])
+
+
+class BranchingQuantumInstance:
+    """ replacement of QuantumInstance executing semi-classical circuits created by `Shor.construct_circuit`
+    instead of simulating every shot separately, the state is branched on every measurement: shots are split
+    between outcomes according to their probabilities, so all shots with the same measured bits share one branch
+    (with `shots` = None, `outcome_distribution` follows every outcome with its probability instead)
+
+    only operations on the control qubit are interpreted (h, x, p, measure, possibly classically conditioned,
+    and phase_correction of `feed_forward`);
+    every other operation on the control qubit has to be the next controlled multiplier of the circuit
+    (a multiplier gate of one of the implementations, or its permutation, by a^(2^(2n - 1 - k)) mod N for the k-th
+    one; the first one may also be the constant load of `known_input`), and operations not touching the control
+    qubit are skipped, as they only prepare and restore the work and aux registers
+    multipliers are applied as exact multiplications, so approximate multipliers and multipliers with batched
+    windows raise ValueError, unless `assume_exact` (e.g. to account only for approximate corrections)
+    """
+
+    def __init__(self, shots: int = 1024, seed: Optional[int] = None, assume_exact: bool = False) -> None:
+        self._run_config = RunConfig(shots=shots, seed_simulator=seed)
+        self._rng = np.random.default_rng(seed)
+        self._assume_exact = assume_exact
+
+    @property
+    def run_config(self) -> RunConfig:
+        return self._run_config
+
+    @property
+    def is_simulator(self) -> bool:
+        return True
+
+    def outcome_distribution(self, circuit: QuantumCircuit) -> Dict[str, float]:
+        """ exact probabilities of measured values, formatted like counts of the circuit executed on Aer
+        outcomes with probability below PROBABILITY_TOLERANCE are dropped during branching
+        """
+        branches = self._simulate(circuit, None)
+        return {_format(int(memory), circuit): float(weight) for memory, weight in zip(branches.memory,
+                                                                                      branches.weight)}
+
+    def execute(self, circuits: Union[QuantumCircuit, List[QuantumCircuit]], had_transpiled: bool = False) -> Result:
+        circuits = circuits if isinstance(circuits, list) else [circuits]
+        shots = self._run_config.shots
+
+        results = []
+        for circuit in circuits:
+            branches = self._simulate(circuit, shots)
+            results.append({
+                'shots': shots,
+                'success': True,
+                'data': {'counts': {hex(int(memory)): int(count)
+                                    for memory, count in zip(branches.memory, branches.weight)}},
+                'header': {
+                    'name': circuit.name,
+                    'creg_sizes': [[creg.name, creg.size] for creg in circuit.cregs],
+                    'memory_slots': circuit.num_clbits
+                }
+            })
+
+        return Result.from_dict({
+            'backend_name': 'branching_semi_classical',
+            'backend_version': '1.0',
+            'qobj_id': '',
+            'job_id': '',
+            'success': True,
+            'results': results
+        })
+
+    def _simulate(self, circuit: QuantumCircuit, shots: Optional[int]) -> _Branches:
+        a, N = _validate(circuit)
+        n = N.bit_length()
+        order = multiplicative_order(a, N)
+        control = circuit.qubits[0]
+        clbit_indices = {clbit: i for i, clbit in enumerate(circuit.clbits)}
+
+        branches = _Branches.initial(order, 1.0 if shots is None else shots)
+        multipliers = 0
+        for instruction, qargs, cargs in circuit.data:
+            if instruction.name in IGNORED_OPERATIONS or control not in qargs:
+                continue
+
+            rows = self._condition_rows(branches.memory, instruction.condition, clbit_indices)
+            if len(qargs) > 1:
+                if instruction.name in LEAF_OPERATIONS:
+                    raise ValueError(f'Circuit {circuit.name} is flat, multipliers cannot be recognized.')
+                if multipliers == 2 * n:
+                    raise ValueError(f'Circuit {circuit.name} has more than {2 * n} multipliers.')
+                self._validate_multiplier(instruction, pow(a, pow(2, 2 * n - 1 - multipliers), N), N,
+                                          multipliers == 0)
+                shift = pow(2, 2 * n - 1 - multipliers, order)
+                branches.one[rows] = np.roll(branches.one[rows], shift, axis=1)
+                multipliers += 1
+            elif instruction.name == 'h':
+                zero, one = branches.zero[rows], branches.one[rows]
+                branches.zero[rows], branches.one[rows] = (zero + one) / np.sqrt(2), (zero - one) / np.sqrt(2)
+            elif instruction.name == 'x':
+                branches.zero[rows], branches.one[rows] = branches.one[rows], branches.zero[rows]
+            elif instruction.name == 'p':
+                branches.one[rows] *= np.exp(1j * float(instruction.params[0]))
+            elif instruction.name == 'phase_correction':
+                values = self._clbits_value(branches.memory[rows], cargs, clbit_indices)
+                branches.one[rows] *= np.exp(1j * instruction.angle(values))[:, np.newaxis]
+            elif instruction.name == 'measure':
+                if instruction.condition is not None:
+                    raise ValueError('Conditioned measurements are not supported.')
+                branches = self._measure(branches, clbit_indices[cargs[0]], shots)
+            else:
+                raise ValueError(f'Operation {instruction.name} on the control qubit is not supported.')
+
+        return branches
+
+    def _validate_multiplier(self, instruction: Instruction, constant: int, N: int, first: bool) -> None:
+        gate = instruction.block if isinstance(instruction, ModularMultiplicationPermutation) else instruction
+        # the constant load of known input maps |1> to |constant>, which is the same shift
+        if first and gate.name == f'C-Load({constant})':
+            return
+        if not isinstance(gate, MULTIPLIERS):
+            raise ValueError(f'Operation {instruction.name} on the control qubit is not a known multiplier.')
+        if gate.constant != constant or gate.N != N:
+            raise ValueError(f'Multiplier {gate.name} does not multiply by {constant} modulo {N}.')
+        if self._assume_exact:
+            return
+
+        batched_windows = getattr(gate, 'batched_windows', False)
+        degree = getattr(gate, 'approximation_degree', None)
+        if batched_windows or degree is not None and degree < batched_exact_from(gate.n, batched_windows):
+            raise ValueError(f'Multiplier {gate.name} is not an exact multiplication (approximate or with batched '
+                             f'windows), see assume_exact.')
+
+    @staticmethod
+    def _condition_rows(memory: np.ndarray, condition: Optional[Tuple[ClassicalRegister, int]],
+                        clbit_indices: Dict[Clbit, int]) -> np.ndarray:
+        if condition is None:
+            return np.arange(len(memory))
+
+        register, value = condition
+        return np.flatnonzero(BranchingQuantumInstance._clbits_value(memory, register, clbit_indices) ==
+                              np.uint64(value))
+
+    @staticmethod
+    def _clbits_value(memory: np.ndarray, clbits: Sequence[Clbit], clbit_indices: Dict[Clbit, int]) -> np.ndarray:
+        """ values of the given classical bits in every branch, the first one is the least significant """
+        value = np.zeros(len(memory), dtype=np.uint64)
+        for k, clbit in enumerate(clbits):
+            bit = (memory >> np.uint64(clbit_indices[clbit])) & np.uint64(1)
+            value |= bit << np.uint64(k)
+        return value
+
+    def _measure(self, branches: _Branches, clbit: int, shots: Optional[int]) -> _Branches:
+        probability_one = np.sum(np.abs(branches.one) ** 2, axis=1)
+        probability_one = np.clip(probability_one / (probability_one + np.sum(np.abs(branches.zero) ** 2, axis=1)),
+                                  0.0, 1.0)
+        if shots is None:
+            weight_one = branches.weight * probability_one
+        else:
+            weight_one = self._rng.binomial(branches.weight.astype(np.int64), probability_one)
+        weight_zero = branches.weight - weight_one
+
+        bit = np.uint64(1) << np.uint64(clbit)
+        zero = np.divide(branches.zero, np.sqrt(1 - probability_one)[:, np.newaxis],
+                         out=np.zeros_like(branches.zero), where=probability_one[:, np.newaxis] < 1)
+        one = np.divide(branches.one, np.sqrt(probability_one)[:, np.newaxis],
+                        out=np.zeros_like(branches.one), where=probability_one[:, np.newaxis] > 0)
+
+        measured = _Branches(
+            np.concatenate([zero, np.zeros_like(one)]),
+            np.concatenate([np.zeros_like(zero), one]),
+            np.concatenate([branches.memory & ~bit, branches.memory | bit]),
+            np.concatenate([weight_zero, weight_one])
+        )
+
+        threshold = PROBABILITY_TOLERANCE if shots is None else 0
+        return measured.select(np.flatnonzero(measured.weight > threshold))
+
+
+def _validate(circuit: QuantumCircuit) -> Tuple[int, int]:
+    metadata = circuit.metadata or {}
+    if not {'a', 'N', 'semi_classical'} <= set(metadata) or metadata['a'] is None:
+        raise ValueError(f'Circuit {circuit.name} was not created by Shor.construct_circuit.')
+    if not metadata['semi_classical']:
+        raise ValueError(f'Circuit {circuit.name} does not use semi-classical QFT.')
+    if circuit.num_clbits > MAX_CLBITS:
+        raise ValueError(f'Circuit {circuit.name} has more than {MAX_CLBITS} classical bits.')
+    return metadata['a'], metadata['N']
+
+
+def _format(memory: int, circuit: QuantumCircuit) -> str:
+    bits = f'{memory:0{circuit.num_clbits}b}'[::-1]
+    parts, start = [], 0
+    for creg in circuit.cregs:
+        parts.append(bits[start:start + creg.size][::-1])
+        start += creg.size
+    return ' '.join(reversed(parts))
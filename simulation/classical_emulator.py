@@ -0,0 +1,190 @@
+from itertools import accumulate
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from qiskit import QuantumCircuit
+from qiskit.circuit import ControlledGate, Instruction
+
+from utils.custom_typing import QRegsSpec
+
+# (controls, control values, targets) - X on a single target or SWAP of two targets
+Operation = Tuple[Tuple[int, ...], Tuple[bool, ...], Tuple[int, ...]]
+RegisterValues = Mapping[str, Union[int, Sequence[int], np.ndarray]]
+
+CLASSICAL_BASE_GATES = {'x': 1, 'swap': 2}
+CONTROLLED_GATES = {'cx': ('x', 1), 'ccx': ('x', 2), 'cswap': ('swap', 1)}
+IGNORED_OPERATIONS = {'barrier', 'id'}
+
+WORD_BITS = 64
+
+
+class ClassicalEmulator:
+    """ evaluate reversible X/CX/CCX/(C)SWAP circuit on batches of computational basis states
+    states are stored bit-sliced: every qubit is a packed bit array over the whole batch,
+    so single NumPy operation on uint64 words applies a gate to 64 inputs at once;
+    registers are named after `regs` spec of the gate (e.g. `adder_regs(n)`) or after registers of the circuit
+    """
+
+    def __init__(self, operation: Union[Instruction, QuantumCircuit], regs: Optional[QRegsSpec] = None) -> None:
+        circuit = operation if isinstance(operation, QuantumCircuit) else operation.definition
+        if circuit is None:
+            raise ValueError(f'Operation {operation.name} has no definition to emulate.')
+
+        self._num_qubits = circuit.num_qubits
+        self._registers = _register_layout(circuit) if regs is None else _spec_layout(regs, circuit.num_qubits)
+        self._operations = _Compiler().compile(circuit)
+
+    @property
+    def num_qubits(self) -> int:
+        return self._num_qubits
+
+    @property
+    def registers(self) -> Dict[str, List[int]]:
+        return {name: list(qubits) for name, qubits in self._registers.items()}
+
+    @property
+    def operations(self) -> List[Operation]:
+        return list(self._operations)
+
+    def run(self, inputs: RegisterValues) -> Dict[str, np.ndarray]:
+        """ return values of all registers after applying operation
+        inputs maps register name to an int or an array of ints (one per basis state);
+        registers not present are initialised to 0, scalars are broadcast over the batch;
+        registers wider than 64 qubits are not returned
+        """
+        unknown = set(inputs) - set(self._registers)
+        if unknown:
+            raise ValueError(f'Unknown registers: {sorted(unknown)}. Available: {list(self._registers)}.')
+
+        values = {name: np.atleast_1d(np.asarray(value, dtype=np.uint64)) for name, value in inputs.items()}
+        batch = max((len(value) for value in values.values()), default=1)
+        words = -(-batch // WORD_BITS)
+
+        planes = np.zeros((self._num_qubits, words), dtype=np.uint64)
+        for name, value in values.items():
+            if len(value) not in [1, batch]:
+                raise ValueError(f'Register {name} has {len(value)} values, expected 1 or {batch}.')
+            _check_register_size(name, self._registers[name])
+            value = np.broadcast_to(value, (batch,))
+            for bit, qubit in enumerate(self._registers[name]):
+                planes[qubit] = _pack(value, bit, words)
+
+        self.apply(planes)
+
+        return {
+            name: _unpack(planes, qubits, batch)
+            for name, qubits in self._registers.items()
+            if len(qubits) <= WORD_BITS
+        }
+
+    def apply(self, planes: np.ndarray) -> None:
+        """ apply operation in place to bit-sliced states of shape (num_qubits, words) """
+        ones = np.full(planes.shape[1], np.iinfo(np.uint64).max, dtype=np.uint64)
+
+        for controls, values, targets in self._operations:
+            mask = ones
+            for control, value in zip(controls, values):
+                mask = mask & (planes[control] if value else ~planes[control])
+
+            if len(targets) == 1:
+                planes[targets[0]] ^= mask
+            else:
+                a, b = targets
+                diff = (planes[a] ^ planes[b]) & mask
+                planes[a] ^= diff
+                planes[b] ^= diff
+
+
+class _Compiler:
+    def __init__(self) -> None:
+        self._compiled: Dict[int, Tuple[Instruction, List[Operation]]] = {}
+
+    def compile(self, circuit: QuantumCircuit) -> List[Operation]:
+        indices = {qubit: i for i, qubit in enumerate(circuit.qubits)}
+        operations = []
+
+        for instruction, qargs, cargs in circuit.data:
+            if instruction.name in IGNORED_OPERATIONS:
+                continue
+            if cargs or instruction.condition is not None:
+                raise ValueError(f'Operation {instruction.name} is not a classical permutation.')
+
+            qubit_map = [indices[qubit] for qubit in qargs]
+            for controls, values, targets in self._compile_instruction(instruction):
+                operations.append((
+                    tuple(qubit_map[c] for c in controls),
+                    values,
+                    tuple(qubit_map[t] for t in targets)
+                ))
+
+        return operations
+
+    def _compile_instruction(self, instruction: Instruction) -> List[Operation]:
+        operation = _as_primitive(instruction)
+        if operation is not None:
+            return [operation]
+
+        key = id(instruction)
+        if key not in self._compiled:
+            if instruction.definition is None:
+                raise ValueError(f'Operation {instruction.name} is not a classical permutation.')
+            # keep instruction referenced so that its id is not reused during compilation
+            self._compiled[key] = (instruction, self.compile(instruction.definition))
+        return self._compiled[key][1]
+
+
+def _as_primitive(instruction: Instruction) -> Union[Operation, None]:
+    name = instruction.name
+
+    if name in CLASSICAL_BASE_GATES:
+        num_targets = CLASSICAL_BASE_GATES[name]
+        return (), (), tuple(range(num_targets))
+
+    if isinstance(instruction, ControlledGate) and instruction.base_gate.name in CLASSICAL_BASE_GATES:
+        base_name, num_ctrl_qubits = instruction.base_gate.name, instruction.num_ctrl_qubits
+        ctrl_state = instruction.ctrl_state
+    elif name in CONTROLLED_GATES:
+        base_name, num_ctrl_qubits = CONTROLLED_GATES[name]
+        ctrl_state = (1 << num_ctrl_qubits) - 1
+    else:
+        return None
+
+    num_targets = CLASSICAL_BASE_GATES[base_name]
+    controls = tuple(range(num_ctrl_qubits))
+    values = tuple(bool((ctrl_state >> i) & 1) for i in controls)
+    targets = tuple(range(num_ctrl_qubits, num_ctrl_qubits + num_targets))
+    return controls, values, targets
+
+
+def _register_layout(circuit: QuantumCircuit) -> Dict[str, List[int]]:
+    indices = {qubit: i for i, qubit in enumerate(circuit.qubits)}
+    return {qreg.name: [indices[qubit] for qubit in qreg] for qreg in circuit.qregs}
+
+
+def _spec_layout(regs: QRegsSpec, num_qubits: int) -> Dict[str, List[int]]:
+    if sum(regs.values()) != num_qubits:
+        raise ValueError(f'Registers {regs} do not match operation on {num_qubits} qubits.')
+
+    starts = [0, *accumulate(regs.values())]
+    return {name: list(range(start, start + size)) for (name, size), start in zip(regs.items(), starts)}
+
+
+def _check_register_size(name: str, qubits: List[int]) -> None:
+    if len(qubits) > WORD_BITS:
+        raise ValueError(f'Register {name} of {len(qubits)} qubits does not fit into {WORD_BITS}-bit integer.')
+
+
+def _pack(values: np.ndarray, bit: int, words: int) -> np.ndarray:
+    bits = ((values >> np.uint64(bit)) & np.uint64(1)).astype(np.uint8)
+    packed = np.packbits(bits, bitorder='little')
+    padded = np.zeros(words * 8, dtype=np.uint8)
+    padded[:len(packed)] = packed
+    return padded.view(np.uint64)
+
+
+def _unpack(planes: np.ndarray, qubits: List[int], batch: int) -> np.ndarray:
+    values = np.zeros(batch, dtype=np.uint64)
+    for bit, qubit in enumerate(qubits):
+        bits = np.unpackbits(planes[qubit].view(np.uint8), bitorder='little')[:batch]
+        values |= bits.astype(np.uint64) << np.uint64(bit)
+    return values
@@ -0,0 +1,222 @@
+import math
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+from qiskit import QuantumCircuit
+from qiskit.assembler.run_config import RunConfig
+from qiskit.result import Result
+from sympy.ntheory import n_order
+
+MAX_OUTCOMES = 2 ** 24
+PROBABILITY_TOLERANCE = 1e-14
+# up to this register size, outcomes fit into uint64 and their products with r wrap modulo Q
+MAX_UINT64_REGISTER = 2 ** 64
+
+
+def multiplicative_order(a: int, N: int) -> int:
+    """ order of a modulo N, taken by sympy from the factorization of N (dividing the order of the group by its
+    prime factors while a^order stays 1) instead of stepping through all r powers of a
+    """
+    if a <= 1 or a >= N:
+        raise ValueError(f'The integer a needs to satisfy 1 < a < N. Provided a = {a}.')
+    if math.gcd(a, N) != 1:
+        raise ValueError(f'a = {a} is not invertible modulo N = {N}.')
+
+    return int(n_order(a, N))
+
+
+class OrderFindingDistribution:
+    """ exact distribution of the phase register measured by order finding circuits
+    After modular exponentiation of the uniform superposition over Q = 2^(2n) values the phase register holds
+    r interleaved combs k = s + j*r, so after inverse QFT the probability of y only depends on ry mod Q:
+
+        P(y) = sum_s |sum_{j < m_s} exp(2 pi i j r y / Q)|^2 / Q^2,
+
+    with m_s = ceil((Q - s) / r). Both full and semi-classical QFT circuits measure the same distribution.
+    When Q exceeds `max_outcomes`, only windows around the r peaks y ~ s*Q/r are evaluated and the probability
+    outside them is reported as `truncated_probability`. Beyond 64-bit registers (n > 32), outcomes are kept
+    as Python integers, in an array of objects.
+    """
+
+    def __init__(self, a: int, N: int, semi_classical: bool = False, max_outcomes: int = MAX_OUTCOMES) -> None:
+        self._a = a
+        self._N = N
+        self._semi_classical = semi_classical
+        self._n = N.bit_length()
+        self._order = multiplicative_order(a, N)
+
+        Q = pow(2, 2 * self._n)
+        if Q <= max_outcomes:
+            outcomes = np.arange(Q, dtype=np.uint64)
+        elif Q > MAX_UINT64_REGISTER:
+            outcomes = _large_peak_windows(self._order, Q, max_outcomes)
+        else:
+            outcomes = _peak_windows(self._order, Q, max_outcomes)
+
+        probabilities = _probabilities(outcomes, self._order, Q)
+        significant = probabilities > PROBABILITY_TOLERANCE
+
+        self._outcomes = outcomes[significant]
+        self._probabilities = probabilities[significant]
+        self._truncated_probability = max(0.0, 1.0 - float(self._probabilities.sum()))
+        self._probabilities /= self._probabilities.sum()
+
+    @property
+    def order(self) -> int:
+        return self._order
+
+    @property
+    def outcomes(self) -> np.ndarray:
+        return self._outcomes
+
+    @property
+    def probabilities(self) -> np.ndarray:
+        return self._probabilities
+
+    @property
+    def truncated_probability(self) -> float:
+        return self._truncated_probability
+
+    def probability(self, measurement: int) -> float:
+        index = np.searchsorted(self._outcomes, measurement)
+        if index < len(self._outcomes) and self._outcomes[index] == measurement:
+            return float(self._probabilities[index])
+        return 0.0
+
+    def distribution(self) -> Dict[str, float]:
+        return {self._format(int(y)): float(p) for y, p in zip(self._outcomes, self._probabilities)}
+
+    def sample(self, shots: int, seed: Optional[int] = None) -> Dict[int, int]:
+        rng = np.random.default_rng(seed)
+        counts = rng.multinomial(shots, self._probabilities)
+        nonzero = np.flatnonzero(counts)
+        return {int(self._outcomes[i]): int(counts[i]) for i in nonzero}
+
+    def sample_counts(self, shots: int, seed: Optional[int] = None) -> Dict[str, int]:
+        """ return counts formatted like counts of the corresponding circuit executed on Aer """
+        return {self._format(y): count for y, count in self.sample(shots, seed).items()}
+
+    def _format(self, measurement: int) -> str:
+        bits = f'{measurement:0{2 * self._n}b}'
+        return ' '.join(bits) if self._semi_classical else bits
+
+
+def _probabilities(outcomes: np.ndarray, r: int, Q: int) -> np.ndarray:
+    m, rem = divmod(Q, r)
+    denominator = np.sin(np.pi * _phase_fractions(outcomes, r, Q)) ** 2
+    peaks = denominator < 1e-30
+
+    probabilities = np.zeros(len(outcomes))
+    for count, combs in [(m + 1, rem), (m, r - rem)]:
+        if combs == 0:
+            continue
+        numerator = np.sin(np.pi * _phase_fractions(outcomes, r * count, Q)) ** 2
+        geometric = np.divide(numerator, denominator, out=np.full(len(outcomes), float(count ** 2)),
+                              where=~peaks)
+        probabilities += combs * geometric
+
+    return probabilities / (float(Q) ** 2)
+
+
+def _phase_fractions(outcomes: np.ndarray, factor: int, Q: int) -> np.ndarray:
+    """ (factor * y mod Q) / Q for outcomes y """
+    if Q <= MAX_UINT64_REGISTER:
+        # Q is a power of two, so products modulo Q are exact in wrapping uint64 arithmetic
+        phase = (outcomes * np.uint64(factor % Q)) & np.uint64(Q - 1)
+        return phase.astype(np.float64) / Q
+
+    # Python integers, whose division by Q is correctly rounded
+    return np.array([int(y) * factor % Q / Q for y in outcomes], dtype=np.float64)
+
+
+def _peak_windows(r: int, Q: int, max_outcomes: int) -> np.ndarray:
+    half_width = (max_outcomes // r - 1) // 2
+    if half_width < 0:
+        raise ValueError(f'Order r = {r} has more peaks than max_outcomes = {max_outcomes}.')
+
+    centers = np.array([(s * Q + r // 2) // r for s in range(r)], dtype=np.uint64)
+    offsets = np.arange(-half_width, half_width + 1, dtype=np.int64).astype(np.uint64)
+    windows = (centers[:, np.newaxis] + offsets[np.newaxis, :]) & np.uint64(Q - 1)
+    return np.unique(windows.ravel())
+
+
+def _large_peak_windows(r: int, Q: int, max_outcomes: int) -> np.ndarray:
+    """ `_peak_windows` for Q beyond uint64, as a sorted array of Python integers """
+    half_width = (max_outcomes // r - 1) // 2
+    if half_width < 0:
+        raise ValueError(f'Order r = {r} has more peaks than max_outcomes = {max_outcomes}.')
+
+    windows = {((s * Q + r // 2) // r + offset) % Q for s in range(r) for offset in range(-half_width, half_width + 1)}
+    outcomes = np.empty(len(windows), dtype=object)
+    outcomes[:] = sorted(windows)
+    return outcomes
+
+
+class AnalyticQuantumInstance:
+    """ replacement of QuantumInstance sampling order finding circuits from OrderFindingDistribution
+    works for circuits created by `Shor.construct_circuit` with measurement, which carry a, N and circuit type
+    in their metadata; circuits are never simulated, so circuits measuring anything besides the phase register
+    are rejected
+    """
+
+    def __init__(self, shots: int = 1024, seed: Optional[int] = None, max_outcomes: int = MAX_OUTCOMES) -> None:
+        self._run_config = RunConfig(shots=shots, seed_simulator=seed)
+        self._rng = np.random.default_rng(seed)
+        self._max_outcomes = max_outcomes
+        self._distributions: Dict[tuple, OrderFindingDistribution] = {}
+
+    @property
+    def run_config(self) -> RunConfig:
+        return self._run_config
+
+    @property
+    def is_simulator(self) -> bool:
+        return True
+
+    def distribution(self, a: int, N: int, semi_classical: bool = False) -> OrderFindingDistribution:
+        key = (a, N, semi_classical)
+        if key not in self._distributions:
+            self._distributions[key] = OrderFindingDistribution(a, N, semi_classical, self._max_outcomes)
+        return self._distributions[key]
+
+    def execute(self, circuits: Union[QuantumCircuit, List[QuantumCircuit]], had_transpiled: bool = False) -> Result:
+        circuits = circuits if isinstance(circuits, list) else [circuits]
+        shots = self._run_config.shots
+
+        results = []
+        for circuit in circuits:
+            metadata = circuit.metadata or {}
+            if not {'a', 'N', 'semi_classical'} <= set(metadata):
+                raise ValueError(f'Circuit {circuit.name} was not created by Shor.construct_circuit.')
+
+            _validate_registers(circuit, metadata['N'], metadata['semi_classical'])
+            distribution = self.distribution(metadata['a'], metadata['N'], metadata['semi_classical'])
+            counts = distribution.sample(shots, seed=self._rng.integers(2 ** 32))
+            results.append({
+                'shots': shots,
+                'success': True,
+                'data': {'counts': {hex(measurement): count for measurement, count in counts.items()}},
+                'header': {
+                    'name': circuit.name,
+                    'creg_sizes': [[creg.name, creg.size] for creg in circuit.cregs],
+                    'memory_slots': circuit.num_clbits
+                }
+            })
+
+        return Result.from_dict({
+            'backend_name': 'analytic_order_finding',
+            'backend_version': '1.0',
+            'qobj_id': '',
+            'job_id': '',
+            'success': True,
+            'results': results
+        })
+
+
+def _validate_registers(circuit: QuantumCircuit, N: int, semi_classical: bool) -> None:
+    n = N.bit_length()
+    expected = [1] * (2 * n) if semi_classical else [2 * n]
+    sizes = [creg.size for creg in circuit.cregs]
+    if sizes != expected:
+        raise ValueError(f'Circuit {circuit.name} has classical registers of sizes {sizes}, '
+                         f'only the phase register of sizes {expected} can be sampled analytically.')
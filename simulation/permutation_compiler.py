@@ -0,0 +1,144 @@
+from abc import abstractmethod
+from typing import Callable, Dict, List
+
+import numpy as np
+from qiskit import QuantumCircuit, QuantumRegister
+from qiskit.circuit import Gate, Instruction
+from qiskit.quantum_info import Statevector
+
+from gates.beauregard import modular_exponentiation as beauregard_modular_exponentiation
+from gates.haner import modular_exponentiation as haner_modular_exponentiation
+from gates.mix import modular_exponentiation as mix_modular_exponentiation
+from gates.takahashi import modular_exponentiation as takahashi_modular_exponentiation
+from utils.bits import gather_bits, scatter_bits
+from utils.lazy_gate import LazyGate
+
+MODULES = [beauregard_modular_exponentiation, haner_modular_exponentiation, mix_modular_exponentiation,
+           takahashi_modular_exponentiation]
+MULTIPLIERS = tuple(module.ControlledModularMultiplicationGate for module in MODULES)
+# exponentiation gates with builders of their multipliers
+EXPONENTIATIONS: Dict[type, Callable[[int, int, int], Instruction]] = {
+    module.ModularExponentiationGate: module.controlled_modular_multiplication_gate for module in MODULES
+}
+MAX_BITS = 64
+
+
+class PermutationGate(LazyGate):
+    """ black box for a block which permutes basis states of its qubits
+    its definition is the definition of the block, so everything but permutation-aware simulators
+    (`permutation_statevector`, `SparseStatevector`) treats it as the block itself
+    """
+
+    def __init__(self, block: Instruction) -> None:
+        super().__init__(block.name, block.num_qubits)
+        self.block = block
+
+    @abstractmethod
+    def permute(self, values: np.ndarray) -> np.ndarray:
+        """ images of basis states `values` of the qubits of the gate (bit k is qubit k) """
+        pass
+
+    def _build(self) -> QuantumCircuit:
+        return self.block.definition
+
+
+class ModularMultiplicationPermutation(PermutationGate):
+    """ controlled multiplication of register y by `constant` modulo N on qubits [ctrl, y (n), aux]
+    equal to the multiplier on inputs with clean aux and y < N, which are the only ones reachable in Shor circuits;
+    other basis states are left unchanged
+    """
+
+    def __init__(self, block: Instruction) -> None:
+        super().__init__(block)
+        self.constant = block.constant
+        self.N = block.N
+        self.n = block.n
+        if 2 * self.n > MAX_BITS:
+            raise ValueError(f'Products of {self.n}-bit numbers do not fit in {MAX_BITS} bits.')
+
+    def permute(self, values: np.ndarray) -> np.ndarray:
+        y_mask = np.uint64((1 << self.n) - 1)
+        y = (values >> np.uint64(1)) & y_mask
+        active = ((values & np.uint64(1)) == 1) & ((values >> np.uint64(self.n + 1)) == 0) & (y < np.uint64(self.N))
+        product = y * np.uint64(self.constant) % np.uint64(self.N)
+        return np.where(active, (values & ~(y_mask << np.uint64(1))) | (product << np.uint64(1)), values)
+
+
+class _CompiledGate(Gate):
+    """ composite gate with permutation gates in its definition """
+    pass
+
+
+def compile_permutations(circuit: QuantumCircuit) -> QuantumCircuit:
+    """ copy of the circuit with controlled modular multipliers replaced by `ModularMultiplicationPermutation`,
+    also inside modular exponentiation gates, whose multipliers are then never constructed
+    Beauregard's gates with `keep_fourier` are kept, as their register b is not in the computational basis,
+    and so are gates with `approximation_degree`, which only approximate permutations
+    """
+    compiled = QuantumCircuit(*circuit.qregs, *circuit.cregs, name=circuit.name, global_phase=circuit.global_phase)
+    compiled.metadata = circuit.metadata
+    for instruction, qargs, cargs in circuit.data:
+        compiled._append(_compile(instruction), qargs, cargs)
+    return compiled
+
+
+def _compile(instruction: Instruction) -> Instruction:
+    if getattr(instruction, 'keep_fourier', False) or getattr(instruction, 'approximation_degree', None) is not None \
+            or instruction.condition is not None:
+        return instruction
+
+    if isinstance(instruction, MULTIPLIERS):
+        return ModularMultiplicationPermutation(instruction)
+
+    if type(instruction) in EXPONENTIATIONS:
+        multiplier = EXPONENTIATIONS[type(instruction)]
+        constant, N, n = instruction.constant, instruction.N, instruction.n
+        # multipliers with batched windows have more aux qubits
+        options = {'batched_windows': True} if getattr(instruction, 'batched_windows', False) else {}
+        qreg = QuantumRegister(instruction.num_qubits)
+        definition = QuantumCircuit(qreg, name=instruction.name)
+        for i in range(2 * n):
+            definition.append(
+                ModularMultiplicationPermutation(multiplier(pow(constant, pow(2, i), mod=N), N, n, **options)),
+                [qreg[i], *qreg[2 * n:]]
+            )
+        gate = _CompiledGate(instruction.name, instruction.num_qubits, [])
+        gate.definition = definition
+        return gate
+
+    return instruction
+
+
+def permutation_statevector(circuit: QuantumCircuit) -> Statevector:
+    """ state after the circuit applied to |0...0>, final measurements are skipped
+    permutation gates are applied with NumPy fancy indexing in one pass over the statevector,
+    other operations by `Statevector.evolve`
+    """
+    data = np.zeros(pow(2, circuit.num_qubits), dtype=np.complex128)
+    data[0] = 1
+    return Statevector(_evolve(data, circuit, list(range(circuit.num_qubits))))
+
+
+def _evolve(data: np.ndarray, circuit: QuantumCircuit, qubits: List[int]) -> np.ndarray:
+    indices = {qubit: qubits[i] for i, qubit in enumerate(circuit.qubits)}
+    for instruction, qargs, _ in circuit.data:
+        instruction_qubits = [indices[qubit] for qubit in qargs]
+        if instruction.name == 'measure':
+            continue
+        if isinstance(instruction, PermutationGate):
+            data = _permute(data, instruction, instruction_qubits)
+        elif isinstance(instruction, _CompiledGate):
+            data = _evolve(data, instruction.definition, instruction_qubits)
+        else:
+            data = Statevector(data).evolve(instruction, qargs=instruction_qubits).data
+    return data
+
+
+def _permute(data: np.ndarray, gate: PermutationGate, qubits: List[int]) -> np.ndarray:
+    indices = np.arange(len(data), dtype=np.uint64)
+    mask = np.uint64(sum(1 << qubit for qubit in qubits))
+    images = (indices & ~mask) | scatter_bits(gate.permute(gather_bits(indices, qubits)), qubits)
+
+    permuted = np.empty_like(data)
+    permuted[images.astype(np.int64)] = data
+    return permuted
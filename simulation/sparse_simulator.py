@@ -0,0 +1,265 @@
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from qiskit import QuantumCircuit
+from qiskit.assembler.run_config import RunConfig
+from qiskit.circuit import ControlledGate, Instruction
+from qiskit.result import Result
+
+from gates.qft import QFTGate
+from simulation.order_finding_distribution import PROBABILITY_TOLERANCE
+from simulation.permutation_compiler import PermutationGate, compile_permutations
+from utils.bits import gather_bits, scatter_bits
+
+X_GATES = {'x', 'cx', 'ccx', 'mcx'}
+SWAP_GATES = {'swap', 'cswap'}
+PHASE_GATES = {'p', 'cp', 'mcphase'}
+IGNORED_OPERATIONS = {'barrier', 'id'}
+MAX_QUBITS = 64
+
+
+class SparseStatevector:
+    """ state stored as nonzero amplitudes of basis states, as arrays of indices (bit q is qubit q) and amplitudes
+    X, CX, CCX, MCX and (C)SWAP permute indices and phases only scale amplitudes, so arithmetic keeps the number
+    of stored states; Hadamards double it (before equal states are merged) and exact QFT blocks are applied as FFT
+    of the register for every distinct value of the other qubits, so the cost follows the number of states
+    reachable by the circuit instead of 2^num_qubits; `PermutationGate` blocks map the indices directly,
+    approximate QFTs are applied by their definitions
+    """
+
+    def __init__(self, num_qubits: int) -> None:
+        if num_qubits > MAX_QUBITS:
+            raise ValueError(f'Sparse simulation supports at most {MAX_QUBITS} qubits, given {num_qubits}.')
+        self._num_qubits = num_qubits
+        self._indices = np.zeros(1, dtype=np.uint64)
+        self._amplitudes = np.ones(1, dtype=np.complex128)
+
+    @classmethod
+    def from_instruction(cls, circuit: QuantumCircuit) -> 'SparseStatevector':
+        """ state after the circuit applied to |0...0>, final measurements are skipped """
+        state = cls(circuit.num_qubits)
+        state.evolve(circuit, skip_measurements=True)
+        return state
+
+    @property
+    def num_qubits(self) -> int:
+        return self._num_qubits
+
+    @property
+    def indices(self) -> np.ndarray:
+        return self._indices
+
+    @property
+    def amplitudes(self) -> np.ndarray:
+        return self._amplitudes
+
+    def __len__(self) -> int:
+        return len(self._indices)
+
+    def to_dense(self) -> np.ndarray:
+        vector = np.zeros(pow(2, self._num_qubits), dtype=np.complex128)
+        vector[self._indices.astype(np.int64)] = self._amplitudes
+        return vector
+
+    def probabilities(self, qubits: Sequence[int]) -> Dict[int, float]:
+        """ probabilities of values of `qubits` (bit k of a value is qubit `qubits[k]`) """
+        values = gather_bits(self._indices, qubits)
+        outcomes, inverse = np.unique(values, return_inverse=True)
+        probabilities = np.bincount(inverse, weights=np.abs(self._amplitudes) ** 2)
+        return {int(outcome): float(p) for outcome, p in zip(outcomes, probabilities) if p > PROBABILITY_TOLERANCE}
+
+    def evolve(self, circuit: QuantumCircuit, skip_measurements: bool = False) -> None:
+        indices = {qubit: i for i, qubit in enumerate(circuit.qubits)}
+        measured = set()
+        for instruction, qargs, _ in circuit.data:
+            qubits = [indices[qubit] for qubit in qargs]
+            if instruction.name == 'measure' and skip_measurements:
+                measured.update(qubits)
+                continue
+            if measured.intersection(qubits):
+                raise ValueError(f'Operation {instruction.name} follows a measurement of its qubits.')
+            if instruction.condition is not None:
+                raise ValueError(f'Conditioned operation {instruction.name} is not supported.')
+            self._apply(instruction, qubits, [])
+
+    def _apply(self, operation: Instruction, qubits: List[int], controls: List[int]) -> None:
+        name = operation.name
+        if name in IGNORED_OPERATIONS:
+            return
+
+        if name in X_GATES or name in SWAP_GATES or name in PHASE_GATES or name == 'h':
+            own_controls = operation.num_ctrl_qubits if isinstance(operation, ControlledGate) else 0
+            ctrl_state = operation.ctrl_state if own_controls else 0
+            # controls of the operation with |0> control states are flipped around it
+            flipped = [qubits[k] for k in range(own_controls) if not ctrl_state >> k & 1]
+            self._flip(flipped)
+            self._apply_leaf(operation, controls + qubits[:own_controls], qubits[own_controls:])
+            self._flip(flipped)
+        elif isinstance(operation, QFTGate) and operation.approximation_degree is None and not controls:
+            self._fourier(qubits, operation.do_swaps, operation.is_inverse)
+        elif isinstance(operation, PermutationGate) and not controls:
+            values = operation.permute(gather_bits(self._indices, qubits))
+            self._indices = (self._indices & ~_mask(qubits)) | scatter_bits(values, qubits)
+        elif isinstance(operation, ControlledGate) and \
+                operation.ctrl_state == pow(2, operation.num_ctrl_qubits) - 1:
+            num_ctrl_qubits = operation.num_ctrl_qubits
+            self._apply(operation.base_gate, qubits[num_ctrl_qubits:], controls + qubits[:num_ctrl_qubits])
+        elif operation.definition is not None:
+            definition = operation.definition
+            indices = {qubit: qubits[i] for i, qubit in enumerate(definition.qubits)}
+            if definition.global_phase:
+                self._phase(controls, float(definition.global_phase))
+            for instruction, qargs, cargs in definition.data:
+                if cargs or instruction.condition is not None:
+                    raise ValueError(f'Operation {instruction.name} is not supported in sparse simulation.')
+                self._apply(instruction, [indices[qubit] for qubit in qargs], controls)
+        else:
+            raise ValueError(f'Operation {name} is not supported in sparse simulation.')
+
+    def _apply_leaf(self, operation: Instruction, controls: List[int], targets: List[int]) -> None:
+        name = operation.name
+        if name in X_GATES:
+            rows = self._controlled_rows(controls)
+            self._indices[rows] ^= _mask(targets)
+        elif name in SWAP_GATES:
+            first, second = (_bit(target) for target in targets)
+            rows = self._controlled_rows(controls)
+            differ = ((self._indices[rows] & first) > 0) != ((self._indices[rows] & second) > 0)
+            self._indices[rows[differ]] ^= first | second
+        elif name in PHASE_GATES:
+            self._phase(controls + targets, float(operation.params[0]))
+        else:
+            self._hadamard(controls, targets[0])
+
+    def _phase(self, qubits: List[int], angle: float) -> None:
+        rows = self._controlled_rows(qubits)
+        self._amplitudes[rows] *= np.exp(1j * angle)
+
+    def _hadamard(self, controls: List[int], target: int) -> None:
+        rows = self._controlled_rows(controls)
+        bit = _bit(target)
+        indices, amplitudes = self._indices[rows], self._amplitudes[rows] / np.sqrt(2)
+        ones = (indices & bit) > 0
+
+        kept = np.ones(len(self._indices), dtype=bool)
+        kept[rows] = False
+        self._merge(
+            np.concatenate([self._indices[kept], indices & ~bit, indices | bit]),
+            np.concatenate([self._amplitudes[kept], amplitudes, np.where(ones, -amplitudes, amplitudes)])
+        )
+
+    def _fourier(self, qubits: List[int], do_swaps: bool, inverse: bool) -> None:
+        size = pow(2, len(qubits))
+        values = gather_bits(self._indices, qubits)
+        others, groups = np.unique(self._indices & ~_mask(qubits), return_inverse=True)
+        if not do_swaps and inverse:
+            values = _reverse_bits(values, len(qubits))
+
+        # numpy's forward transform has the sign of the inverse QFT
+        dense = np.zeros((len(others), size), dtype=np.complex128)
+        dense[groups, values.astype(np.int64)] = self._amplitudes
+        dense = np.fft.fft(dense, axis=1) / np.sqrt(size) if inverse else np.fft.ifft(dense, axis=1) * np.sqrt(size)
+
+        groups, values = np.nonzero(np.abs(dense) ** 2 > PROBABILITY_TOLERANCE)
+        amplitudes = dense[groups, values]
+        values = values.astype(np.uint64)
+        if not do_swaps and not inverse:
+            values = _reverse_bits(values, len(qubits))
+        self._indices = others[groups] | scatter_bits(values, qubits)
+        self._amplitudes = amplitudes
+
+    def _merge(self, indices: np.ndarray, amplitudes: np.ndarray) -> None:
+        unique, inverse = np.unique(indices, return_inverse=True)
+        merged = np.bincount(inverse, weights=amplitudes.real) + 1j * np.bincount(inverse, weights=amplitudes.imag)
+        nonzero = np.abs(merged) ** 2 > PROBABILITY_TOLERANCE
+        self._indices = unique[nonzero]
+        self._amplitudes = merged[nonzero]
+
+    def _controlled_rows(self, controls: List[int]) -> np.ndarray:
+        mask = _mask(controls)
+        return np.flatnonzero((self._indices & mask) == mask)
+
+    def _flip(self, qubits: List[int]) -> None:
+        if qubits:
+            self._indices ^= _mask(qubits)
+
+
+class SparseQuantumInstance:
+    """ replacement of QuantumInstance sampling circuits with final measurements from `SparseStatevector`
+    suited for full circuits created by `Shor.construct_circuit`, whose arithmetic only permutes basis states
+    with `permutations`, modular multipliers are compiled by `compile_permutations` and applied in one step
+    """
+
+    def __init__(self, shots: int = 1024, seed: Optional[int] = None, permutations: bool = True) -> None:
+        self._run_config = RunConfig(shots=shots, seed_simulator=seed)
+        self._rng = np.random.default_rng(seed)
+        self._permutations = permutations
+
+    @property
+    def run_config(self) -> RunConfig:
+        return self._run_config
+
+    @property
+    def is_simulator(self) -> bool:
+        return True
+
+    def execute(self, circuits: Union[QuantumCircuit, List[QuantumCircuit]], had_transpiled: bool = False) -> Result:
+        circuits = circuits if isinstance(circuits, list) else [circuits]
+        shots = self._run_config.shots
+
+        results = []
+        for circuit in circuits:
+            qubits, clbits = _final_measurements(circuit)
+            compiled = compile_permutations(circuit) if self._permutations else circuit
+            distribution = SparseStatevector.from_instruction(compiled).probabilities(qubits)
+            outcomes = list(distribution)
+            probabilities = np.array([distribution[outcome] for outcome in outcomes])
+            samples = self._rng.multinomial(shots, probabilities / probabilities.sum())
+
+            counts = {}
+            for outcome, count in zip(outcomes, samples):
+                if count:
+                    memory = sum(1 << clbit for k, clbit in enumerate(clbits) if outcome >> k & 1)
+                    counts[hex(memory)] = int(count)
+            results.append({
+                'shots': shots,
+                'success': True,
+                'data': {'counts': counts},
+                'header': {
+                    'name': circuit.name,
+                    'creg_sizes': [[creg.name, creg.size] for creg in circuit.cregs],
+                    'memory_slots': circuit.num_clbits
+                }
+            })
+
+        return Result.from_dict({
+            'backend_name': 'sparse_statevector',
+            'backend_version': '1.0',
+            'qobj_id': '',
+            'job_id': '',
+            'success': True,
+            'results': results
+        })
+
+
+def _final_measurements(circuit: QuantumCircuit) -> Tuple[List[int], List[int]]:
+    qubit_indices = {qubit: i for i, qubit in enumerate(circuit.qubits)}
+    clbit_indices = {clbit: i for i, clbit in enumerate(circuit.clbits)}
+    measurements = [(qubit_indices[qargs[0]], clbit_indices[cargs[0]])
+                    for instruction, qargs, cargs in circuit.data if instruction.name == 'measure']
+    return [qubit for qubit, _ in measurements], [clbit for _, clbit in measurements]
+
+
+def _bit(qubit: int) -> np.uint64:
+    return np.uint64(1) << np.uint64(qubit)
+
+
+def _mask(qubits: Sequence[int]) -> np.uint64:
+    mask = np.uint64(0)
+    for qubit in qubits:
+        mask |= _bit(qubit)
+    return mask
+
+
+def _reverse_bits(values: np.ndarray, width: int) -> np.ndarray:
+    return gather_bits(values, list(reversed(range(width))))
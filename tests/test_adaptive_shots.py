@@ -0,0 +1,65 @@
+import unittest
+
+from qiskit import Aer
+from qiskit.utils import QuantumInstance
+
+from implementations.mix import MixShor
+from implementations.shor import miss_probability
+from simulation.order_finding_distribution import AnalyticQuantumInstance
+
+
+class TestAdaptiveShots(unittest.TestCase):
+
+    def test_stops_after_order_is_found(self):
+        quantum_instance = AnalyticQuantumInstance(shots=1024, seed=0)
+        result = MixShor(quantum_instance, batch_shots=8).get_order(7, 15)
+
+        self.assertEqual(result.order, 4)
+        self.assertLessEqual(result.total_shots, 32)
+        self.assertEqual(result.total_shots % 8, 0)
+        self.assertEqual(result.required_shots, result.total_shots)
+        self.assertEqual(quantum_instance.run_config.shots, 1024)
+
+    def test_spends_at_most_all_shots(self):
+        # post-processing never succeeds, so batches run until the budget is spent
+        quantum_instance = AnalyticQuantumInstance(shots=20, seed=0)
+        shor = MixShor(quantum_instance, batch_shots=8)
+        shor._reconstruct_order = lambda measurements, a, N: (None, None)
+
+        result = shor.get_order(4, 15)
+
+        self.assertIsNone(result.order)
+        self.assertIsNone(result.required_shots)
+        self.assertEqual(result.total_shots, 20)
+
+    def test_stops_at_confidence(self):
+        quantum_instance = AnalyticQuantumInstance(shots=1024, seed=0)
+        shor = MixShor(quantum_instance, batch_shots=8, confidence=0.9)
+        shor._reconstruct_order = lambda measurements, a, N: (None, None)
+
+        result = shor.get_order(4, 15)
+
+        self.assertIsNone(result.order)
+        self.assertLessEqual(miss_probability(result.total_shots, 15), 0.1)
+        self.assertGreater(miss_probability(result.total_shots - 8, 15), 0.1)
+
+    def test_miss_probability(self):
+        # phi(r) / r is at least 1 / 3 for r < 15 (r = 6)
+        self.assertAlmostEqual(miss_probability(1, 15), 1 - 4 / 3 / 3.141592653589793 ** 2)
+        self.assertLess(miss_probability(64, 2 ** 20 + 7), miss_probability(32, 2 ** 20 + 7))
+
+    def test_batches_use_different_seeds(self):
+        quantum_instance = QuantumInstance(Aer.get_backend('qasm_simulator'), shots=64, seed_simulator=3)
+        shor = MixShor(quantum_instance, batch_shots=1)
+
+        result = shor.get_order(7, 15, semi_classical=True)
+
+        self.assertEqual(result.order, 4)
+        self.assertEqual(quantum_instance.run_config.shots, 64)
+        self.assertEqual(quantum_instance.run_config.seed_simulator, 3)
+
+    def test_invalid_batch_shots(self):
+        with self.assertRaises(ValueError):
+            MixShor(batch_shots=0)
+        with self.assertRaises(ValueError):
+            MixShor(batch_shots=8, confidence=1)
@@ -0,0 +1,48 @@
+import unittest
+
+import numpy as np
+from ddt import ddt, idata, unpack
+
+from gates.beauregard.constant_adder import angle_table, get_angles, partial_constant_angles
+
+
+def reference_angles(constant, n):
+    bits = bin(constant)[2:].zfill(n)[::-1]
+    angles = np.zeros(n)
+    for i in range(n):
+        for j in range(i + 1):
+            if bits[j] == '1':
+                angles[i] += pow(2, -(i - j))
+    return angles * np.pi
+
+
+@ddt
+class TestAngles(unittest.TestCase):
+
+    @idata([[constant, n] for n in [1, 4, 7] for constant in range(pow(2, n) + 3)])
+    @unpack
+    def test_get_angles(self, constant, n):
+        np.testing.assert_array_equal(get_angles(constant, n), reference_angles(constant, n))
+
+    def test_table(self):
+        constants = [3, 250, 1021, 4093]
+        table = angle_table(constants, 13)
+
+        self.assertEqual(table.shape, (4, 13))
+        for row, constant in zip(table, constants):
+            np.testing.assert_array_equal(row, reference_angles(constant, 13))
+
+    def test_big_constants(self):
+        constant = pow(2, 100) - 105
+        np.testing.assert_allclose(angle_table([constant], 101)[0], reference_angles(constant, 101))
+
+    @idata([False, True])
+    def test_partial_constants(self, complement):
+        N, n = 21, 5
+        table = partial_constant_angles(8, N, n, n + 1, complement)
+
+        for i, row in enumerate(table):
+            partial_constant = (pow(2, i) * 8) % N
+            expected = N - partial_constant if complement else partial_constant
+            np.testing.assert_array_equal(row, get_angles(expected, n + 1))
+        self.assertFalse(table.flags.writeable)
@@ -0,0 +1,89 @@
+import unittest
+
+import numpy as np
+from ddt import ddt, idata, unpack
+from qiskit.circuit.library import QFT
+from qiskit.quantum_info import Operator, Statevector
+
+from gates.beauregard.constant_adder import angle_table
+from gates.qft import iqft_gate, qft_gate, qft_gate_resources
+from implementations.beauregard import BeauregardShor
+from implementations.haner import HanerShor
+from implementations.mix import MixShor
+from implementations.takahashi import TakahashiShor
+from simulation.approximation import approximation_report
+from simulation.order_finding_distribution import PROBABILITY_TOLERANCE
+from simulation.sparse_simulator import SparseQuantumInstance, SparseStatevector
+from utils.resources import circuit_resources
+
+implementations_list = [MixShor, BeauregardShor, TakahashiShor, HanerShor]
+
+
+@ddt
+class TestApproximation(unittest.TestCase):
+
+    @idata([[m, degree] for m in range(2, 7) for degree in range(1, 6)])
+    @unpack
+    def test_qft(self, m, degree):
+        expected = QFT(m, approximation_degree=max(0, m - 1 - degree), do_swaps=False)
+
+        self.assertTrue(Operator(qft_gate(m, approximation_degree=degree)).equiv(Operator(expected)))
+        self.assertTrue(Operator(iqft_gate(m, approximation_degree=degree)).equiv(Operator(expected.inverse())))
+        self.assertEqual(qft_gate_resources(m, approximation_degree=degree),
+                         circuit_resources(qft_gate(m, approximation_degree=degree)))
+
+    def test_exact_degree(self):
+        self.assertIsNone(qft_gate(4, approximation_degree=3).approximation_degree)
+        self.assertEqual(qft_gate(4, approximation_degree=2).approximation_degree, 2)
+        self.assertEqual(qft_gate(4, approximation_degree=2).inverse().approximation_degree, 2)
+
+    @idata([1, 2, 3])
+    def test_angles(self, degree):
+        constants = list(range(64))
+        table = angle_table(constants, 6, degree)
+        for constant, row in zip(constants, table):
+            expected = [np.pi * sum((constant >> j & 1) / pow(2, i - j) for j in range(max(0, i - degree), i + 1))
+                        for i in range(6)]
+            np.testing.assert_allclose(row, expected)
+
+    @idata([[shor_class, semi_classical] for shor_class in implementations_list for semi_classical in [False, True]])
+    @unpack
+    def test_resources(self, shor_class, semi_classical):
+        shor = shor_class(approximation_degree=2)
+
+        self.assertEqual(shor.estimate_resources(15, semi_classical, 7),
+                         circuit_resources(shor.construct_circuit(7, 15, semi_classical)))
+
+    @idata(implementations_list)
+    def test_same_state(self, shor_class):
+        circuit = shor_class(approximation_degree=2).construct_circuit(7, 15, measurement=False)
+
+        # amplitudes of approximate circuits may stay below the tolerance, sparse states drop them
+        np.testing.assert_allclose(SparseStatevector.from_instruction(circuit).to_dense(),
+                                   Statevector.from_instruction(circuit).data, atol=np.sqrt(PROBABILITY_TOLERANCE))
+
+    @idata([[shor_class, semi_classical] for shor_class in implementations_list for semi_classical in [False, True]])
+    @unpack
+    def test_report(self, shor_class, semi_classical):
+        exact, approximate, unchanged = approximation_report(shor_class, 15, [None, 3, 7], 7, semi_classical)
+
+        self.assertLess(approximate.rotations, exact.rotations)
+        self.assertEqual(unchanged.resources, exact.resources)
+        self.assertAlmostEqual(unchanged.success_probability, exact.success_probability)
+        self.assertGreater(approximate.success_probability, 0.5)
+
+    def test_report_without_simulation(self):
+        exact, approximate = approximation_report(MixShor, 32767, [None, 4])
+
+        self.assertIsNone(approximate.success_probability)
+        self.assertLess(approximate.rotations, exact.rotations)
+
+    @idata(implementations_list)
+    def test_getting_order(self, shor_class):
+        shor = shor_class(SparseQuantumInstance(shots=128, seed=0), approximation_degree=3)
+
+        self.assertEqual(shor.get_order(7, 15).order, 4)
+
+    def test_validation(self):
+        with self.assertRaises(ValueError):
+            MixShor(approximation_degree=0)
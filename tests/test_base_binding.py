@@ -0,0 +1,110 @@
+import unittest
+from unittest.mock import patch
+
+from ddt import ddt, idata, unpack
+from qiskit import Aer, QuantumCircuit
+from qiskit.quantum_info import Operator
+from qiskit.utils import QuantumInstance
+
+import gates.beauregard.modular_exponentiation as beauregard
+import gates.mix.comparator as mix_comparator
+import gates.mix.modular_exponentiation as mix
+import gates.takahashi.comparator as takahashi_comparator
+import gates.takahashi.modular_exponentiation as takahashi
+from implementations.beauregard import BeauregardShor
+from implementations.haner import HanerShor
+from implementations.mix import MixShor
+from implementations.takahashi import TakahashiShor
+from utils.parameters import bind_by_name, simplify_bound_phases
+from utils.resources import circuit_resources
+
+implementations_list = [MixShor, BeauregardShor, TakahashiShor]
+gate_modules = [mix, beauregard, takahashi]
+circuit_types = [False, True]
+
+
+@ddt
+class TestBaseBinding(unittest.TestCase):
+
+    @idata([
+        [module, a_v]
+        for module in gate_modules
+        for a_v in [2, 3, 4]
+    ])
+    @unpack
+    def test_bound_multiplier_equals_multiplier(self, module, a_v):
+        n_v, N_v = 3, 5
+        expected = module.controlled_modular_multiplication_gate(a_v, N_v, n_v)
+
+        gate = module.parameterized_controlled_modular_multiplication_gate(N_v, n_v, 'm')
+        circuit = QuantumCircuit(gate.num_qubits)
+        circuit.append(gate, circuit.qubits)
+        bound = bind_by_name(circuit, module.controlled_modular_multiplication_parameters(a_v, N_v, n_v, 'm'))
+
+        self.assertTrue(Operator(bound).equiv(Operator(expected)))
+
+    @idata([
+        [module, constant]
+        for module in [mix_comparator, takahashi_comparator]
+        for constant in range(8)
+    ])
+    @unpack
+    def test_bound_comparator_has_gates_of_comparator(self, module, constant):
+        n_v = 3
+        expected = module.double_controlled_comparator(constant, n_v)
+
+        gate = module.parameterized_double_controlled_comparator(n_v, 'c')
+        circuit = QuantumCircuit(gate.num_qubits)
+        circuit.append(gate, circuit.qubits)
+        bound = simplify_bound_phases(
+            bind_by_name(circuit, module.double_controlled_comparator_parameters(constant, n_v, 'c')))
+
+        self.assertEqual(circuit_resources(bound).gates, circuit_resources(expected).gates)
+        self.assertTrue(Operator(bound).equiv(Operator(expected)))
+
+    @idata([MixShor, TakahashiShor])
+    def test_bound_circuit_keeps_no_phase_flips(self, shor_class):
+        shor = shor_class()
+        bound = shor.bind_circuit(shor.construct_circuit(None, 15, semi_classical=True), 7)
+
+        self.assertNotIn('mcphase', circuit_resources(bound).gates)
+
+    @idata([
+        [shor_class, semi]
+        for shor_class in implementations_list
+        for semi in circuit_types
+    ])
+    @unpack
+    def test_get_order_transpiles_once(self, shor_class, semi):
+        quantum_instance = QuantumInstance(Aer.get_backend('qasm_simulator'), shots=128,
+                                           seed_simulator=1, seed_transpiler=1)
+        shor = shor_class(quantum_instance, bind_bases=True)
+
+        with patch.object(QuantumInstance, 'transpile', wraps=quantum_instance.transpile) as transpile:
+            orders = [shor.get_order(a_v, 15, semi).order for a_v in [2, 11]]
+
+        self.assertEqual(orders, [4, 2])
+        self.assertEqual(transpile.call_count, 1)
+
+    def test_bound_circuit_metadata(self):
+        shor = MixShor()
+        circuit = shor.bind_circuit(shor.construct_circuit(None, 15, semi_classical=True), 7)
+
+        self.assertEqual(circuit.metadata, {'a': 7, 'N': 15, 'semi_classical': True})
+        self.assertEqual(circuit.name, 'Mix Shor(a=7, N=15) (semi-classical QFT)')
+        self.assertEqual(len(circuit.parameters), 0)
+
+    def test_unsupported_implementation(self):
+        with self.assertRaises(ValueError):
+            HanerShor(bind_bases=True)
+
+        shor = HanerShor()
+        with self.assertRaises(ValueError):
+            shor.bind_bases = True
+        self.assertFalse(shor.bind_bases)
+
+    def test_setter_with_known_input(self):
+        shor = MixShor(known_input=True)
+
+        with self.assertRaises(ValueError):
+            shor.bind_bases = True
@@ -0,0 +1,48 @@
+import unittest
+
+from qiskit import Aer
+from qiskit.utils import QuantumInstance
+
+from implementations.haner import HanerShor
+from implementations.mix import MixShor
+from simulation.order_finding_distribution import AnalyticQuantumInstance, multiplicative_order
+
+PAIRS = [(2, 15), (7, 15), (2, 21), (5, 21), (2, 15)]
+
+
+class TestBatchExecution(unittest.TestCase):
+
+    def test_orders(self):
+        results = MixShor(AnalyticQuantumInstance(shots=64, seed=0)).get_orders(PAIRS)
+
+        self.assertEqual([result.order for result in results], [multiplicative_order(a, N) for a, N in PAIRS])
+        self.assertTrue(all(result.total_shots == 64 for result in results))
+
+    def test_single_job(self):
+        quantum_instance = AnalyticQuantumInstance(shots=64, seed=0)
+        executed = []
+        execute = quantum_instance.execute
+        quantum_instance.execute = lambda circuits, had_transpiled=False: executed.append(len(circuits)) or \
+            execute(circuits, had_transpiled)
+
+        MixShor(quantum_instance).get_orders(PAIRS)
+
+        self.assertEqual(executed, [len(PAIRS)])
+
+    def test_batches_skip_found_orders(self):
+        quantum_instance = AnalyticQuantumInstance(shots=1024, seed=0)
+        results = MixShor(quantum_instance, batch_shots=8).get_orders(PAIRS)
+
+        self.assertEqual([result.order for result in results], [multiplicative_order(a, N) for a, N in PAIRS])
+        self.assertTrue(all(result.total_shots < 1024 for result in results))
+        self.assertEqual(quantum_instance.run_config.shots, 1024)
+
+    def test_circuits_built_in_processes(self):
+        shor = HanerShor(QuantumInstance(Aer.get_backend('qasm_simulator'), shots=64, seed_simulator=0))
+        factors = shor.factor_many([(2, 15), (7, 15)], semi_classical=True, processes=2)
+
+        self.assertEqual(factors, [(5, 3), (5, 3)])
+
+    def test_invalid_pair(self):
+        with self.assertRaises(ValueError):
+            MixShor(AnalyticQuantumInstance()).get_orders([(2, 15), (3, 15)])
@@ -0,0 +1,122 @@
+import unittest
+
+from ddt import ddt, idata, unpack
+from qiskit import QuantumCircuit
+
+import gates.mix.modular_exponentiation as mix
+import gates.takahashi.modular_exponentiation as takahashi
+from gates.batched_product_sum import batch_register_size
+from implementations.mix import MixShor
+from implementations.takahashi import TakahashiShor
+from simulation.sparse_simulator import SparseQuantumInstance, SparseStatevector
+from utils.parameters import bind_by_name
+from utils.resources import circuit_resources
+
+implementations_list = [MixShor, TakahashiShor]
+gate_modules = [mix, takahashi]
+circuit_types = [False, True]
+
+
+def _multiplier_outputs(gate, ctrl: int, y: int):
+    circuit = QuantumCircuit(gate.num_qubits)
+    if ctrl:
+        circuit.x(0)
+    for i in range(y.bit_length()):
+        if y >> i & 1:
+            circuit.x(1 + i)
+    circuit.append(gate, circuit.qubits)
+    return SparseStatevector.from_instruction(circuit).probabilities(range(gate.num_qubits))
+
+
+@ddt
+class TestBatchedWindows(unittest.TestCase):
+
+    @idata([
+        [module, a_v, y_v]
+        for module in gate_modules
+        for a_v in [2, 7, 11]
+        for y_v in [0, 1, 6, 14]
+    ])
+    @unpack
+    def test_same_products_as_adders(self, module, a_v, y_v):
+        N_v, n_v = 15, 4
+        gate = module.controlled_modular_multiplication_gate(a_v, N_v, n_v, batched_windows=True)
+        expected_gate = module.controlled_modular_multiplication_gate(a_v, N_v, n_v)
+
+        for ctrl in [0, 1]:
+            outputs = _multiplier_outputs(gate, ctrl, y_v)
+            expected = _multiplier_outputs(expected_gate, ctrl, y_v)
+
+            # aux qubits (including those of the batch register) are clean in both
+            self.assertEqual(list(outputs), list(expected))
+            self.assertEqual(list(outputs), [ctrl | (y_v * a_v % N_v if ctrl else y_v) << 1])
+            self.assertAlmostEqual(outputs[list(outputs)[0]], 1)
+
+    @idata(gate_modules)
+    def test_bound_multiplier_equals_multiplier(self, module):
+        N_v, n_v, a_v = 21, 5, 8
+        gate = module.parameterized_controlled_modular_multiplication_gate(N_v, n_v, 'm', batched_windows=True)
+        circuit = QuantumCircuit(gate.num_qubits)
+        circuit.append(gate, circuit.qubits)
+        parameters = module.controlled_modular_multiplication_parameters(a_v, N_v, n_v, 'm', batched_windows=True)
+        bound = bind_by_name(circuit, parameters).to_gate()
+
+        for y_v in [1, 5, 20]:
+            self.assertEqual(list(_multiplier_outputs(bound, 1, y_v)), [1 | (y_v * a_v % N_v) << 1])
+
+    @idata(implementations_list)
+    def test_same_distribution(self, shor_class):
+        expected = shor_class().construct_circuit(7, 15, measurement=False)
+        circuit = shor_class(batched_windows=True).construct_circuit(7, 15, measurement=False)
+
+        distribution = SparseStatevector.from_instruction(circuit).probabilities(range(8))
+        expected_distribution = SparseStatevector.from_instruction(expected).probabilities(range(8))
+        self.assertEqual(sorted(distribution), sorted(expected_distribution))
+        for outcome, probability in expected_distribution.items():
+            self.assertAlmostEqual(distribution[outcome], probability)
+
+    @idata(implementations_list)
+    def test_getting_order(self, shor_class):
+        # without permutations, so that the batched arithmetic is simulated
+        shor = shor_class(SparseQuantumInstance(shots=128, seed=0, permutations=False), batched_windows=True)
+
+        self.assertEqual(shor.get_order(7, 15).order, 4)
+
+    @idata([
+        [shor_class, a_v, semi]
+        for shor_class in implementations_list
+        for a_v in [None, 2, 7]
+        for semi in circuit_types
+    ])
+    @unpack
+    def test_estimate_matches_constructed_circuit(self, shor_class, a_v, semi):
+        shor = shor_class(batched_windows=True)
+        circuit = shor.construct_circuit(a_v, 15, semi)
+
+        self.assertEqual(shor.estimate_resources(15, semi, a_v), circuit_resources(circuit))
+
+    @idata(implementations_list)
+    def test_resource_comparison(self, shor_class):
+        # one window per product sum pays off for larger n, where n windows of the adders dominate
+        N_v = pow(2, 31) + 11
+        expected = shor_class().estimate_resources(N_v)
+        resources = shor_class(batched_windows=True).estimate_resources(N_v)
+
+        self.assertEqual(resources.num_qubits - expected.num_qubits, batch_register_size(32))
+        self.assertLess(resources.gates['cp'], expected.gates['cp'])
+        self.assertLess(resources.gates['ccx'], expected.gates['ccx'])
+        self.assertLess(resources.size, expected.size)
+
+    @idata([
+        [module, n_v, N_v, fewer]
+        for module in gate_modules
+        for n_v, fewer in [(4, False), (8, False), (11, True), (16, True)]
+        for N_v in [pow(2, n_v - 1) + 1, pow(2, n_v) - 1]
+    ])
+    @unpack
+    def test_resource_crossover(self, module, n_v, N_v, fewer):
+        # m comparisons of n + m bits cost more than they save until n = 11, whatever N is
+        expected = module.modular_exponentiation_gate_resources(None, N_v, n_v)
+        resources = module.modular_exponentiation_gate_resources(None, N_v, n_v, batched_windows=True)
+
+        self.assertEqual(resources.size < expected.size, fewer)
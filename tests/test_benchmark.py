@@ -0,0 +1,68 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from ddt import ddt, idata, unpack
+from qiskit.providers.aer import __version__ as aer_version
+
+from utils.benchmark import GATE_BUILDERS, Regression, benchmark_gates, benchmark_implementations, compare, \
+    compare_modes, load_results, modulus, save_results
+from utils.gate_cache import gate_cache
+
+
+@ddt
+class TestBenchmark(unittest.TestCase):
+
+    @idata([(4, 15), (5, 21), (6, 33), (7, 65), (16, 32773), (40, 549755813891)])
+    @unpack
+    def test_modulus(self, n, N):
+        self.assertEqual(modulus(n), N)
+
+    def test_gates(self):
+        results = benchmark_gates([4], repeat=1)
+
+        self.assertEqual(len(results), len(GATE_BUILDERS))
+        self.assertTrue(all(metrics['construction_time'] > 0 for metrics in results.values()))
+        self.assertTrue(gate_cache.enabled)
+
+    def test_implementation(self):
+        results = benchmark_implementations(['mix'], [4], [True], shots=8, isolate=False)
+        metrics = results['shor/mix/semi-classical/n=4']
+
+        self.assertEqual(metrics['num_qubits'], 2 * 4 + 2)
+        self.assertGreater(metrics['simulation_time'], 0)
+        self.assertGreater(metrics['peak_memory'], 0)
+
+    def test_modes(self):
+        results = benchmark_implementations(['mix'], [4], [False], simulate=False, isolate=False, modes=[False, True])
+        comparison = compare_modes(results)
+
+        self.assertEqual(list(comparison), ['shor/mix/full/n=4'])
+        differences = comparison['shor/mix/full/n=4']
+        self.assertEqual(set(differences), {'construction_time', 'transpile_time', 'total_time'})
+        self.assertAlmostEqual(differences['total_time'],
+                               differences['construction_time'] + differences['transpile_time'])
+
+    def test_compare(self):
+        baseline = {'case': {'size': 100, 'construction_time': 1.0, 'peak_memory': 100.0}}
+        results = {'case': {'size': 101, 'construction_time': 1.2, 'peak_memory': 130.0},
+                   'new case': {'size': 1}}
+
+        self.assertEqual(compare(results, baseline), [
+            Regression('case', 'size', 100, 101),
+            Regression('case', 'peak_memory', 100.0, 130.0)
+        ])
+        self.assertEqual(compare(results, baseline, time_tolerance=0.1, memory_tolerance=0.5), [
+            Regression('case', 'size', 100, 101),
+            Regression('case', 'construction_time', 1.0, 1.2)
+        ])
+
+    def test_saved_results(self):
+        results = {'case': {'size': 100, 'construction_time': 1.0}}
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / 'baseline.json'
+            save_results(path, results)
+            self.assertEqual(load_results(path), results)
+            with open(path) as file:
+                self.assertEqual(json.load(file)['qiskit-aer'], aer_version)
@@ -0,0 +1,85 @@
+import unittest
+
+from ddt import ddt, idata, unpack
+from qiskit import QuantumCircuit
+
+from implementations.beauregard import BeauregardShor
+from implementations.haner import HanerShor
+from implementations.mix import MixShor
+from implementations.takahashi import TakahashiShor
+from simulation.branching_simulator import BranchingQuantumInstance
+from simulation.order_finding_distribution import OrderFindingDistribution
+
+implementations_list = [MixShor, BeauregardShor, TakahashiShor, HanerShor]
+
+
+@ddt
+class TestBranchingSimulator(unittest.TestCase):
+
+    @idata([(15, 7), (21, 2), (33, 5), (35, 3)])
+    @unpack
+    def test_exact_distribution(self, n_v, a_v):
+        circuit = MixShor().construct_circuit(a_v, n_v, semi_classical=True)
+        distribution = BranchingQuantumInstance().outcome_distribution(circuit)
+        expected = OrderFindingDistribution(a_v, n_v, semi_classical=True).distribution()
+
+        self.assertAlmostEqual(sum(distribution.values()), 1.0)
+        for outcome in set(distribution) | set(expected):
+            self.assertAlmostEqual(distribution.get(outcome, 0.0), expected.get(outcome, 0.0), places=10)
+
+    @idata([
+        [shor_class, options]
+        for shor_class in implementations_list
+        for options in [{}, {'known_input': True}, {'approximation_degree': 9}]
+    ])
+    @unpack
+    def test_getting_order(self, shor_class, options):
+        shor = shor_class(BranchingQuantumInstance(shots=128, seed=0), **options)
+
+        self.assertEqual(shor.get_order(7, 15, semi_classical=True).order, 4)
+        self.assertEqual(shor.get_order(2, 21, semi_classical=True).order, 6)
+
+    def test_shots(self):
+        circuit = TakahashiShor().construct_circuit(2, 21, semi_classical=True)
+        result = BranchingQuantumInstance(shots=1000, seed=0).execute(circuit)
+
+        self.assertEqual(sum(result.get_counts(0).values()), 1000)
+
+    def test_fourier_aux(self):
+        circuit = BeauregardShor(keep_fourier=True).construct_circuit(2, 21, semi_classical=True)
+        distribution = BranchingQuantumInstance().outcome_distribution(circuit)
+        expected = OrderFindingDistribution(2, 21, semi_classical=True).distribution()
+
+        for outcome, probability in expected.items():
+            self.assertAlmostEqual(distribution.get(outcome, 0.0), probability, places=10)
+
+    def test_unsupported_circuits(self):
+        instance = BranchingQuantumInstance()
+        with self.assertRaises(ValueError):
+            instance.execute(MixShor().construct_circuit(7, 15))
+        with self.assertRaises(ValueError):
+            instance.execute(MixShor(flat=True).construct_circuit(7, 15, semi_classical=True))
+
+    def test_unknown_operations(self):
+        # the first two multipliers are by 2^512 = 4 and 2^256 = 16 modulo 21
+        circuit = MixShor().construct_circuit(2, 21, semi_classical=True)
+        indices = [i for i, (instruction, _, _) in enumerate(circuit.data) if instruction.num_qubits > 1]
+
+        swapped = circuit.copy()
+        swapped.data[indices[0]], swapped.data[indices[1]] = circuit.data[indices[1]], circuit.data[indices[0]]
+        with self.assertRaises(ValueError):
+            BranchingQuantumInstance().outcome_distribution(swapped)
+
+        instruction, qargs, cargs = circuit.data[indices[0]]
+        replaced = circuit.copy()
+        replaced.data[indices[0]] = (QuantumCircuit(instruction.num_qubits, name='other').to_gate(), qargs, cargs)
+        with self.assertRaises(ValueError):
+            BranchingQuantumInstance().outcome_distribution(replaced)
+
+    @idata([{'approximation_degree': 2}, {'batched_windows': True}])
+    def test_inexact_multipliers(self, options):
+        circuit = MixShor(**options).construct_circuit(7, 15, semi_classical=True)
+
+        with self.assertRaises(ValueError):
+            BranchingQuantumInstance().outcome_distribution(circuit)
+        self.assertGreater(len(BranchingQuantumInstance(assume_exact=True).outcome_distribution(circuit)), 0)
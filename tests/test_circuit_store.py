@@ -0,0 +1,68 @@
+import pickle
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from qiskit import Aer
+from qiskit.utils import QuantumInstance
+
+from implementations.mix import MixShor
+from utils.circuit_store import CircuitStore, CircuitKey
+from utils.prebuild_circuits import prebuild
+
+
+class TestCircuitStore(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = CircuitStore(self.directory.name)
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def test_missing_and_corrupted_entries(self):
+        key = CircuitKey('MixShor', 7, 15, False, True, None)
+        self.assertIsNone(self.store.load(key))
+
+        self.store.save(key, MixShor().construct_circuit(7, 15))
+        with open(self.store._path(key), 'wb') as file:
+            file.write(b'corrupted')
+
+        self.assertIsNone(self.store.load(key))
+
+        with open(self.store._path(key), 'wb') as file:
+            pickle.dump(['not', 'an', 'entry'], file)
+
+        self.assertIsNone(self.store.load(key))
+
+    def test_construct_circuit_uses_store(self):
+        circuit = MixShor(circuit_store=self.store).construct_circuit(7, 15)
+        self.assertEqual(len(self.store), 1)
+
+        with patch.object(MixShor, '_construct_circuit', side_effect=AssertionError):
+            stored = MixShor(circuit_store=self.store).construct_circuit(7, 15)
+
+        self.assertEqual(stored, circuit)
+        self.assertEqual(stored.metadata, circuit.metadata)
+
+    def test_get_order_uses_transpiled_circuit(self):
+        instance = QuantumInstance(Aer.get_backend('qasm_simulator'), shots=64)
+        self.assertEqual(MixShor(instance, self.store).get_order(7, 15).order, 4)
+        self.assertEqual(len(self.store), 2)
+
+        with patch.object(QuantumInstance, 'transpile', side_effect=AssertionError):
+            self.assertEqual(MixShor(instance, self.store).get_order(7, 15).order, 4)
+
+    def test_prebuild_skips_invalid_pairs(self):
+        tasks = prebuild(self.directory.name, ['mix'], [15], [2, 5, 7], [False], processes=2)
+
+        self.assertEqual(tasks, [('mix', 2, 15, False), ('mix', 7, 15, False)])
+        self.assertEqual(len(self.store), 2)
+
+    def test_prebuild_with_options(self):
+        tasks = prebuild(self.directory.name, ['mix'], [15], [2, 7], [True], options={'bind_bases': True, 'flat': True})
+        self.assertEqual(tasks, [('mix', None, 15, True)])
+
+        with patch.object(MixShor, '_construct_circuit_with_semiclassical_QFT', side_effect=AssertionError):
+            circuit = MixShor(circuit_store=self.store, bind_bases=True, flat=True).construct_circuit(None, 15, True)
+        self.assertEqual(circuit.metadata['N'], 15)
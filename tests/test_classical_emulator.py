@@ -0,0 +1,103 @@
+import unittest
+
+import numpy as np
+from ddt import ddt, idata, unpack
+
+from gates.haner.adder import adder, adder_regs
+from gates.haner.carry import carry, carry_regs
+from gates.haner.comparator import comparator, comparator_regs, double_controlled_comparator, \
+    double_controlled_comparator_regs
+from gates.haner.constant_adder import controlled_constant_adder, controlled_constant_adder_regs
+from gates.haner.constant_modulo_adder import double_controlled_constant_modulo_adder, \
+    double_controlled_constant_modulo_adder_regs
+from gates.haner.incrementer import incrementer, incrementer_regs
+from gates.haner.modular_exponentiation import controlled_modular_multiplication_gate, \
+    controlled_modular_multiplication_gate_regs
+from gates.mix.comparator import double_controlled_comparator as mix_comparator
+from gates.qft import qft_gate
+from gates.takahashi.comparator import double_controlled_comparator as takahashi_comparator
+from simulation.classical_emulator import ClassicalEmulator
+
+n = 4
+values = np.arange(2 ** n)
+
+
+@ddt
+class TestClassicalEmulator(unittest.TestCase):
+
+    def test_adder(self):
+        x, y = np.meshgrid(values, values)
+        result = ClassicalEmulator(adder(n), adder_regs(n)).run({'x': x.ravel(), 'y': y.ravel()})
+
+        np.testing.assert_array_equal(result['x'], x.ravel())
+        np.testing.assert_array_equal(result['y'], (x + y).ravel() % 2 ** n)
+
+    def test_incrementer_restores_dirty_register(self):
+        result = ClassicalEmulator(incrementer(n), incrementer_regs(n)).run({'x': values, 'g': values[::-1]})
+
+        np.testing.assert_array_equal(result['x'], (values + 1) % 2 ** n)
+        np.testing.assert_array_equal(result['g'], values[::-1])
+
+    @idata([[constant] for constant in range(2 ** n)])
+    @unpack
+    def test_controlled_constant_adder(self, constant):
+        emulator = ClassicalEmulator(controlled_constant_adder(constant, n), controlled_constant_adder_regs(n))
+
+        for ctrl in [0, 1]:
+            result = emulator.run({'ctrl': ctrl, 'x': values, 'g': 1})
+            np.testing.assert_array_equal(result['x'], (values + ctrl * constant) % 2 ** n)
+            np.testing.assert_array_equal(result['g'], 1)
+
+    @idata([[constant] for constant in range(2 ** n)])
+    @unpack
+    def test_carry_and_comparator(self, constant):
+        result = ClassicalEmulator(carry(constant, n), carry_regs(n)).run({'x': values, 'g': 5})
+        np.testing.assert_array_equal(result['c'], values + constant >= 2 ** n)
+        np.testing.assert_array_equal(result['g'], 5)
+
+        result = ClassicalEmulator(comparator(constant, n), comparator_regs(n)).run({'x': values, 'g': 5})
+        np.testing.assert_array_equal(result['c'], values < constant)
+
+    @idata([
+        [builder, constant]
+        for builder in [double_controlled_comparator, mix_comparator, takahashi_comparator]
+        for constant in range(2 ** n)
+    ])
+    @unpack
+    def test_double_controlled_comparators(self, builder, constant):
+        emulator = ClassicalEmulator(builder(constant, n), double_controlled_comparator_regs(n))
+
+        for ctrl in range(4):
+            result = emulator.run({'ctrl': ctrl, 'x': values, 'g': 3})
+            np.testing.assert_array_equal(result['c'], (values < constant) & (ctrl == 3))
+            np.testing.assert_array_equal(result['x'], values)
+            np.testing.assert_array_equal(result['g'], 3)
+
+    @idata([[constant, 13] for constant in range(13)])
+    @unpack
+    def test_double_controlled_constant_modulo_adder(self, constant, N):
+        gate = double_controlled_constant_modulo_adder(constant, N, n)
+        emulator = ClassicalEmulator(gate, double_controlled_constant_modulo_adder_regs(n))
+        x = np.arange(N)
+
+        result = emulator.run({'ctrl': 3, 'x': x, 'g': 6})
+        np.testing.assert_array_equal(result['x'], (x + constant) % N)
+        np.testing.assert_array_equal(result['g'], 6)
+        np.testing.assert_array_equal(result['flag'], 0)
+
+    @idata([[7, 29, 5], [11, 53, 6]])
+    @unpack
+    def test_controlled_modular_multiplication(self, constant, N, n_bits):
+        gate = controlled_modular_multiplication_gate(constant, N, n_bits)
+        emulator = ClassicalEmulator(gate, controlled_modular_multiplication_gate_regs(n_bits))
+        x = np.arange(N)
+
+        for ctrl in [0, 1]:
+            result = emulator.run({'ctrl': ctrl, 'x': x})
+            np.testing.assert_array_equal(result['x'], (x * constant) % N if ctrl else x)
+            np.testing.assert_array_equal(result['aux'], 0)
+            np.testing.assert_array_equal(result['flag'], 0)
+
+    def test_rejects_non_classical_operations(self):
+        with self.assertRaises(ValueError):
+            ClassicalEmulator(qft_gate(3))
@@ -0,0 +1,60 @@
+import unittest
+
+from ddt import ddt, idata, unpack
+from qiskit import Aer
+from qiskit.utils import QuantumInstance
+
+from implementations.haner import HanerShor
+from implementations.mix import MixShor
+from simulation.order_finding_distribution import AnalyticQuantumInstance
+from utils.profiling import Profiling
+
+
+@ddt
+class TestFactorization(unittest.TestCase):
+
+    @idata([(16, 'even', 2), (343, 'perfect power', 7), (91, 'trial division', 7), (3 * 1009, 'trial division', 3)])
+    @unpack
+    def test_classical_shortcuts(self, n_v, method, factor):
+        result = MixShor().factorize(n_v)
+
+        self.assertEqual(result.method, method)
+        self.assertEqual(result.factors, (factor, n_v // factor))
+        self.assertEqual(result.attempts, 0)
+
+    @idata([1, 3])
+    def test_order_finding(self, concurrency):
+        shor = MixShor(AnalyticQuantumInstance(shots=32, seed=0))
+        result = shor.factorize(1009 * 1013, attempts=20, concurrency=concurrency, trial_division_bound=0, seed=1)
+
+        self.assertIn(result.method, ['order', 'gcd'])
+        self.assertCountEqual(result.factors, [1009, 1013])
+        self.assertLessEqual(result.attempts, 20)
+        self.assertEqual(result.total_shots, 32 * result.attempts)
+
+    def test_concurrent_batches(self):
+        shor = MixShor(AnalyticQuantumInstance(shots=32, seed=0), batch_shots=4)
+        result = shor.factorize(1009 * 1013, attempts=20, concurrency=3, trial_division_bound=0, seed=1)
+
+        self.assertCountEqual(result.factors, [1009, 1013])
+        self.assertLessEqual(result.total_shots, 32 * result.attempts)
+        self.assertEqual(result.total_shots % 4, 0)
+        self.assertEqual(shor.quantum_instance.run_config.shots, 32)
+        self.assertEqual(shor.quantum_instance.run_config.seed_simulator, 0)
+
+    def test_circuit(self):
+        shor = HanerShor(QuantumInstance(Aer.get_backend('qasm_simulator'), shots=64))
+        result = shor.factorize(21, semi_classical=True, trial_division_bound=0, seed=0)
+
+        self.assertCountEqual(result.factors, [3, 7])
+        self.assertIn(result.base, result.bases)
+
+    def test_prime(self):
+        with self.assertRaises(ValueError):
+            MixShor().factorize(1009)
+
+    def test_concurrency_with_profiling(self):
+        shor = MixShor(AnalyticQuantumInstance(shots=32, seed=0), profiling=Profiling(cprofile=True))
+
+        with self.assertRaises(ValueError):
+            shor.factorize(1009 * 1013, concurrency=2, trial_division_bound=0)
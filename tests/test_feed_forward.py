@@ -0,0 +1,77 @@
+import unittest
+
+import numpy as np
+from ddt import ddt, idata, unpack
+from qiskit import Aer
+from qiskit.utils import QuantumInstance
+
+from gates.phase_correction import PhaseCorrection
+from implementations.beauregard import BeauregardShor
+from implementations.haner import HanerShor
+from implementations.mix import MixShor
+from implementations.takahashi import TakahashiShor
+from simulation.branching_simulator import BranchingQuantumInstance
+from utils.resources import circuit_resources
+
+implementations_list = [MixShor, BeauregardShor, TakahashiShor, HanerShor]
+
+
+@ddt
+class TestFeedForward(unittest.TestCase):
+
+    @idata([2, 3, 5])
+    def test_angles_of_definition(self, k):
+        correction = PhaseCorrection(k)
+        angles = [instruction.params[0] for instruction, _, _ in correction.definition.data]
+
+        self.assertEqual(len(angles), k)
+        for value in range(pow(2, k)):
+            expected = -np.pi * sum(1 / pow(2, k - j) for j in range(k) if value >> j & 1)
+            self.assertAlmostEqual(correction.angle(value), expected)
+            self.assertAlmostEqual(sum(angle for j, angle in enumerate(angles) if value >> j & 1), expected)
+
+    @idata(implementations_list)
+    def test_getting_order(self, shor_class):
+        shor = shor_class(QuantumInstance(Aer.get_backend('qasm_simulator'), shots=128), feed_forward=True)
+
+        self.assertEqual(shor.get_order(7, 15, semi_classical=True).order, 4)
+
+    @idata([[a_v, N_v, degree] for a_v, N_v in [(7, 15), (2, 21)] for degree in [None, 3]])
+    @unpack
+    def test_same_distribution(self, a_v, N_v, degree):
+        expected = BranchingQuantumInstance(assume_exact=True).outcome_distribution(
+            MixShor(approximation_degree=degree).construct_circuit(a_v, N_v, semi_classical=True))
+        distribution = BranchingQuantumInstance(assume_exact=True).outcome_distribution(
+            MixShor(feed_forward=True, approximation_degree=degree).construct_circuit(a_v, N_v, semi_classical=True))
+
+        self.assertEqual(set(distribution), set(expected))
+        for outcome, probability in expected.items():
+            self.assertAlmostEqual(distribution[outcome], probability, places=10)
+
+    def test_branching_counts(self):
+        shor = MixShor(BranchingQuantumInstance(shots=128, seed=0), feed_forward=True)
+
+        self.assertEqual(shor.get_order(2, 21, semi_classical=True).order, 6)
+
+    @idata([[shor_class, feed_forward] for shor_class in implementations_list for feed_forward in [False, True]])
+    @unpack
+    def test_conditional_operations(self, shor_class, feed_forward):
+        circuit = shor_class(feed_forward=feed_forward).construct_circuit(7, 15, semi_classical=True)
+
+        # phase corrections of round i read the i bits measured before it
+        corrections, rounds = [0] * 8, 0
+        for instruction, _, cargs in circuit.data:
+            if instruction.name == 'measure':
+                rounds += 1
+            elif instruction.name in {'p', 'phase_correction'} and (instruction.condition is not None or cargs):
+                corrections[rounds] += 1
+
+        self.assertEqual(corrections, [min(i, 1) if feed_forward else i for i in range(8)])
+
+    @idata([[shor_class, degree] for shor_class in implementations_list for degree in [None, 3]])
+    @unpack
+    def test_resources(self, shor_class, degree):
+        shor = shor_class(feed_forward=True, approximation_degree=degree)
+
+        self.assertEqual(shor.estimate_resources(15, True, 7),
+                         circuit_resources(shor.construct_circuit(7, 15, semi_classical=True)))
@@ -0,0 +1,85 @@
+import unittest
+
+from ddt import ddt, idata, unpack
+from qiskit import Aer
+from qiskit.quantum_info import Statevector
+from qiskit.utils import QuantumInstance
+
+from implementations.beauregard import BeauregardShor
+from implementations.haner import HanerShor
+from implementations.mix import MixShor
+from implementations.takahashi import TakahashiShor
+from utils.circuit_creation import FlatCircuit
+from utils.gate_cache import gate_cache
+from utils.resources import LEAF_OPERATIONS, circuit_resources
+
+implementations_list = [MixShor, BeauregardShor, TakahashiShor, HanerShor]
+circuit_types = [False, True]
+
+
+@ddt
+class TestFlatCircuits(unittest.TestCase):
+
+    def setUp(self) -> None:
+        gate_cache.clear()
+
+    def tearDown(self) -> None:
+        gate_cache.clear()
+
+    @idata([
+        [shor_class, semi]
+        for shor_class in implementations_list
+        for semi in circuit_types
+    ])
+    @unpack
+    def test_only_leaf_operations(self, shor_class, semi):
+        circuit = shor_class(flat=True).construct_circuit(7, 15, semi)
+
+        self.assertTrue(all(instruction.name in LEAF_OPERATIONS for instruction, _, _ in circuit.data))
+        self.assertEqual(circuit_resources(circuit).gates, shor_class().estimate_resources(15, semi, 7).gates)
+
+    @idata(implementations_list)
+    def test_same_state(self, shor_class):
+        expected = shor_class().construct_circuit(3, 7, measurement=False)
+        circuit = shor_class(flat=True).construct_circuit(3, 7, measurement=False)
+
+        self.assertTrue(Statevector.from_instruction(circuit).equiv(Statevector.from_instruction(expected)))
+
+    @idata(implementations_list)
+    def test_gates_emitted_without_definitions(self, shor_class):
+        shor = shor_class(flat=True)
+        circuit = shor.construct_circuit(3, 7, measurement=False)
+
+        self.assertIsInstance(circuit, FlatCircuit)
+        self.assertFalse(shor._modular_exponentiation_gate(3, 7, 3).is_defined)
+        self.assertFalse(shor._modular_multiplication_gate(3, 7, 3).is_defined)
+
+    @idata([
+        [shor_class, semi]
+        for shor_class in implementations_list
+        for semi in circuit_types
+    ])
+    @unpack
+    def test_parallel_construction(self, shor_class, semi):
+        expected = shor_class(flat=True).construct_circuit(2, 7, semi)
+        gate_cache.clear()
+        circuit = shor_class(flat=True, construction_processes=2).construct_circuit(2, 7, semi)
+
+        self.assertTrue(all(instruction.name in LEAF_OPERATIONS for instruction, _, _ in circuit.data))
+        self.assertEqual(circuit_resources(circuit).gates, circuit_resources(expected).gates)
+
+    @idata([
+        [shor_class, semi]
+        for shor_class in implementations_list
+        for semi in circuit_types
+    ])
+    @unpack
+    def test_getting_order(self, shor_class, semi):
+        shor = shor_class(QuantumInstance(Aer.get_backend('qasm_simulator'), shots=64), flat=True)
+
+        self.assertEqual(shor.get_order(7, 15, semi).order, 4)
+
+    def test_bound_flat_circuit(self):
+        shor = MixShor(QuantumInstance(Aer.get_backend('qasm_simulator'), shots=64), flat=True, bind_bases=True)
+
+        self.assertEqual(shor.get_order(7, 15, semi_classical=True).order, 4)
@@ -0,0 +1,158 @@
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from ddt import ddt, idata, unpack
+from qiskit import QuantumCircuit
+
+from gates.beauregard.modular_exponentiation import modular_exponentiation_gate as beauregard_exponentiation
+from gates.haner.modular_exponentiation import modular_exponentiation_gate as haner_exponentiation
+from gates.mix.modular_exponentiation import modular_exponentiation_gate as mix_exponentiation
+from gates.takahashi.modular_exponentiation import modular_exponentiation_gate as takahashi_exponentiation
+from utils.gate_cache import BASE_BYTES, INSTRUCTION_BYTES, GateCache, cached_gate, gate_cache
+from utils.lazy_gate import LazyGate
+
+exponentiation_builders = [beauregard_exponentiation, haner_exponentiation, mix_exponentiation,
+                           takahashi_exponentiation]
+
+
+@ddt
+class TestGateCache(unittest.TestCase):
+
+    def setUp(self) -> None:
+        gate_cache.clear()
+        gate_cache.enabled = True
+
+    def tearDown(self) -> None:
+        gate_cache.clear()
+
+    @idata([[builder] for builder in exponentiation_builders])
+    @unpack
+    def test_repeated_construction_hits_cache(self, builder):
+        gate = builder(7, 15, 4)
+        misses = gate_cache.info().misses
+
+        self.assertIs(builder(7, 15, 4), gate)
+        self.assertEqual(gate_cache.info().misses, misses)
+        self.assertGreater(gate_cache.info().hits, 0)
+
+    def test_default_arguments_share_key(self):
+        calls = []
+
+        @cached_gate
+        def builder(constant: int, n: int, num_ctrl_qubits: int = 1):
+            calls.append((constant, n, num_ctrl_qubits))
+            return object()
+
+        self.assertIs(builder(3, 4), builder(3, 4, 1))
+        self.assertIs(builder(3, 4), builder(3, n=4, num_ctrl_qubits=1))
+        self.assertEqual(len(calls), 1)
+
+    @idata([[builder] for builder in [beauregard_exponentiation, mix_exponentiation, takahashi_exponentiation]])
+    @unpack
+    def test_exact_degree_shares_key(self, builder):
+        gate = builder(7, 15, 4)
+
+        self.assertIs(builder(7, 15, 4, approximation_degree=4), gate)
+        self.assertIs(builder(7, 15, 4, approximation_degree=9), gate)
+        self.assertIsNot(builder(7, 15, 4, approximation_degree=2), gate)
+
+    @idata([mix_exponentiation, takahashi_exponentiation])
+    def test_batched_exact_degree(self, builder):
+        # the accumulator of batched product sums spans n + 3 qubits for n = 4
+        gate = builder(7, 15, 4, batched_windows=True)
+
+        self.assertIsNot(builder(7, 15, 4, approximation_degree=5, batched_windows=True), gate)
+        self.assertIs(builder(7, 15, 4, approximation_degree=6, batched_windows=True), gate)
+
+    def test_disabled_cache_rebuilds(self):
+        gate_cache.enabled = False
+        self.assertIsNot(mix_exponentiation(4, 15, 4), mix_exponentiation(4, 15, 4))
+        self.assertEqual(len(gate_cache), 0)
+
+    def test_lru_eviction_by_entries(self):
+        cache = GateCache(max_entries=2, max_bytes=None)
+        cache.put(('b', 1), 'one')
+        cache.put(('b', 2), 'two')
+        cache.get(('b', 1))
+        cache.put(('b', 3), 'three')
+
+        self.assertIn(('b', 1), cache)
+        self.assertNotIn(('b', 2), cache)
+        self.assertIn(('b', 3), cache)
+
+    def test_eviction_by_bytes(self):
+        cache = GateCache(max_entries=None, max_bytes=3000)
+        for i in range(5):
+            cache.put(('b', i), object())
+
+        info = cache.info()
+        self.assertLessEqual(info.bytes, 3000)
+        self.assertEqual(info.entries, 2)
+        self.assertIn(('b', 4), cache)
+
+    def test_builder_statistics(self):
+        cache = GateCache()
+        cache.get(('b', 1))
+        cache.put(('b', 1), 'one')
+        cache.get(('b', 1))
+        cache.get(('c', 1))
+
+        self.assertEqual(cache.builder_stats(), {'b': (1, 1), 'c': (0, 1)})
+        self.assertEqual(cache.info()[:2], (1, 2))
+
+    def test_lazy_definition_is_accounted(self):
+        gate = _block_gate(0)
+        bytes_before = gate_cache.info().bytes
+
+        gate.define()
+
+        self.assertEqual(gate_cache.info().bytes - bytes_before, 2 * INSTRUCTION_BYTES)
+
+    def test_lazy_definition_triggers_eviction(self):
+        info = gate_cache.info()
+        first, second = _block_gate(1), _block_gate(2)
+        gate_cache.resize(max_entries=None, max_bytes=2 * BASE_BYTES + INSTRUCTION_BYTES)
+        try:
+            second.define()
+
+            self.assertNotIn(_block_gate.cache_key(1), gate_cache)
+            self.assertIn(_block_gate.cache_key(2), gate_cache)
+            self.assertEqual(gate_cache.info().bytes, BASE_BYTES + 2 * INSTRUCTION_BYTES)
+        finally:
+            gate_cache.resize(info.max_entries, info.max_bytes)
+        self.assertFalse(first.is_defined)
+
+    def test_concurrent_operations_keep_cache_consistent(self):
+        cache = GateCache(max_entries=16, max_bytes=None)
+
+        def work(thread):
+            for i in range(500):
+                key = ('builder', thread, i % 32)
+                if cache.get(key) is None:
+                    cache.put(key, QuantumCircuit(1))
+                cache.update_size(cache.get(key))
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(work, range(8)))
+
+        info = cache.info()
+        self.assertLessEqual(info.entries, 16)
+        self.assertEqual(info.bytes, info.entries * BASE_BYTES)
+        self.assertEqual(info.hits + info.misses, 8 * 500 * 2)
+
+
+class _Block(LazyGate):
+    def __init__(self) -> None:
+        super().__init__('block', 2)
+
+    def _build(self) -> QuantumCircuit:
+        circuit = QuantumCircuit(2)
+        circuit.cx(0, 1)
+        circuit.cx(1, 0)
+        return circuit
+
+
+@cached_gate
+def _block_gate(index: int) -> LazyGate:
+    return _Block()
+
@@ -0,0 +1,63 @@
+import unittest
+
+from ddt import ddt, idata, unpack
+from qiskit import Aer, QuantumCircuit
+from qiskit.quantum_info import Operator, Statevector
+from qiskit.utils import QuantumInstance
+
+from gates.beauregard.modular_exponentiation import controlled_modular_multiplication_gate
+from gates.qft import qft_gate, iqft_gate
+from implementations.beauregard import BeauregardShor
+from utils.resources import circuit_resources
+
+circuit_types = [False, True]
+
+
+@ddt
+class TestKeepFourier(unittest.TestCase):
+
+    @idata([2, 3, 4])
+    def test_multiplier_between_qfts_equals_multiplier(self, a_v):
+        n_v, N_v = 3, 5
+        expected = controlled_modular_multiplication_gate(a_v, N_v, n_v)
+
+        circuit = QuantumCircuit(expected.num_qubits)
+        b_qubits = circuit.qubits[n_v + 1:2 * n_v + 2]
+        circuit.append(qft_gate(n_v + 1), b_qubits)
+        circuit.append(controlled_modular_multiplication_gate(a_v, N_v, n_v, keep_fourier=True), circuit.qubits)
+        circuit.append(iqft_gate(n_v + 1), b_qubits)
+
+        self.assertTrue(Operator(circuit).equiv(Operator(expected)))
+
+    def test_same_state(self):
+        expected = BeauregardShor().construct_circuit(3, 7, measurement=False)
+        circuit = BeauregardShor(keep_fourier=True).construct_circuit(3, 7, measurement=False)
+
+        self.assertTrue(Statevector.from_instruction(circuit).equiv(Statevector.from_instruction(expected)))
+
+    @idata(circuit_types)
+    def test_getting_order(self, semi):
+        shor = BeauregardShor(QuantumInstance(Aer.get_backend('qasm_simulator'), shots=64), keep_fourier=True)
+
+        self.assertEqual(shor.get_order(7, 15, semi).order, 4)
+
+    @idata(circuit_types)
+    def test_fewer_gates(self, semi):
+        n = 4
+        qft_phases = n * (n + 1) // 2
+        expected = BeauregardShor().estimate_resources(15, semi, 7)
+        resources = BeauregardShor(keep_fourier=True).estimate_resources(15, semi, 7)
+
+        self.assertEqual(expected.gates['cp'] - resources.gates['cp'], 2 * (2 * n - 1) * qft_phases)
+
+    @idata([
+        [a_v, semi]
+        for a_v in [2, 7]
+        for semi in circuit_types
+    ])
+    @unpack
+    def test_estimate_matches_constructed_circuit(self, a_v, semi):
+        shor = BeauregardShor(keep_fourier=True)
+        circuit = shor.construct_circuit(a_v, 15, semi)
+
+        self.assertEqual(shor.estimate_resources(15, semi, a_v), circuit_resources(circuit))
@@ -0,0 +1,65 @@
+import unittest
+
+from ddt import ddt, idata, unpack
+from qiskit import Aer
+from qiskit.quantum_info import Statevector
+from qiskit.utils import QuantumInstance
+
+from implementations.beauregard import BeauregardShor
+from implementations.haner import HanerShor
+from implementations.mix import MixShor
+from implementations.takahashi import TakahashiShor
+from utils.resources import circuit_resources
+
+implementations_list = [MixShor, BeauregardShor, TakahashiShor, HanerShor]
+circuit_types = [False, True]
+
+
+@ddt
+class TestKnownInput(unittest.TestCase):
+
+    @idata(implementations_list)
+    def test_same_state(self, shor_class):
+        expected = shor_class().construct_circuit(3, 7, measurement=False)
+        circuit = shor_class(known_input=True).construct_circuit(3, 7, measurement=False)
+
+        self.assertTrue(Statevector.from_instruction(circuit).equiv(Statevector.from_instruction(expected)))
+
+    def test_same_state_with_fourier_register(self):
+        expected = BeauregardShor().construct_circuit(3, 7, measurement=False)
+        circuit = BeauregardShor(keep_fourier=True, known_input=True).construct_circuit(3, 7, measurement=False)
+
+        self.assertTrue(Statevector.from_instruction(circuit).equiv(Statevector.from_instruction(expected)))
+
+    @idata([
+        [shor_class, semi]
+        for shor_class in implementations_list
+        for semi in circuit_types
+    ])
+    @unpack
+    def test_getting_order(self, shor_class, semi):
+        shor = shor_class(QuantumInstance(Aer.get_backend('qasm_simulator'), shots=64), known_input=True)
+
+        self.assertEqual(shor.get_order(7, 15, semi).order, 4)
+
+    @idata([
+        [shor_class, semi]
+        for shor_class in implementations_list
+        for semi in circuit_types
+    ])
+    @unpack
+    def test_one_multiplier_fewer(self, shor_class, semi):
+        n = 4
+        expected = shor_class().estimate_resources(15, semi, 7).size
+        multiplier = shor_class()._modular_multiplication_gate_resources(None, 15, n).size
+        shor = shor_class(known_input=True)
+        resources = shor.estimate_resources(15, semi, 7)
+
+        self.assertLess(resources.size, expected - multiplier // 2)
+        self.assertEqual(resources, circuit_resources(shor.construct_circuit(7, 15, semi)))
+
+    def test_cannot_be_parameterized(self):
+        with self.assertRaises(ValueError):
+            MixShor(known_input=True, bind_bases=True)
+        with self.assertRaises(ValueError):
+            MixShor(known_input=True).construct_circuit(None, 15)
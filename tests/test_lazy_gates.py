@@ -0,0 +1,80 @@
+import pickle
+import unittest
+
+from ddt import ddt, idata, unpack
+from qiskit import QuantumCircuit
+from qiskit.quantum_info import Statevector
+
+from gates.beauregard import modular_exponentiation as beauregard_modular_exponentiation
+from gates.haner import modular_exponentiation as haner_modular_exponentiation
+from gates.mix import modular_exponentiation as mix_modular_exponentiation
+from gates.qft import QFTGate
+from gates.takahashi import modular_exponentiation as takahashi_modular_exponentiation
+from implementations.beauregard import BeauregardShor
+from implementations.haner import HanerShor
+from implementations.mix import MixShor
+from implementations.takahashi import TakahashiShor
+from utils.gate_cache import gate_cache
+from utils.lazy_gate import LazyGate, define_lazy_gates
+
+modules = [beauregard_modular_exponentiation, haner_modular_exponentiation, mix_modular_exponentiation,
+           takahashi_modular_exponentiation]
+implementations_list = [MixShor, BeauregardShor, TakahashiShor, HanerShor]
+
+
+@ddt
+class TestLazyGates(unittest.TestCase):
+
+    def setUp(self) -> None:
+        gate_cache.clear()
+
+    def tearDown(self) -> None:
+        gate_cache.clear()
+
+    @idata([[module] for module in modules])
+    @unpack
+    def test_definition_on_first_access(self, module):
+        gate = module.modular_exponentiation_gate(2, 5, 3)
+
+        self.assertIsInstance(gate, LazyGate)
+        self.assertFalse(gate.is_defined)
+        self.assertEqual((gate.constant, gate.N, gate.n), (2, 5, 3))
+
+        multipliers = [instruction for instruction, _, _ in gate.definition.data]
+        self.assertTrue(gate.is_defined)
+        self.assertEqual(len(multipliers), 6)
+        self.assertFalse(any(multiplier.is_defined for multiplier in multipliers))
+
+    @idata([[module, x] for module in modules for x in range(1, 5)])
+    @unpack
+    def test_multiplication(self, module, x):
+        gate = module.controlled_modular_multiplication_gate(2, 5, 3)
+        circuit = QuantumCircuit(gate.num_qubits)
+        expected = QuantumCircuit(gate.num_qubits)
+        for prepared, value in [(circuit, x), (expected, 2 * x % 5)]:
+            prepared.x(0)
+            for i in range(3):
+                if value >> i & 1:
+                    prepared.x(i + 1)
+        circuit.append(gate, range(gate.num_qubits))
+
+        self.assertTrue(Statevector.from_instruction(circuit).equiv(Statevector.from_instruction(expected)))
+
+    @idata(implementations_list)
+    def test_circuit_is_lazy(self, shor_class):
+        circuit = shor_class().construct_circuit(2, 15)
+        lazy = [instruction for instruction, _, _ in circuit.data if isinstance(instruction, LazyGate)]
+
+        self.assertEqual(len(lazy), 2)
+        self.assertIsInstance(lazy[-1], QFTGate)
+        self.assertFalse(any(instruction.is_defined for instruction in lazy))
+
+    @idata(implementations_list)
+    def test_defined_gates_are_pickled_with_definitions(self, shor_class):
+        circuit = shor_class().construct_circuit(2, 15, semi_classical=True)
+        define_lazy_gates(circuit)
+        loaded = pickle.loads(pickle.dumps(circuit))
+
+        lazy = [instruction for instruction, _, _ in loaded.data if isinstance(instruction, LazyGate)]
+        self.assertEqual(len(lazy), 8)
+        self.assertTrue(all(instruction.is_defined for instruction in lazy))
@@ -0,0 +1,108 @@
+import unittest
+
+import numpy as np
+from ddt import ddt, idata, unpack
+from qiskit import ClassicalRegister
+
+from implementations.beauregard import BeauregardShor
+from implementations.haner import HanerShor
+from implementations.mix import MixShor
+from implementations.takahashi import TakahashiShor
+from simulation.order_finding_distribution import OrderFindingDistribution, AnalyticQuantumInstance, \
+    multiplicative_order
+
+implementations_list = [MixShor, BeauregardShor, TakahashiShor, HanerShor]
+circuit_types = [False, True]
+
+
+@ddt
+class TestOrderFindingDistribution(unittest.TestCase):
+
+    @idata([(15, 7, 4), (21, 2, 6), (21, 13, 2), (17, 8, 8), (35, 3, 12)])
+    @unpack
+    def test_multiplicative_order(self, n_v, a_v, order):
+        self.assertEqual(multiplicative_order(a_v, n_v), order)
+
+    def test_multiplicative_order_of_large_modulus(self):
+        p, q = 4294967311, 4294967357
+        order = multiplicative_order(3, p * q)
+
+        self.assertEqual(pow(3, order, p * q), 1)
+        self.assertEqual((p - 1) * (q - 1) % order, 0)
+        self.assertGreater(order, 2 ** 32)
+
+    @idata([(15, 7), (21, 2), (33, 5), (35, 3)])
+    @unpack
+    def test_matches_fourier_transform_of_state(self, n_v, a_v):
+        distribution = OrderFindingDistribution(a_v, n_v)
+        Q = pow(2, 2 * n_v.bit_length())
+
+        values = np.array([pow(a_v, k, n_v) for k in range(Q)])
+        expected = np.zeros(Q)
+        for value in np.unique(values):
+            amplitudes = np.fft.fft(values == value) / Q
+            expected += np.abs(amplitudes) ** 2
+
+        probabilities = np.zeros(Q)
+        probabilities[distribution.outcomes.astype(np.int64)] = distribution.probabilities
+        np.testing.assert_allclose(probabilities, expected, atol=1e-12)
+
+    def test_order_dividing_register_size_gives_exact_peaks(self):
+        distribution = OrderFindingDistribution(7, 15)
+
+        self.assertEqual(list(distribution.outcomes), [0, 64, 128, 192])
+        np.testing.assert_allclose(distribution.probabilities, 0.25)
+        self.assertEqual(distribution.probability(64), 0.25)
+        self.assertEqual(distribution.probability(65), 0.0)
+
+    def test_peak_windows_report_truncated_probability(self):
+        distribution = OrderFindingDistribution(2, 21, max_outcomes=6 * 9)
+
+        self.assertLessEqual(len(distribution.outcomes), 6 * 9)
+        self.assertGreater(distribution.truncated_probability, 0)
+        self.assertLess(distribution.truncated_probability, 0.1)
+        self.assertAlmostEqual(float(distribution.probabilities.sum()), 1.0)
+
+    def test_register_beyond_64_bits(self):
+        N = 2 ** 34 - 1
+        distribution = OrderFindingDistribution(2, N, max_outcomes=2 ** 12)
+        Q = pow(2, 2 * N.bit_length())
+
+        self.assertEqual(distribution.order, 34)
+        self.assertGreater(Q, 2 ** 64)
+        self.assertTrue(all(0 <= y < Q for y in distribution.outcomes))
+        self.assertTrue(np.all(np.isfinite(distribution.probabilities)))
+        self.assertAlmostEqual(float(distribution.probabilities.sum()), 1.0)
+
+    @idata([[semi] for semi in circuit_types])
+    @unpack
+    def test_sampled_counts_format(self, semi):
+        counts = OrderFindingDistribution(2, 21, semi).sample_counts(100, seed=0)
+
+        self.assertEqual(sum(counts.values()), 100)
+        for measurement in counts:
+            self.assertEqual(len(measurement.replace(' ', '')), 10)
+            self.assertEqual(' ' in measurement, semi)
+
+    @idata([
+        [shor_class, n_v, a_v, semi, order]
+        for n_v, a_v, order in [(15, 7, 4), (21, 13, 2)]
+        for shor_class in implementations_list
+        for semi in circuit_types
+    ])
+    @unpack
+    def test_analytic_quantum_instance(self, shor_class, n_v, a_v, semi, order):
+        shor = shor_class(AnalyticQuantumInstance(shots=64, seed=0))
+        result = shor.get_order(a_v, n_v, semi)
+
+        self.assertEqual(result.order, order)
+        self.assertEqual(result.total_shots, 64)
+
+    def test_analytic_quantum_instance_rejects_other_registers(self):
+        shor = MixShor(AnalyticQuantumInstance(shots=64, seed=0))
+        circuit = shor.construct_circuit(7, 15, semi_classical=True)
+        circuit.add_register(ClassicalRegister(2, 'other'))
+        circuit.measure(circuit.qubits[1:3], circuit.cregs[-1])
+
+        with self.assertRaises(ValueError):
+            shor.quantum_instance.execute(circuit)
@@ -0,0 +1,48 @@
+import unittest
+
+from ddt import ddt, idata, unpack
+
+from implementations.mix import MixShor
+from simulation.order_finding_distribution import AnalyticQuantumInstance, OrderFindingDistribution
+
+
+def peak(numerator: int, denominator: int, N: int) -> int:
+    return round(numerator * pow(2, 2 * N.bit_length()) / denominator)
+
+
+@ddt
+class TestOrderReconstruction(unittest.TestCase):
+
+    def test_combines_denominators(self):
+        # 3 has order 12 modulo 35; phases 1/2 and 2/3 alone only give divisors 2 and 3
+        measurements = [peak(1, 2, 35), peak(2, 3, 35)]
+
+        self.assertEqual(MixShor._reconstruct_order(measurements[:1], 3, 35), (None, None))
+        self.assertEqual(MixShor._reconstruct_order(measurements, 3, 35), (12, 2))
+
+    def test_skips_trivial_and_inconsistent_measurements(self):
+        measurements = [0, peak(1, 2, 35), peak(5, 11, 35), peak(1, 3, 35)]
+        self.assertEqual(MixShor._reconstruct_order(measurements, 3, 35), (12, 4))
+
+    def test_reduces_period_to_order(self):
+        self.assertEqual(MixShor._reduce_period(24, 3, 35), 12)
+        self.assertEqual(MixShor._reduce_period(12, 3, 35), 12)
+
+    @idata([(15, 7, 4), (21, 2, 6), (35, 3, 12), (33, 5, 10)])
+    @unpack
+    def test_get_order_reports_required_counts(self, n_v, a_v, order):
+        result = MixShor(AnalyticQuantumInstance(shots=32, seed=0)).get_order(a_v, n_v)
+
+        self.assertEqual(result.order, order)
+        self.assertLessEqual(result.required_counts, result.total_counts)
+        self.assertEqual(result.required_shots, 32)
+        self.assertLessEqual(result.successful_shots, result.total_shots)
+
+    def test_few_shots_suffice(self):
+        found = 0
+        for seed in range(20):
+            counts = OrderFindingDistribution(3, 35).sample(4, seed=seed)
+            measurements = sorted(counts, key=lambda measurement: (-counts[measurement], measurement))
+            order, _ = MixShor._reconstruct_order(measurements, 3, 35)
+            found += order == 12
+        self.assertGreaterEqual(found, 15)
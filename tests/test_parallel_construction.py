@@ -0,0 +1,123 @@
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from ddt import ddt, idata, unpack
+from qiskit.quantum_info import Operator, Statevector
+
+from gates.beauregard import modular_exponentiation as beauregard_modular_exponentiation
+from gates.haner import modular_exponentiation as haner_modular_exponentiation
+from gates.mix import modular_exponentiation as mix_modular_exponentiation
+from gates.takahashi import modular_exponentiation as takahashi_modular_exponentiation
+from implementations.beauregard import BeauregardShor
+from implementations.haner import HanerShor
+from implementations.mix import MixShor
+from implementations.takahashi import TakahashiShor
+from utils.circuit_creation import FlatCircuit
+from utils.gate_cache import gate_cache
+from utils.lazy_gate import LazyGate
+from utils.parallel_construction import ConstructionPool, build_gates, define_gates, parallel_construction
+
+modules = [beauregard_modular_exponentiation, haner_modular_exponentiation, mix_modular_exponentiation,
+           takahashi_modular_exponentiation]
+implementations_list = [MixShor, BeauregardShor, TakahashiShor, HanerShor]
+
+
+@ddt
+class TestParallelConstruction(unittest.TestCase):
+
+    def setUp(self) -> None:
+        gate_cache.clear()
+        gate_cache.enabled = True
+
+    def tearDown(self) -> None:
+        gate_cache.clear()
+
+    @idata([[module] for module in modules])
+    @unpack
+    def test_multipliers_in_order(self, module):
+        builder = module.controlled_modular_multiplication_gate
+        arguments = [(pow(2, pow(2, i), mod=5), 5, 3) for i in range(6)]
+        with parallel_construction(2):
+            gates = build_gates(builder, arguments)
+
+        gate_cache.clear()
+        for gate, args in zip(gates, arguments):
+            self.assertTrue(Operator(gate).equiv(Operator(builder(*args))))
+
+    def test_built_gates_are_cached(self):
+        builder = mix_modular_exponentiation.controlled_modular_multiplication_gate
+        arguments = [(2, 5, 3), (4, 5, 3)]
+        with parallel_construction(2):
+            gates = build_gates(builder, arguments)
+
+        for gate, args in zip(gates, arguments):
+            self.assertIs(builder(*args), gate)
+
+    def test_without_cache(self):
+        builder = mix_modular_exponentiation.controlled_modular_multiplication_gate
+        gate_cache.enabled = False
+        try:
+            with parallel_construction(2):
+                gates = build_gates(builder, [(2, 5, 3), (4, 5, 3)])
+        finally:
+            gate_cache.enabled = True
+
+        self.assertEqual(len(gates), 2)
+        self.assertEqual(len(gate_cache), 0)
+
+    def test_defined_gates(self):
+        builder = mix_modular_exponentiation.controlled_modular_multiplication_gate
+        gates = [builder(2, 5, 3), builder(4, 5, 3)]
+        with parallel_construction(2):
+            define_gates(gates)
+
+        self.assertTrue(all(gate.is_defined for gate in gates))
+        gate_cache.clear()
+        self.assertTrue(Operator(gates[1]).equiv(Operator(builder(4, 5, 3))))
+
+    @idata([[module] for module in modules])
+    @unpack
+    def test_flat_definitions(self, module):
+        builder = module.controlled_modular_multiplication_gate
+        with parallel_construction(2, flat=True):
+            gates = build_gates(builder, [(2, 5, 3), (4, 5, 3)])
+
+        for gate in gates:
+            self.assertIsInstance(gate.definition, FlatCircuit)
+        gate_cache.clear()
+        self.assertTrue(Operator(gates[1]).equiv(Operator(builder(4, 5, 3))))
+
+    def test_pool_shared_by_threads(self):
+        builder = mix_modular_exponentiation.controlled_modular_multiplication_gate
+        pool = ConstructionPool(2)
+
+        def build(constants):
+            with parallel_construction(pool):
+                return build_gates(builder, [(constant, 7, 3) for constant in constants])
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            gates = list(executor.map(build, [[2, 4], [3, 5]]))
+
+        self.assertIsNone(pool._executor)
+        self.assertIs(builder(5, 7, 3), gates[1][1])
+
+    @idata([[shor_class, semi] for shor_class in implementations_list for semi in [False, True]])
+    @unpack
+    def test_same_circuit(self, shor_class, semi):
+        expected = shor_class().construct_circuit(2, 7, semi, measurement=semi)
+        gate_cache.clear()
+        circuit = shor_class(construction_processes=2).construct_circuit(2, 7, semi, measurement=semi)
+
+        if semi:
+            multipliers = [(gate, other) for (gate, _, _), (other, _, _) in zip(circuit.data, expected.data)
+                           if isinstance(gate, LazyGate)]
+            self.assertGreater(len(multipliers), 1)
+            for gate, other in multipliers:
+                self.assertTrue(gate.is_defined)
+                self.assertTrue(Operator(gate).equiv(Operator(other)))
+        else:
+            self.assertTrue(Statevector.from_instruction(circuit).equiv(Statevector.from_instruction(expected)))
+
+    def test_invalid_processes(self):
+        with self.assertRaises(ValueError):
+            MixShor(construction_processes=0)
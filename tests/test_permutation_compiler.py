@@ -0,0 +1,64 @@
+import unittest
+
+import numpy as np
+from ddt import ddt, idata, unpack
+from qiskit import QuantumCircuit
+from qiskit.quantum_info import Statevector
+
+from gates.beauregard.modular_exponentiation import modular_exponentiation_gate
+from gates.mix.modular_exponentiation import controlled_modular_multiplication_gate
+from implementations.beauregard import BeauregardShor
+from implementations.haner import HanerShor
+from implementations.mix import MixShor
+from implementations.takahashi import TakahashiShor
+from simulation.permutation_compiler import (ModularMultiplicationPermutation, PermutationGate,
+                                             compile_permutations, permutation_statevector)
+from simulation.sparse_simulator import SparseQuantumInstance, SparseStatevector
+from utils.resources import circuit_resources
+
+implementations_list = [MixShor, BeauregardShor, TakahashiShor, HanerShor]
+
+
+@ddt
+class TestPermutationCompiler(unittest.TestCase):
+
+    @idata([[constant, y] for constant in [2, 7, 11] for y in [0, 1, 6, 14, 15]])
+    @unpack
+    def test_multiplication(self, constant, y):
+        N, n = 15, 4
+        multiplier = ModularMultiplicationPermutation(controlled_modular_multiplication_gate(constant, N, n))
+        values = np.array([y << 1, (y << 1) | 1, (y << 1) | 1 | (1 << (n + 1))], dtype=np.uint64)
+
+        expected = [y << 1, ((y * constant % N if y < N else y) << 1) | 1, (y << 1) | 1 | (1 << (n + 1))]
+        self.assertEqual(multiplier.permute(values).tolist(), expected)
+
+    @idata(implementations_list)
+    def test_same_state(self, shor_class):
+        circuit = shor_class().construct_circuit(7, 15, measurement=False)
+        compiled = compile_permutations(circuit)
+
+        expected = Statevector.from_instruction(circuit).data
+        np.testing.assert_allclose(permutation_statevector(compiled).data, expected, atol=1e-10)
+        np.testing.assert_allclose(SparseStatevector.from_instruction(compiled).to_dense(), expected, atol=1e-10)
+
+    @idata(implementations_list)
+    def test_black_box(self, shor_class):
+        circuit = shor_class().construct_circuit(2, 21)
+        compiled = compile_permutations(circuit)
+
+        self.assertEqual(circuit_resources(compiled), circuit_resources(circuit))
+
+    def test_keep_fourier(self):
+        circuit = QuantumCircuit(18)
+        circuit.append(modular_exponentiation_gate(7, 15, 4, keep_fourier=True), range(18))
+        compiled = compile_permutations(circuit)
+
+        self.assertIs(compiled.data[0][0], circuit.data[0][0])
+        self.assertFalse(any(isinstance(instruction, PermutationGate) for instruction, _, _ in compiled.data))
+
+    @idata(implementations_list)
+    def test_getting_order(self, shor_class):
+        shor = shor_class(SparseQuantumInstance(shots=128, seed=0, permutations=True))
+
+        self.assertEqual(shor.get_order(7, 15).order, 4)
+        self.assertEqual(shor.get_order(2, 21).order, 6)
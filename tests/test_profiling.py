@@ -0,0 +1,49 @@
+import unittest
+
+from qiskit import Aer
+from qiskit.utils import QuantumInstance
+
+from implementations.mix import MixShor
+from simulation.order_finding_distribution import AnalyticQuantumInstance
+from utils.profiling import PhaseRecorder, Profiling
+
+
+class TestProfiling(unittest.TestCase):
+
+    def test_phases(self):
+        shor = MixShor(QuantumInstance(Aer.get_backend('qasm_simulator'), shots=16))
+        result = shor.get_order(7, 15, semi_classical=True)
+
+        self.assertEqual([span.phase for span in result.spans],
+                         ['construction', 'definition', 'transpilation', 'execution', 'post-processing'])
+        self.assertTrue(all(span.duration > 0 and span.peak_memory is None for span in result.spans))
+        self.assertIsNone(result.profile)
+
+    def test_batches(self):
+        shor = MixShor(AnalyticQuantumInstance(shots=1024, seed=0), batch_shots=1)
+        result = shor.get_order(7, 15)
+
+        phases = [span.phase for span in result.spans]
+        self.assertEqual(phases[0], 'construction')
+        self.assertEqual(phases.count('execution'), result.total_shots)
+        self.assertEqual(phases.count('post-processing'), result.total_shots)
+
+    def test_profiling(self):
+        spans = []
+        shor = MixShor(AnalyticQuantumInstance(shots=64, seed=0),
+                       profiling=Profiling(cprofile=True, tracemalloc=True, callback=spans.append))
+        result = shor.get_order(7, 15)
+
+        self.assertEqual(spans, result.spans)
+        self.assertTrue(all(span.peak_memory > 0 for span in spans))
+        self.assertGreater(result.profile.total_calls, 0)
+
+    def test_exception_inside_phase(self):
+        spans = []
+        recorder = PhaseRecorder(Profiling(callback=spans.append))
+        with self.assertRaises(RuntimeError):
+            with recorder.phase('execution'):
+                raise RuntimeError()
+
+        self.assertEqual([span.phase for span in recorder.spans], ['execution'])
+        self.assertEqual(spans, recorder.spans)
@@ -0,0 +1,93 @@
+import unittest
+
+from ddt import ddt, idata, unpack
+
+from gates.haner.comparator import double_controlled_comparator, double_controlled_comparator_resources
+from gates.haner.constant_adder import controlled_constant_adder, controlled_constant_adder_resources
+from gates.haner.constant_modulo_adder import double_controlled_constant_modulo_adder, \
+    double_controlled_constant_modulo_adder_resources
+from gates.mix.comparator import double_controlled_comparator as mix_comparator, \
+    double_controlled_comparator_resources as mix_comparator_resources
+from gates.qft import qft_gate, qft_gate_resources
+from gates.takahashi.comparator import double_controlled_comparator as takahashi_comparator, \
+    double_controlled_comparator_resources as takahashi_comparator_resources
+from implementations.beauregard import BeauregardShor
+from implementations.haner import HanerShor
+from implementations.mix import MixShor
+from implementations.takahashi import TakahashiShor
+from utils.resources import RESOURCES_CACHE_SIZE, circuit_resources
+
+implementations_list = [MixShor, BeauregardShor, TakahashiShor, HanerShor]
+circuit_types = [False, True]
+
+n = 4
+
+
+@ddt
+class TestResources(unittest.TestCase):
+
+    @idata([[m, do_swaps] for m in range(1, 6) for do_swaps in [False, True]])
+    @unpack
+    def test_qft(self, m, do_swaps):
+        self.assertEqual(qft_gate_resources(m, do_swaps), circuit_resources(qft_gate(m, do_swaps)))
+
+    @idata([
+        [builder, estimator, constant]
+        for builder, estimator in [
+            (controlled_constant_adder, controlled_constant_adder_resources),
+            (double_controlled_comparator, double_controlled_comparator_resources),
+            (mix_comparator, mix_comparator_resources),
+            (takahashi_comparator, takahashi_comparator_resources)
+        ]
+        for constant in range(2 ** n)
+    ])
+    @unpack
+    def test_constant_gates(self, builder, estimator, constant):
+        self.assertEqual(estimator(constant, n), circuit_resources(builder(constant, n)))
+
+    def test_constant_modulo_adder(self):
+        for constant in range(13):
+            self.assertEqual(double_controlled_constant_modulo_adder_resources(constant, 13, n),
+                             circuit_resources(double_controlled_constant_modulo_adder(constant, 13, n)))
+
+    @idata([
+        [shor_class, n_v, a_v, semi]
+        for n_v, a_v in [(15, 7), (21, 2)]
+        for shor_class in implementations_list
+        for semi in circuit_types
+    ])
+    @unpack
+    def test_estimate_matches_constructed_circuit(self, shor_class, n_v, a_v, semi):
+        shor = shor_class()
+        circuit = shor.construct_circuit(a_v, n_v, semi)
+
+        self.assertEqual(shor.estimate_resources(n_v, semi, a_v), circuit_resources(circuit))
+
+    @idata(implementations_list)
+    def test_block_depth_bounds_depth(self, shor_class):
+        # depth of the decomposed circuit, counted by Qiskit on its flat construction
+        estimate = shor_class().estimate_resources(15, a=7, measurement=False)
+        circuit = shor_class(flat=True).construct_circuit(7, 15, measurement=False)
+
+        self.assertEqual(estimate.size, circuit.size())
+        self.assertGreaterEqual(estimate.block_depth, circuit.depth())
+
+    @idata([
+        [MixShor, 1, 2], [BeauregardShor, 2, 3], [TakahashiShor, 1, 2], [HanerShor, 1, 2]
+    ])
+    @unpack
+    def test_width_of_large_instance(self, shor_class, full_offset, semi_offset):
+        N = pow(2, 1024) - 105
+        shor = shor_class()
+
+        self.assertEqual(shor.estimate_resources(N, semi_classical=False).num_qubits, 4 * 1024 + full_offset)
+        self.assertEqual(shor.estimate_resources(N, semi_classical=True).num_qubits, 2 * 1024 + semi_offset)
+
+    def test_bounded_caches(self):
+        # keys of resources of constant gates include constants, which differ for every base a
+        for constant in range(RESOURCES_CACHE_SIZE + 8):
+            mix_comparator_resources(constant, 12)
+
+        self.assertEqual(mix_comparator_resources.cache_info().currsize, RESOURCES_CACHE_SIZE)
+        for estimator in [controlled_constant_adder_resources, qft_gate_resources]:
+            self.assertEqual(estimator.cache_info().maxsize, RESOURCES_CACHE_SIZE)
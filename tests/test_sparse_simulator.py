@@ -0,0 +1,70 @@
+import unittest
+
+import numpy as np
+from ddt import ddt, idata, unpack
+from qiskit import QuantumCircuit
+from qiskit.circuit.library import CCXGate
+from qiskit.quantum_info import Statevector
+
+from gates.qft import qft_gate, iqft_gate
+from implementations.beauregard import BeauregardShor
+from implementations.haner import HanerShor
+from implementations.mix import MixShor
+from implementations.takahashi import TakahashiShor
+from simulation.order_finding_distribution import multiplicative_order
+from simulation.sparse_simulator import SparseQuantumInstance, SparseStatevector
+
+implementations_list = [MixShor, BeauregardShor, TakahashiShor, HanerShor]
+
+
+@ddt
+class TestSparseSimulator(unittest.TestCase):
+
+    @idata([[builder, do_swaps] for builder in [qft_gate, iqft_gate] for do_swaps in [False, True]])
+    @unpack
+    def test_fourier_transform(self, builder, do_swaps):
+        circuit = QuantumCircuit(5)
+        circuit.h(0)
+        circuit.x(3)
+        circuit.cx(0, 4)
+        circuit.append(builder(3, do_swaps), [1, 2, 4])
+
+        np.testing.assert_allclose(SparseStatevector.from_instruction(circuit).to_dense(),
+                                   Statevector.from_instruction(circuit).data, atol=1e-10)
+
+    def test_controlled_operations(self):
+        circuit = QuantumCircuit(4)
+        circuit.h([0, 1])
+        circuit.append(CCXGate(ctrl_state=1), [0, 1, 2])
+        circuit.cswap(2, 0, 3)
+        circuit.mcp(0.3, [0, 1], 3)
+        circuit.append(qft_gate(2).control(1), [3, 0, 1])
+
+        np.testing.assert_allclose(SparseStatevector.from_instruction(circuit).to_dense(),
+                                   Statevector.from_instruction(circuit).data, atol=1e-10)
+
+    @idata(implementations_list)
+    def test_same_state(self, shor_class):
+        circuit = shor_class().construct_circuit(7, 15, measurement=False)
+
+        np.testing.assert_allclose(SparseStatevector.from_instruction(circuit).to_dense(),
+                                   Statevector.from_instruction(circuit).data, atol=1e-10)
+
+    @idata(implementations_list)
+    def test_reachable_states(self, shor_class):
+        n_v, a_v = 21, 2
+        circuit = shor_class().construct_circuit(a_v, n_v, measurement=False)
+        state = SparseStatevector.from_instruction(circuit)
+
+        self.assertLessEqual(len(state), pow(2, 2 * n_v.bit_length()) * multiplicative_order(a_v, n_v))
+
+    @idata(implementations_list)
+    def test_getting_order(self, shor_class):
+        shor = shor_class(SparseQuantumInstance(shots=128, seed=0))
+
+        self.assertEqual(shor.get_order(7, 15).order, 4)
+        self.assertEqual(shor.get_order(2, 21).order, 6)
+
+    def test_semi_classical_circuits(self):
+        with self.assertRaises(ValueError):
+            SparseQuantumInstance().execute(MixShor().construct_circuit(7, 15, semi_classical=True))
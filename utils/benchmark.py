@@ -0,0 +1,334 @@
+""" regression benchmarks of circuit construction, transpilation, simulation and gate builders
+
+    python -m utils.benchmark --n 4 5 --output benchmark.json
+    python -m utils.benchmark --n 4 5 --baseline benchmark.json
+    python -m utils.benchmark --n 4 5 --modes nested flat --no-gates
+
+results are saved as JSON baselines; with --baseline, metrics worse than the baseline by more than the tolerance
+are reported as regressions (and the exit code is 1)
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import resource
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+
+import qiskit
+from qiskit import Aer, QuantumCircuit
+from qiskit.providers.aer import __version__ as aer_version
+from qiskit.utils import QuantumInstance
+from sympy import factorint
+
+from gates import qft
+from gates.beauregard import constant_adder as beauregard_constant_adder
+from gates.beauregard import modular_exponentiation as beauregard_modular_exponentiation
+from gates.haner import adder as haner_adder
+from gates.haner import carry as haner_carry
+from gates.haner import comparator as haner_comparator
+from gates.haner import constant_adder as haner_constant_adder
+from gates.haner import constant_modulo_adder as haner_constant_modulo_adder
+from gates.haner import constant_modulo_multiplier as haner_constant_modulo_multiplier
+from gates.haner import incrementer as haner_incrementer
+from gates.haner import modular_exponentiation as haner_modular_exponentiation
+from gates.mix import comparator as mix_comparator
+from gates.mix import modular_exponentiation as mix_modular_exponentiation
+from gates.takahashi import comparator as takahashi_comparator
+from gates.takahashi import modular_exponentiation as takahashi_modular_exponentiation
+from utils.gate_cache import gate_cache
+from utils.lazy_gate import LazyGate, define_lazy_gates
+from utils.prebuild_circuits import IMPLEMENTATIONS
+
+logger = logging.getLogger(__name__)
+
+BASELINE_FORMAT = 1
+BASE = 2
+
+# metrics which do not depend on the machine, any increase is a regression
+EXACT_METRICS = {'num_qubits', 'size', 'depth'}
+TIME_TOLERANCE = 0.5
+MEMORY_TOLERANCE = 0.2
+# differences of timings below this many seconds are noise
+MIN_TIME_DIFFERENCE = 0.01
+
+Metrics = Dict[str, float]
+Results = Dict[str, Metrics]
+
+GATE_BUILDERS: Dict[str, Callable[[int, int], Any]] = {
+    'qft.iqft_gate': lambda N, n: qft.iqft_gate(2 * n, do_swaps=True),
+    'beauregard.controlled_phi_adder': lambda N, n: beauregard_constant_adder.controlled_phi_adder(N, n + 1, 2),
+    'beauregard.controlled_modular_multiplication_gate':
+        lambda N, n: beauregard_modular_exponentiation.controlled_modular_multiplication_gate(BASE, N, n),
+    'beauregard.modular_exponentiation_gate':
+        lambda N, n: beauregard_modular_exponentiation.modular_exponentiation_gate(BASE, N, n),
+    'haner.adder': lambda N, n: haner_adder.adder(n),
+    'haner.controlled_adder': lambda N, n: haner_adder.controlled_adder(n),
+    'haner.carry': lambda N, n: haner_carry.carry(N, n),
+    'haner.double_controlled_carry': lambda N, n: haner_carry.double_controlled_carry(N, n),
+    'haner.comparator': lambda N, n: haner_comparator.comparator(N, n),
+    'haner.controlled_constant_adder': lambda N, n: haner_constant_adder.controlled_constant_adder(N, n),
+    'haner.incrementer': lambda N, n: haner_incrementer.incrementer(n),
+    'haner.controlled_incrementer': lambda N, n: haner_incrementer.controlled_incrementer(n),
+    'haner.double_controlled_constant_modulo_adder':
+        lambda N, n: haner_constant_modulo_adder.double_controlled_constant_modulo_adder(BASE, N, n),
+    'haner.controlled_constant_modulo_multiplier':
+        lambda N, n: haner_constant_modulo_multiplier.controlled_constant_modulo_multiplier(BASE, N, n),
+    'haner.controlled_modular_multiplication_gate':
+        lambda N, n: haner_modular_exponentiation.controlled_modular_multiplication_gate(BASE, N, n),
+    'haner.modular_exponentiation_gate':
+        lambda N, n: haner_modular_exponentiation.modular_exponentiation_gate(BASE, N, n),
+    'mix.double_controlled_comparator': lambda N, n: mix_comparator.double_controlled_comparator(N, n),
+    'mix.controlled_modular_multiplication_gate':
+        lambda N, n: mix_modular_exponentiation.controlled_modular_multiplication_gate(BASE, N, n),
+    'mix.modular_exponentiation_gate':
+        lambda N, n: mix_modular_exponentiation.modular_exponentiation_gate(BASE, N, n),
+    'takahashi.double_controlled_comparator': lambda N, n: takahashi_comparator.double_controlled_comparator(N, n),
+    'takahashi.controlled_modular_multiplication_gate':
+        lambda N, n: takahashi_modular_exponentiation.controlled_modular_multiplication_gate(BASE, N, n),
+    'takahashi.modular_exponentiation_gate':
+        lambda N, n: takahashi_modular_exponentiation.modular_exponentiation_gate(BASE, N, n),
+}
+
+
+class Regression(NamedTuple):
+    case: str
+    metric: str
+    baseline: float
+    value: float
+
+
+def modulus(n: int) -> int:
+    """ smallest product of two distinct odd primes with n bits, searched upwards from 2^(n - 1)
+    such products are dense (about one in n / log(n) odd numbers), so only a few candidates are factored
+    """
+    for N in range(pow(2, n - 1) + 1, pow(2, n), 2):
+        factors = factorint(N)
+        if len(factors) == 2 and set(factors.values()) == {1}:
+            return N
+    raise ValueError(f'There is no product of two distinct odd primes with n = {n} bits.')
+
+
+def benchmark_implementations(implementations: Iterable[str],
+                              bit_lengths: Iterable[int],
+                              circuit_types: Iterable[bool] = (False, True),
+                              backend_name: str = 'qasm_simulator',
+                              shots: int = 64,
+                              simulate: bool = True,
+                              isolate: bool = True,
+                              modes: Iterable[bool] = (False,)) -> Results:
+    """ construct, transpile and (with `simulate`) execute the circuit for a = 2 and N = `modulus(n)`
+    `modes` tell whether circuits are constructed nested (False) or flat (True), see `Shor`
+    with `isolate`, every case runs in a fresh process, so its peak memory is not hidden by the previous cases
+    the gate cache is disabled, so every circuit is constructed from scratch
+    """
+    tasks = [(implementation, n, semi_classical, backend_name, shots, simulate, flat)
+             for implementation in implementations
+             for flat in modes
+             for n in bit_lengths
+             for semi_classical in circuit_types]
+
+    results = {}
+    for task in tasks:
+        if isolate:
+            with multiprocessing.get_context('spawn').Pool(processes=1) as pool:
+                key, metrics = pool.apply(_benchmark_implementation, (task,))
+        else:
+            key, metrics = _benchmark_implementation(task)
+        logger.info(f'{key}: {metrics}')
+        results[key] = metrics
+
+    return results
+
+
+def _benchmark_implementation(task: Tuple[str, int, bool, str, int, bool, bool]) -> Tuple[str, Metrics]:
+    implementation, n, semi_classical, backend_name, shots, simulate, flat = task
+    N = modulus(n)
+    quantum_instance = QuantumInstance(Aer.get_backend(backend_name), shots=shots, seed_simulator=0,
+                                       seed_transpiler=0)
+    shor = IMPLEMENTATIONS[implementation](quantum_instance, flat=flat)
+
+    enabled, gate_cache.enabled = gate_cache.enabled, False
+    try:
+        circuit, construction_time = _timed(lambda: _constructed(shor.construct_circuit(BASE, N, semi_classical)))
+    finally:
+        gate_cache.enabled = enabled
+    transpiled, transpile_time = _timed(lambda: quantum_instance.transpile(circuit)[0])
+
+    metrics = {
+        'num_qubits': circuit.num_qubits,
+        'size': transpiled.size(),
+        'depth': transpiled.depth(),
+        'construction_time': construction_time,
+        'transpile_time': transpile_time
+    }
+    if simulate:
+        _, metrics['simulation_time'] = _timed(lambda: quantum_instance.execute(transpiled, had_transpiled=True))
+    metrics['peak_memory'] = _peak_memory()
+
+    circuit_type = 'semi-classical' if semi_classical else 'full'
+    mode = '-flat' if flat else ''
+    return f'shor/{implementation}{mode}/{circuit_type}/n={n}', metrics
+
+
+def compare_modes(results: Results) -> Results:
+    """ for cases benchmarked both nested and flat, differences of flat minus nested timings
+    gates of flat circuits append their operations directly, so their construction takes the time nested circuits
+    leave to transpilation of lazy gates; flat circuits pay off if 'total_time' is negative
+    """
+    comparison = {}
+    for case, flat_metrics in results.items():
+        kind, implementation, *rest = case.split('/')
+        if kind != 'shor' or not implementation.endswith('-flat'):
+            continue
+        nested_case = '/'.join([kind, implementation[:-len('-flat')], *rest])
+        nested_metrics = results.get(nested_case)
+        if nested_metrics is None:
+            continue
+
+        differences = {metric: flat_metrics[metric] - nested_metrics[metric]
+                       for metric in ['construction_time', 'transpile_time', 'simulation_time']
+                       if metric in flat_metrics and metric in nested_metrics}
+        differences['total_time'] = sum(differences.values())
+        comparison[nested_case] = differences
+
+    return comparison
+
+
+def benchmark_gates(bit_lengths: Iterable[int], builders: Optional[Iterable[str]] = None,
+                    repeat: int = 3) -> Results:
+    """ time every gate builder on its own, with constant N = `modulus(n)` (or a = 2 for multipliers)
+    the best of `repeat` runs is taken; the gate cache is disabled, so nested builders are timed as well
+    """
+    builders = list(GATE_BUILDERS) if builders is None else list(builders)
+
+    results = {}
+    enabled, gate_cache.enabled = gate_cache.enabled, False
+    try:
+        for n in bit_lengths:
+            N = modulus(n)
+            for name in builders:
+                build = GATE_BUILDERS[name]
+                times = [_timed(lambda: _constructed(build(N, n)))[1] for _ in range(repeat)]
+                results[f'gate/{name}/n={n}'] = {'construction_time': min(times)}
+    finally:
+        gate_cache.enabled = enabled
+
+    return results
+
+
+def compare(results: Results, baseline: Results,
+            time_tolerance: float = TIME_TOLERANCE,
+            memory_tolerance: float = MEMORY_TOLERANCE) -> List[Regression]:
+    """ metrics of cases present in both results which are worse than the baseline
+    timings may grow by `time_tolerance` (relative), peak memory by `memory_tolerance`, other metrics not at all
+    """
+    regressions = []
+    for case, metrics in results.items():
+        for metric, value in metrics.items():
+            baseline_value = baseline.get(case, {}).get(metric)
+            if baseline_value is None:
+                continue
+
+            if metric in EXACT_METRICS:
+                worse = value > baseline_value
+            elif metric == 'peak_memory':
+                worse = value > baseline_value * (1 + memory_tolerance)
+            else:
+                worse = value > baseline_value * (1 + time_tolerance) and \
+                    value - baseline_value > MIN_TIME_DIFFERENCE
+
+            if worse:
+                regressions.append(Regression(case, metric, baseline_value, value))
+
+    return regressions
+
+
+def save_results(path: Union[str, Path], results: Results) -> None:
+    with open(path, 'w') as file:
+        # simulation times depend on the Aer version, which is recorded on its own
+        json.dump({'format': BASELINE_FORMAT, 'qiskit': dict(qiskit.__qiskit_version__), 'qiskit-aer': aer_version,
+                   'results': results}, file, indent=2, sort_keys=True)
+
+
+def load_results(path: Union[str, Path]) -> Results:
+    with open(path) as file:
+        content = json.load(file)
+    if content.get('format') != BASELINE_FORMAT:
+        raise ValueError(f'Unsupported baseline format in {path}.')
+    return content['results']
+
+
+def _constructed(operation: Any) -> Any:
+    """ construct definitions of lazy gates, so that timings cover the whole construction """
+    if isinstance(operation, LazyGate):
+        operation.define()
+        define_lazy_gates(operation.definition)
+    elif isinstance(operation, QuantumCircuit):
+        define_lazy_gates(operation)
+    return operation
+
+
+def _timed(function: Callable[[], Any]) -> Tuple[Any, float]:
+    start = time.perf_counter()
+    value = function()
+    return value, time.perf_counter() - start
+
+
+def _peak_memory() -> float:
+    """ peak resident set size of the current process in MiB (Unix only) """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def main(args: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Benchmark circuit construction, transpilation and simulation.')
+    parser.add_argument('--implementations', nargs='+', choices=list(IMPLEMENTATIONS), default=list(IMPLEMENTATIONS))
+    parser.add_argument('--n', nargs='+', type=int, default=[4, 5], dest='bit_lengths')
+    parser.add_argument('--circuit-types', nargs='+', choices=['full', 'semi-classical'],
+                        default=['full', 'semi-classical'])
+    parser.add_argument('--modes', nargs='+', choices=['nested', 'flat'], default=['nested'],
+                        help='construction modes of circuits')
+    parser.add_argument('--backend', default='qasm_simulator', help='name of Aer backend')
+    parser.add_argument('--shots', type=int, default=64)
+    parser.add_argument('--no-simulation', action='store_true')
+    parser.add_argument('--no-gates', action='store_true', help='skip benchmarks of separate gate builders')
+    parser.add_argument('--output', help='file to save results to')
+    parser.add_argument('--baseline', help='file with results to compare with')
+    parser.add_argument('--time-tolerance', type=float, default=TIME_TOLERANCE)
+    parser.add_argument('--memory-tolerance', type=float, default=MEMORY_TOLERANCE)
+    args = parser.parse_args(args)
+
+    logging.basicConfig(format='%(message)s')
+    logger.setLevel(logging.INFO)
+
+    circuit_types = [circuit_type == 'semi-classical' for circuit_type in args.circuit_types]
+    modes = [mode == 'flat' for mode in args.modes]
+    results = benchmark_implementations(args.implementations, args.bit_lengths, circuit_types, args.backend,
+                                        args.shots, simulate=not args.no_simulation, modes=modes)
+    for case, differences in compare_modes(results).items():
+        logger.info(f'{case}: flat minus nested ' + ', '.join(f'{metric} {difference:+.3f} s'
+                                                              for metric, difference in differences.items()))
+    if not args.no_gates:
+        results.update(benchmark_gates(args.bit_lengths))
+
+    if args.output:
+        save_results(args.output, results)
+        logger.info(f'Saved {len(results)} results to {args.output}.')
+
+    if args.baseline:
+        regressions = compare(results, load_results(args.baseline), args.time_tolerance, args.memory_tolerance)
+        for regression in regressions:
+            logger.warning(f'Regression in {regression.case}: {regression.metric} '
+                           f'{regression.baseline:.4g} -> {regression.value:.4g}.')
+        logger.info(f'{len(regressions)} regressions.')
+        return 1 if regressions else 0
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,3 +1,8 @@
+from typing import Sequence
+
+import numpy as np
+
+
 def as_bits(x: int, n: int) -> str:
     if x < 0:
         raise ValueError(f'int ({x}) should be >= 0')
@@ -8,3 +13,19 @@ def as_bits(x: int, n: int) -> str:
 
 def as_bits_reversed(x: int, n: int) -> str:
     return as_bits(x, n)[::-1]
+
+
+def gather_bits(indices: np.ndarray, positions: Sequence[int]) -> np.ndarray:
+    """ values made of bits of `indices` at `positions`, bit k of a value is the bit at `positions[k]` """
+    values = np.zeros(len(indices), dtype=np.uint64)
+    for k, position in enumerate(positions):
+        values |= ((indices >> np.uint64(position)) & np.uint64(1)) << np.uint64(k)
+    return values
+
+
+def scatter_bits(values: np.ndarray, positions: Sequence[int]) -> np.ndarray:
+    """ inverse of `gather_bits`, bits of `values` moved to `positions` (other bits are 0) """
+    indices = np.zeros(len(values), dtype=np.uint64)
+    for k, position in enumerate(positions):
+        indices |= ((values >> np.uint64(k)) & np.uint64(1)) << np.uint64(position)
+    return indices
@@ -1,8 +1,203 @@
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
 from qiskit import QuantumRegister, QuantumCircuit
+from qiskit.circuit import ControlledGate, Gate, Instruction, ParameterExpression, ParameterVector, Qubit
+from qiskit.circuit.library import PhaseGate
 
 from utils.custom_typing import Name, QRegsSpec
+from utils.lazy_gate import LazyGate
+from utils.resources import LEAF_OPERATIONS, IGNORED_OPERATIONS
+
+# leaf operation with indices of its qubits and clbits in the flattened instruction
+FlatOperation = Tuple[Instruction, List[int], List[int]]
+# registers given to bodies of block gates, quantum registers of the definition or lists of qubits of another circuit
+Registers = List[Sequence[Qubit]]
+Body = Callable[..., None]
 
 
 def create_circuit(regs: QRegsSpec, name: Name) -> QuantumCircuit:
-    qregs = [QuantumRegister(size, name=name) for name, size in regs.items()]
+    qregs = [QuantumRegister(size, name=name) for name, size in regs.items() if size > 0]
     return QuantumCircuit(*qregs, name=name)
+
+
+def block_gate(name: Name, regs: QRegsSpec, body: Body, *args: Any) -> Gate:
+    """ gate with operations appended by `body(circuit, qregs, *args)`, see `BlockGate`
+    bodies with parameters (also of gates given as arguments) are built right away, as Qiskit tracks parameters
+    of gates through their `params`, which lazy gates do not know before they are defined
+    """
+    if _is_parameterized(args):
+        circuit = create_circuit(regs, name)
+        body(circuit, _registers(regs, circuit.qubits), *args)
+        return circuit.to_gate()
+    return BlockGate(name, regs, body, *args)
+
+
+class BlockGate(LazyGate):
+    """ lazy gate whose operations are appended by `body(circuit, qregs, *args)` to a circuit, on registers
+    of sizes given by `regs`: to its own definition, or by `emit` directly to another circuit, on given qubits
+    of that circuit, so a `FlatCircuit` receives leaf operations without definitions constructed and unrolled;
+    the body must address qubits through `qregs` only (not through `circuit.qubits`)
+    """
+
+    def __init__(self, name: Name, regs: QRegsSpec, body: Body, *args: Any) -> None:
+        super().__init__(name, sum(regs.values()))
+        self.regs = regs
+        self.body = body
+        self.args = args
+        self._inverse = None
+
+    def emit(self, circuit: QuantumCircuit, qubits: Sequence[Qubit]) -> None:
+        self.body(circuit, _registers(self.regs, qubits), *self.args)
+
+    def inverse(self) -> 'InverseBlockGate':
+        if self._inverse is None:
+            self._inverse = InverseBlockGate(self)
+        return self._inverse
+
+    def flat_definition(self) -> 'FlatCircuit':
+        """ definition consisting of leaf operations, emitted by the body """
+        circuit = FlatCircuit(*create_circuit(self.regs, self.name).qregs, name=self.name)
+        self.emit(circuit, circuit.qubits)
+        return circuit
+
+    def _build(self) -> QuantumCircuit:
+        circuit = create_circuit(self.regs, self.name)
+        self.body(circuit, _registers(self.regs, circuit.qubits), *self.args)
+        return circuit
+
+
+class InverseBlockGate(LazyGate):
+    """ inverse of a block gate, emitted as the reversed operations of the block, each inverted """
+
+    def __init__(self, block: BlockGate) -> None:
+        super().__init__(f'{block.name}_dg', block.num_qubits)
+        self.block = block
+
+    def emit(self, circuit: QuantumCircuit, qubits: Sequence[Qubit]) -> None:
+        # operations of the block are known only once emitted, in order
+        operations = FlatCircuit(self.num_qubits)
+        operations.append(self.block, operations.qubits)
+        indices = {qubit: i for i, qubit in enumerate(operations.qubits)}
+        for instruction, qargs, cargs in reversed(operations.data):
+            circuit._append(instruction.inverse(), [qubits[indices[qubit]] for qubit in qargs], cargs)
+
+    def inverse(self) -> BlockGate:
+        return self.block
+
+    def _build(self) -> QuantumCircuit:
+        return self.block.definition.inverse()
+
+
+class FlatCircuit(QuantumCircuit):
+    """ circuit of LEAF_OPERATIONS only: block gates appended to it emit their operations directly into it,
+    block gates with leaf-only definitions (e.g. constructed in worker processes, see `BlockGate.flat_definition`)
+    are copied, and other composite instructions are replaced by their definitions, see `flatten`
+    """
+
+    def __init__(self, *regs, name: Optional[str] = None, global_phase: float = 0,
+                 metadata: Optional[Dict[str, Any]] = None) -> None:
+        super().__init__(*regs, name=name, global_phase=global_phase, metadata=metadata)
+        self._flattener = _Flattener()
+
+    def _append(self, instruction: Instruction, qargs: List[Qubit], cargs: list) -> Instruction:
+        # block gates are checked first, as `_is_leaf` would construct their definitions
+        is_block = isinstance(instruction, (BlockGate, InverseBlockGate))
+        if not is_block and _is_leaf(instruction):
+            return super()._append(instruction, qargs, cargs)
+        if instruction.condition is not None:
+            raise ValueError(f'Cannot flatten conditioned composite instruction {instruction.name}.')
+
+        if is_block and not isinstance(instruction._definition, FlatCircuit):
+            instruction.emit(self, qargs)
+            return instruction
+
+        for operation, qubits, clbits in self._flattener.operations(instruction):
+            super()._append(operation, [qargs[i] for i in qubits], [cargs[i] for i in clbits])
+        return instruction
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # flattened definitions are a cache, not a part of the circuit
+        state = self.__dict__.copy()
+        state['_flattener'] = _Flattener()
+        return state
+
+
+def flatten(circuit: QuantumCircuit) -> QuantumCircuit:
+    """ copy of circuit with composite instructions replaced by their definitions, recursively, down to
+    LEAF_OPERATIONS; controls of controlled composite gates are moved to the leaves, as `circuit_resources` counts them
+    block gates emit their operations, definitions of other instructions are flattened once for every distinct
+    instruction, so shared (cached) gates are cheap
+    """
+    flat = FlatCircuit(*circuit.qregs, *circuit.cregs, name=circuit.name, global_phase=circuit.global_phase,
+                       metadata=circuit.metadata)
+
+    for instruction, qargs, cargs in circuit.data:
+        flat._append(instruction, qargs, cargs)
+
+    return flat
+
+
+def _registers(regs: QRegsSpec, qubits: Sequence[Qubit]) -> Registers:
+    registers, start = [], 0
+    for size in regs.values():
+        registers.append(qubits[start:start + size])
+        start += size
+    return registers
+
+
+def _is_parameterized(value: Any) -> bool:
+    if isinstance(value, (ParameterExpression, ParameterVector)):
+        return True
+    if isinstance(value, Instruction):
+        return any(_is_parameterized(param) for param in value.params)
+    if isinstance(value, (list, tuple)):
+        return any(_is_parameterized(item) for item in value)
+    return False
+
+
+def _is_leaf(operation: Instruction) -> bool:
+    return operation.name in LEAF_OPERATIONS or operation.name in IGNORED_OPERATIONS or operation.definition is None
+
+
+class _Flattener:
+    def __init__(self) -> None:
+        self._cache: Dict[Tuple[int, int], Tuple[Instruction, List[FlatOperation]]] = {}
+
+    def operations(self, operation: Instruction, num_ctrl_qubits: int = 0) -> List[FlatOperation]:
+        if _is_leaf(operation):
+            if num_ctrl_qubits:
+                operation = operation.control(num_ctrl_qubits)
+            return [(operation, list(range(operation.num_qubits)), list(range(operation.num_clbits)))]
+
+        key = (id(operation), num_ctrl_qubits)
+        if key not in self._cache:
+            all_ones = pow(2, operation.num_ctrl_qubits) - 1 if isinstance(operation, ControlledGate) else None
+            if isinstance(operation, ControlledGate) and operation.ctrl_state == all_ones:
+                base_operations = self.operations(operation.base_gate, num_ctrl_qubits + operation.num_ctrl_qubits)
+            else:
+                base_operations = self._definition_operations(operation.definition, num_ctrl_qubits)
+            self._cache[key] = (operation, base_operations)
+        return self._cache[key][1]
+
+    def _definition_operations(self, circuit: QuantumCircuit, num_ctrl_qubits: int) -> List[FlatOperation]:
+        controls = list(range(num_ctrl_qubits))
+        qubit_indices = {qubit: i + num_ctrl_qubits for i, qubit in enumerate(circuit.qubits)}
+        clbit_indices = {clbit: i for i, clbit in enumerate(circuit.clbits)}
+
+        operations = []
+        if num_ctrl_qubits and circuit.global_phase:
+            phase = PhaseGate(circuit.global_phase)
+            phase = phase.control(num_ctrl_qubits - 1) if num_ctrl_qubits > 1 else phase
+            operations.append((phase, controls, []))
+
+        for instruction, qargs, cargs in circuit.data:
+            qubits = [qubit_indices[qubit] for qubit in qargs]
+            clbits = [clbit_indices[clbit] for clbit in cargs]
+            for operation, operation_qubits, operation_clbits in self.operations(instruction, num_ctrl_qubits):
+                # controls come first in qubits of controlled operations
+                all_qubits = [*controls, *qubits]
+                operations.append((operation,
+                                   [all_qubits[i] for i in operation_qubits],
+                                   [clbits[i] for i in operation_clbits]))
+
+        return operations
@@ -0,0 +1,121 @@
+import hashlib
+import logging
+import os
+import pickle
+import tempfile
+from functools import lru_cache
+from pathlib import Path
+from typing import NamedTuple, Optional, Union
+
+import numpy as np
+import qiskit
+from qiskit import QuantumCircuit
+from qiskit.utils import QuantumInstance
+
+logger = logging.getLogger(__name__)
+
+STORE_FORMAT = 1
+SOURCE_PACKAGES = ['gates', 'implementations', 'utils']
+
+
+class CircuitKey(NamedTuple):
+    implementation: str
+    a: int
+    N: int
+    semi_classical: bool
+    measurement: bool
+    target: Optional[str]
+
+
+class CircuitStore:
+    """ on-disk store of constructed (target None) and transpiled order finding circuits
+    entries are bound to the versions of Qiskit Terra, Aer and NumPy (which pickled circuits and transpilation
+    depend on) and to the sources of gate builders, so they are never stale; unreadable entries are misses
+    """
+
+    def __init__(self, directory: Union[str, Path]) -> None:
+        self._directory = Path(directory)
+        self._directory.mkdir(parents=True, exist_ok=True)
+
+    @property
+    def directory(self) -> Path:
+        return self._directory
+
+    def load(self, key: CircuitKey) -> Optional[QuantumCircuit]:
+        path = self._path(key)
+        if not path.exists():
+            return None
+
+        try:
+            with open(path, 'rb') as file:
+                entry = pickle.load(file)
+            if entry.get('key') != self._full_key(key):
+                return None
+            circuit = entry['circuit']
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError, KeyError, TypeError) \
+                as error:
+            logger.warning(f'Skipping unreadable circuit store entry {path}: {error}.')
+            return None
+
+        logger.debug(f'Loaded {key} from circuit store.')
+        return circuit
+
+    def save(self, key: CircuitKey, circuit: QuantumCircuit) -> None:
+        path = self._path(key)
+        entry = {'key': self._full_key(key), 'circuit': circuit}
+
+        # concurrent writers (e.g. prebuild workers) must never expose partially written entries
+        descriptor, temporary = tempfile.mkstemp(dir=self._directory, suffix='.tmp')
+        try:
+            with os.fdopen(descriptor, 'wb') as file:
+                pickle.dump(entry, file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temporary, path)
+        except BaseException:
+            os.unlink(temporary)
+            raise
+
+        logger.debug(f'Saved {key} to circuit store.')
+
+    def clear(self) -> None:
+        for path in self._directory.glob('*.pickle'):
+            path.unlink()
+
+    def __contains__(self, key: CircuitKey) -> bool:
+        return self._path(key).exists()
+
+    def __len__(self) -> int:
+        return len(list(self._directory.glob('*.pickle')))
+
+    def _path(self, key: CircuitKey) -> Path:
+        digest = hashlib.sha256(repr(self._full_key(key)).encode()).hexdigest()
+        return self._directory / f'{digest}.pickle'
+
+    @staticmethod
+    def _full_key(key: CircuitKey) -> tuple:
+        versions = qiskit.__qiskit_version__
+        return (*key, STORE_FORMAT, versions['qiskit-terra'], versions['qiskit-aer'], np.__version__,
+                source_digest())
+
+
+def transpilation_target(quantum_instance) -> Optional[str]:
+    """ describe the transpilation done by the quantum instance, None when it cannot be described """
+    if not isinstance(quantum_instance, QuantumInstance) or getattr(quantum_instance, '_pass_manager', None):
+        return None
+
+    basis_gates = quantum_instance.backend_config['basis_gates'] or \
+        quantum_instance.backend.configuration().basis_gates
+    coupling_map = quantum_instance.backend_config['coupling_map']
+    compile_config = sorted(quantum_instance.compile_config.items())
+
+    return repr((quantum_instance.backend_name, sorted(basis_gates), str(coupling_map), compile_config))
+
+
+@lru_cache(maxsize=None)
+def source_digest() -> str:
+    root = Path(__file__).resolve().parent.parent
+    digest = hashlib.sha256()
+    for package in SOURCE_PACKAGES:
+        for path in sorted((root / package).rglob('*.py')):
+            digest.update(path.relative_to(root).as_posix().encode())
+            digest.update(path.read_bytes())
+    return digest.hexdigest()
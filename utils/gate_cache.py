@@ -0,0 +1,208 @@
+from collections import OrderedDict
+from functools import partial, wraps
+from inspect import signature
+from threading import RLock
+from typing import Any, Callable, Dict, Hashable, NamedTuple, Optional, Tuple, TypeVar
+
+from qiskit import QuantumCircuit
+
+Builder = TypeVar('Builder', bound=Callable[..., Any])
+CacheKey = Tuple[Hashable, ...]
+
+# rough memory footprint of a single instruction in a definition (object, qargs and cargs tuples)
+INSTRUCTION_BYTES = 512
+BASE_BYTES = 1024
+
+
+class CacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    entries: int
+    bytes: int
+    max_entries: Optional[int]
+    max_bytes: Optional[int]
+
+
+def _locked(method: Callable) -> Callable:
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+
+    return wrapper
+
+
+class GateCache:
+    """ bounded LRU cache of constructed gates
+    entries are evicted (least recently used first) when either the number of entries
+    or the estimated memory footprint exceeds its limit; `None` means unlimited;
+    every operation holds a reentrant lock, so the cache can be shared by threads constructing gates
+    (`update_size` is called by lazy gates defined while other operations of the same thread may run)
+    """
+
+    def __init__(self, max_entries: Optional[int] = 4096, max_bytes: Optional[int] = 512 * 1024 * 1024) -> None:
+        self._entries: 'OrderedDict[CacheKey, Tuple[Any, int]]' = OrderedDict()
+        # keys of stored values by their ids, for `update_size`
+        self._keys: Dict[int, CacheKey] = {}
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._builder_stats: Dict[str, Tuple[int, int]] = {}
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._lock = RLock()
+        self.enabled = True
+
+    @_locked
+    def get(self, key: CacheKey) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            self._record(key, hit=False)
+            return None
+
+        self._entries.move_to_end(key)
+        self._record(key, hit=True)
+        return entry[0]
+
+    @_locked
+    def put(self, key: CacheKey, value: Any) -> None:
+        if key in self._entries:
+            self._remove(key)
+
+        size = estimate_bytes(value)
+        if self._max_bytes is not None and size > self._max_bytes:
+            return
+
+        self._entries[key] = (value, size)
+        self._keys[id(value)] = key
+        self._bytes += size
+        self._evict()
+
+    @_locked
+    def update_size(self, value: Any) -> None:
+        """ estimate the footprint of a stored value again, e.g. of a lazy gate whose definition was constructed
+        after it was stored; called by `LazyGate` for every constructed definition, values not stored are ignored
+        """
+        key = self._keys.get(id(value))
+        if key is None:
+            return
+
+        _, size = self._entries[key]
+        new_size = estimate_bytes(value)
+        self._entries[key] = (value, new_size)
+        self._bytes += new_size - size
+        self._evict()
+
+    @_locked
+    def resize(self, max_entries: Optional[int] = None, max_bytes: Optional[int] = None) -> None:
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._evict()
+
+    @_locked
+    def clear(self) -> None:
+        self._entries.clear()
+        self._keys.clear()
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._builder_stats.clear()
+
+    @_locked
+    def info(self) -> CacheInfo:
+        return CacheInfo(self._hits, self._misses, len(self._entries), self._bytes,
+                         self._max_entries, self._max_bytes)
+
+    @_locked
+    def builder_stats(self) -> Dict[str, Tuple[int, int]]:
+        """ return (hits, misses) for each cached builder """
+        return dict(self._builder_stats)
+
+    @_locked
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @_locked
+    def __contains__(self, key: CacheKey) -> bool:
+        return key in self._entries
+
+    def _record(self, key: CacheKey, hit: bool) -> None:
+        builder = key[0]
+        hits, misses = self._builder_stats.get(builder, (0, 0))
+        if hit:
+            self._hits += 1
+            self._builder_stats[builder] = (hits + 1, misses)
+        else:
+            self._misses += 1
+            self._builder_stats[builder] = (hits, misses + 1)
+
+    def _evict(self) -> None:
+        while self._entries and self._over_limit():
+            self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: CacheKey) -> None:
+        value, size = self._entries.pop(key)
+        self._keys.pop(id(value), None)
+        self._bytes -= size
+
+    def _over_limit(self) -> bool:
+        too_many = self._max_entries is not None and len(self._entries) > self._max_entries
+        too_big = self._max_bytes is not None and self._bytes > self._max_bytes
+        return too_many or too_big
+
+
+def estimate_bytes(value: Any) -> int:
+    """ lazy gates not defined yet count as BASE_BYTES, their entries grow by `GateCache.update_size` """
+    if isinstance(value, tuple):
+        return sum(estimate_bytes(item) for item in value)
+
+    # `_definition`, as accessing `definition` would construct definitions of lazy gates
+    definition = value if isinstance(value, QuantumCircuit) else getattr(value, '_definition', None)
+    if definition is None:
+        return BASE_BYTES
+    return BASE_BYTES + len(definition.data) * INSTRUCTION_BYTES
+
+
+gate_cache = GateCache()
+
+
+def exact_from_n(n: int, **_) -> int:
+    """ gates of n qubit arithmetic transform at most n + 1 qubits, which keeps every rotation from degree n """
+    return n
+
+
+def cached_gate(builder: Optional[Builder] = None, *, exact_from: Callable[..., int] = exact_from_n) -> Builder:
+    """ memoize gate builder in the shared gate cache
+    key consists of builder name and its arguments (constant, N, n, ...), which have to be hashable;
+    `approximation_degree` of at least `exact_from(**arguments)` keeps every rotation, so it is keyed as None;
+    returned gates are shared between callers and must not be modified in place
+    """
+    if builder is None:
+        return partial(cached_gate, exact_from=exact_from)
+
+    name = f'{builder.__module__}.{builder.__qualname__}'
+    builder_signature = signature(builder)
+
+    def cache_key(*args, **kwargs) -> CacheKey:
+        bound = builder_signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        arguments = bound.arguments
+        degree = arguments.get('approximation_degree')
+        if degree is not None and 'n' in arguments and degree >= exact_from(**arguments):
+            arguments['approximation_degree'] = None
+        return name, *arguments.values()
+
+    @wraps(builder)
+    def wrapper(*args, **kwargs):
+        if not gate_cache.enabled:
+            return builder(*args, **kwargs)
+
+        key = cache_key(*args, **kwargs)
+        value = gate_cache.get(key)
+        if value is None:
+            value = builder(*args, **kwargs)
+            gate_cache.put(key, value)
+        return value
+
+    wrapper.cache_key = cache_key
+    return wrapper
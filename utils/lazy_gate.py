@@ -0,0 +1,51 @@
+from abc import ABC, abstractmethod
+from typing import Optional
+
+from qiskit import QuantumCircuit
+from qiskit.circuit import Gate
+
+from utils.gate_cache import gate_cache
+
+
+class LazyGate(Gate, ABC):
+    """ gate with the definition constructed by `_build` on first access of `definition`
+    circuits containing it can be created, drawn and counted (by qubits) without constructing the definition tree;
+    the cost moves to passes that need the decomposition (transpilation, simulation, resource counting)
+    """
+
+    def __init__(self, name: str, num_qubits: int, label: Optional[str] = None) -> None:
+        super().__init__(name, num_qubits, [], label=label)
+
+    @property
+    def is_defined(self) -> bool:
+        return self._definition is not None
+
+    def define(self, definition: Optional[QuantumCircuit] = None) -> None:
+        """ construct the definition now, unless it is already constructed
+        a given `definition`, constructed elsewhere (e.g. in a worker process), is taken instead of `_build`
+        """
+        if self._definition is None:
+            self._define(definition)
+
+    def _define(self, definition: Optional[QuantumCircuit] = None) -> None:
+        self.definition = self._build() if definition is None else definition
+        # the gate was stored in the gate cache with the size of an undefined gate
+        gate_cache.update_size(self)
+
+    @abstractmethod
+    def _build(self) -> QuantumCircuit:
+        pass
+
+
+def define_lazy_gates(circuit: QuantumCircuit) -> None:
+    """ construct definitions of all lazy gates in the circuit, including those nested in definitions of lazy gates
+    e.g. before the circuit is pickled, so that the receiver does not have to construct them again
+    """
+    visited = set()
+    circuits = [circuit]
+    while circuits:
+        for instruction, _, _ in circuits.pop().data:
+            if isinstance(instruction, LazyGate) and id(instruction) not in visited:
+                visited.add(id(instruction))
+                instruction.define()
+                circuits.append(instruction.definition)
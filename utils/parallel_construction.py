@@ -0,0 +1,157 @@
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from threading import Lock, local
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+from qiskit.circuit import Instruction
+from qiskit.utils.validation import validate_min
+
+from utils.circuit_creation import BlockGate
+from utils.gate_cache import gate_cache
+from utils.lazy_gate import LazyGate, define_lazy_gates
+
+# pool used by the current thread and whether it constructs flat definitions, set by `parallel_construction`
+_local = local()
+
+
+class ConstructionPool:
+    """ pool of `processes` worker processes constructing independent gates, see `parallel_construction`
+    workers are started when a thread starts using the pool and stopped when no thread uses it anymore,
+    so threads constructing circuits concurrently (e.g. attempts of `Shor.factorize`) share them
+    """
+
+    def __init__(self, processes: int) -> None:
+        validate_min('processes', processes, 1)
+        self._processes = processes
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._users = 0
+        self._lock = Lock()
+
+    @property
+    def processes(self) -> int:
+        return self._processes
+
+    def map(self, function: Callable[[Any], Any], tasks: Sequence[Any]) -> List[Any]:
+        with self._lock:
+            executor = self._executor
+        return list(executor.map(function, tasks))
+
+    def _acquire(self) -> None:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self._processes, initializer=_reset_pool)
+            self._users += 1
+
+    def _release(self) -> None:
+        with self._lock:
+            self._users -= 1
+            executor = None
+            if self._users == 0:
+                executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown()
+
+
+@contextmanager
+def parallel_construction(pool: Union[int, ConstructionPool], flat: bool = False) -> Iterator[None]:
+    """ within the context, `build_gates` and `define_gates` called by this thread construct independent gates
+    in the pool (a new pool of that many processes for an integer)
+    with a single process (or when the thread already uses a pool) gates are constructed in the calling thread
+    with `flat`, block gates are defined by their leaf operations (see `BlockGate.flat_definition`), which flat
+    circuits take as they are
+    """
+    if not isinstance(pool, ConstructionPool):
+        pool = ConstructionPool(pool)
+    was_flat, _local.flat = _is_flat(), flat
+    if pool.processes == 1 or _current_pool() is not None:
+        try:
+            yield
+        finally:
+            _local.flat = was_flat
+        return
+
+    pool._acquire()
+    _local.pool = pool
+    try:
+        yield
+    finally:
+        _local.pool = None
+        _local.flat = was_flat
+        pool._release()
+
+
+def build_gates(builder: Callable[..., Any], arguments: Sequence[Tuple]) -> List[Any]:
+    """ return [builder(*args) for args in arguments], for a builder decorated with `cached_gate`
+    inside `parallel_construction`, gates missing from the gate cache are constructed in worker processes,
+    sent back pickled and put into the gate cache in order, as if they were constructed here
+    """
+    if gate_cache.enabled:
+        missing = [i for i, args in enumerate(arguments) if builder.cache_key(*args) not in gate_cache]
+    else:
+        missing = list(range(len(arguments)))
+
+    pool = _current_pool()
+    if pool is None or len(missing) < 2:
+        return [builder(*args) for args in arguments]
+
+    built = dict(zip(missing, pool.map(_build, [(builder, arguments[i], _is_flat()) for i in missing])))
+    gates = []
+    for i, args in enumerate(arguments):
+        if i in built:
+            gate = built[i]
+            if gate_cache.enabled:
+                gate_cache.put(builder.cache_key(*args), gate)
+        else:
+            gate = builder(*args)
+        gates.append(gate)
+    return gates
+
+
+def define_gates(gates: Iterable[Instruction]) -> None:
+    """ construct definitions of the lazy gates among `gates`, e.g. of multipliers appended to a circuit one by one
+    inside `parallel_construction`, missing definitions are constructed in worker processes and sent back pickled
+    """
+    undefined = {id(gate): gate for gate in gates if isinstance(gate, LazyGate) and not gate.is_defined}
+    undefined = list(undefined.values())
+
+    pool = _current_pool()
+    if pool is None or len(undefined) < 2:
+        for gate in undefined:
+            _define(gate, _is_flat())
+        return
+
+    for gate, defined in zip(undefined, pool.map(_define_task, [(gate, _is_flat()) for gate in undefined])):
+        gate.define(defined.definition)
+
+
+def _current_pool() -> Optional[ConstructionPool]:
+    return getattr(_local, 'pool', None)
+
+
+def _is_flat() -> bool:
+    return getattr(_local, 'flat', False)
+
+
+def _build(task: Tuple[Callable[..., Any], Tuple, bool]) -> Any:
+    builder, args, flat = task
+    return _define(builder(*args), flat)
+
+
+def _define_task(task: Tuple[Any, bool]) -> Any:
+    return _define(*task)
+
+
+def _define(gate: Any, flat: bool) -> Any:
+    # lazy gates are sent back with their definitions, which are the expensive part,
+    # including definitions of the lazy gates they consist of
+    if isinstance(gate, BlockGate) and flat:
+        gate.define(gate.flat_definition())
+    elif isinstance(gate, LazyGate):
+        gate.define()
+        define_lazy_gates(gate.definition)
+    return gate
+
+
+def _reset_pool() -> None:
+    # forked workers inherit the pool of the forking thread, their builders have to run in place
+    _local.pool = None
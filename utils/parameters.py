@@ -0,0 +1,117 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from qiskit import QuantumCircuit
+from qiskit.circuit import Instruction, ParameterExpression
+from qiskit.circuit.library import XGate
+
+# phase gates whose H P(b) H on the target flips it when b = pi
+PHASE_FLIPS = {'p', 'cp', 'mcphase'}
+
+
+def vector_values(name: str, values: Iterable[float]) -> Dict[str, float]:
+    """ return values of elements of ParameterVector with given name, keyed by names of the elements """
+    return {f'{name}[{i}]': float(value) for i, value in enumerate(values)}
+
+
+def bind_by_name(circuit: QuantumCircuit, values: Dict[str, float]) -> QuantumCircuit:
+    """ assign values to parameters of circuit (also of its transpiled or deserialized copy) by their names """
+    missing = [parameter.name for parameter in circuit.parameters if parameter.name not in values]
+    if missing:
+        raise ValueError(f'Missing values of parameters: {", ".join(missing[:5])}.')
+
+    return circuit.assign_parameters({parameter: values[parameter.name] for parameter in circuit.parameters})
+
+
+def simplify_bound_phases(circuit: QuantumCircuit) -> QuantumCircuit:
+    """ replace H P(b) H on the same qubit, which parameterized gates use for X^(b / pi), by nothing for b = 0
+    and by X for b = pi once bound, also controlled (CP, MCPhase) and inside definitions of gates;
+    returns the circuit itself when nothing is replaced
+    """
+    return _simplify_bound_phases(circuit, {})
+
+
+def _simplify_bound_phases(circuit: QuantumCircuit, simplified: Dict[int, Instruction]) -> QuantumCircuit:
+    data = []
+    for instruction, qargs, cargs in circuit.data:
+        # gates defined on first access (standard and undefined lazy gates) are never parameterized
+        definition = getattr(instruction, '_definition', None)
+        if definition is not None:
+            if id(instruction) not in simplified:
+                simplified[id(instruction)] = _with_definition(instruction,
+                                                               _simplify_bound_phases(definition, simplified))
+            instruction = simplified[id(instruction)]
+        data.append((instruction, qargs, cargs))
+
+    replaced = _replace_phase_flips(data)
+    if replaced is None and all(new is old for (new, _, _), (old, _, _) in zip(data, circuit.data)):
+        return circuit
+
+    result = QuantumCircuit(*circuit.qregs, *circuit.cregs, name=circuit.name, global_phase=circuit.global_phase)
+    result.metadata = circuit.metadata
+    for instruction, qargs, cargs in data if replaced is None else replaced:
+        result._append(instruction, qargs, cargs)
+    return result
+
+
+def _replace_phase_flips(data: List[Tuple[Instruction, list, list]]) -> Optional[List[Tuple[Instruction, list, list]]]:
+    # indices of the previous and the next instruction on the target qubit of every instruction
+    previous, following, last = {}, {}, {}
+    for i, (_, qargs, _) in enumerate(data):
+        if qargs:
+            target = qargs[-1]
+            previous[i] = last.get(target)
+        for qubit in qargs:
+            if qubit in last and data[last[qubit]][1][-1] == qubit:
+                following[last[qubit]] = i
+            last[qubit] = i
+
+    removed, replacements = set(), {}
+    for i, (instruction, qargs, _) in enumerate(data):
+        if instruction.name not in PHASE_FLIPS or instruction.condition is not None:
+            continue
+        angle = instruction.params[0]
+        if isinstance(angle, ParameterExpression):
+            if angle.parameters:
+                continue
+            angle = float(angle)
+        angle %= 2 * np.pi
+        before, after = previous.get(i), following.get(i)
+        if before is None or after is None or before in removed or after in removed or \
+                not _is_hadamard(data[before]) or not _is_hadamard(data[after]):
+            continue
+
+        if np.isclose(angle, 0) or np.isclose(angle, 2 * np.pi):
+            replacements[i] = None
+        elif np.isclose(angle, np.pi):
+            replacements[i] = XGate().control(len(qargs) - 1) if len(qargs) > 1 else XGate()
+        else:
+            continue
+        removed.update([before, after])
+
+    if not replacements:
+        return None
+
+    result = []
+    for i, (instruction, qargs, cargs) in enumerate(data):
+        if i in removed:
+            continue
+        if i in replacements:
+            if replacements[i] is not None:
+                result.append((replacements[i], qargs, cargs))
+            continue
+        result.append((instruction, qargs, cargs))
+    return result
+
+
+def _is_hadamard(operation: Tuple[Instruction, list, list]) -> bool:
+    instruction, qargs, _ = operation
+    return instruction.name == 'h' and len(qargs) == 1 and instruction.condition is None
+
+
+def _with_definition(instruction: Instruction, definition: QuantumCircuit) -> Instruction:
+    if definition is instruction.definition:
+        return instruction
+    copy = instruction.copy()
+    copy.definition = definition
+    return copy
@@ -0,0 +1,111 @@
+""" pre-build order finding circuits into a circuit store
+
+    python -m utils.prebuild_circuits --store .circuits --implementations mix haner --N 15 21 --a 2 4 7 \\
+        --backend qasm_simulator --processes 4
+
+options of the implementations that change circuits (--flat, --known-input, --bind-bases, --approximation-degree)
+are part of the keys of stored circuits, so they have to match the options of the Shor instances loading them
+"""
+import argparse
+import logging
+import math
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from qiskit import Aer
+
+from implementations.beauregard import BeauregardShor
+from implementations.haner import HanerShor
+from implementations.mix import MixShor
+from implementations.takahashi import TakahashiShor
+from utils.circuit_store import CircuitStore
+
+logger = logging.getLogger(__name__)
+
+IMPLEMENTATIONS = {
+    'mix': MixShor,
+    'beauregard': BeauregardShor,
+    'takahashi': TakahashiShor,
+    'haner': HanerShor
+}
+
+Task = Tuple[str, Optional[int], int, bool]
+
+
+def prebuild(store_directory: str,
+             implementations: Iterable[str],
+             moduli: Iterable[int],
+             bases: Iterable[int],
+             circuit_types: Iterable[bool] = (False, True),
+             backend_name: Optional[str] = None,
+             processes: int = 1,
+             options: Optional[Dict[str, Any]] = None) -> List[Task]:
+    """ construct every valid combination, return built combinations
+    with `backend_name`, circuits are also transpiled for QuantumInstance of the Aer backend with default settings
+    pairs (a, N) with a >= N or gcd(a, N) != 1 are skipped
+    `options` are keyword arguments of the implementations (e.g. flat or approximation_degree); with `bind_bases`,
+    the single circuit parameterized by a is built for every N (a = None in returned combinations)
+    """
+    options = options or {}
+    bases = [None] if options.get('bind_bases') else list(bases)
+    tasks = [
+        (implementation, a, N, semi_classical)
+        for implementation in implementations
+        for N in moduli
+        for a in bases
+        if a is None or 1 < a < N and math.gcd(a, N) == 1
+        for semi_classical in circuit_types
+    ]
+
+    arguments = [(store_directory, backend_name, options, task) for task in tasks]
+    if processes > 1:
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            list(executor.map(_build, arguments))
+    else:
+        for argument in arguments:
+            _build(argument)
+
+    return tasks
+
+
+def _build(argument: Tuple[str, Optional[str], Dict[str, Any], Task]) -> None:
+    store_directory, backend_name, options, (implementation, a, N, semi_classical) = argument
+    shor = IMPLEMENTATIONS[implementation](circuit_store=CircuitStore(store_directory), **options)
+
+    if backend_name is None:
+        shor.construct_circuit(a, N, semi_classical)
+    else:
+        shor.quantum_instance = Aer.get_backend(backend_name)
+        shor.transpile_circuit(a, N, semi_classical)
+
+    logger.info(f'Built {implementation} circuit for a = {a}, N = {N}, semi_classical = {semi_classical}.')
+
+
+def main(args: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description='Pre-build order finding circuits into a circuit store.')
+    parser.add_argument('--store', required=True, help='directory of the circuit store')
+    parser.add_argument('--implementations', nargs='+', choices=list(IMPLEMENTATIONS), default=list(IMPLEMENTATIONS))
+    parser.add_argument('--N', nargs='+', type=int, required=True, dest='moduli')
+    parser.add_argument('--a', nargs='+', type=int, required=True, dest='bases')
+    parser.add_argument('--circuit-types', nargs='+', choices=['full', 'semi-classical'],
+                        default=['full', 'semi-classical'])
+    parser.add_argument('--backend', default=None, help='name of Aer backend to transpile circuits for')
+    parser.add_argument('--processes', type=int, default=1)
+    parser.add_argument('--flat', action='store_true', help='construct circuits of leaf operations')
+    parser.add_argument('--known-input', action='store_true', help='load the first multiplier as a constant')
+    parser.add_argument('--bind-bases', action='store_true', help='build circuits parameterized by a instead')
+    parser.add_argument('--approximation-degree', type=int, default=None)
+    args = parser.parse_args(args)
+
+    logging.basicConfig(format='%(message)s')
+    logger.setLevel(logging.INFO)
+    circuit_types = [circuit_type == 'semi-classical' for circuit_type in args.circuit_types]
+    options = {name: getattr(args, name) for name in ['flat', 'known_input', 'bind_bases', 'approximation_degree']
+               if getattr(args, name)}
+    tasks = prebuild(args.store, args.implementations, args.moduli, args.bases, circuit_types, args.backend,
+                     args.processes, options)
+    logger.info(f'Built {len(tasks)} circuits into {args.store}.')
+
+
+if __name__ == '__main__':
+    main()
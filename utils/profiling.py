@@ -0,0 +1,69 @@
+import cProfile
+import pstats
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Callable, Iterator, List, NamedTuple, Optional
+
+
+class Span(NamedTuple):
+    """ duration of a phase of get_order in seconds, peak_memory in bytes is measured only with tracemalloc """
+    phase: str
+    duration: float
+    peak_memory: Optional[int] = None
+
+
+SpanCallback = Callable[[Span], None]
+
+
+class Profiling(NamedTuple):
+    """ what to capture besides durations of phases
+    `callback` is called with every finished span, e.g. to ship it to a metrics pipeline
+    """
+    cprofile: bool = False
+    tracemalloc: bool = False
+    callback: Optional[SpanCallback] = None
+
+
+class PhaseRecorder:
+    """ records spans of phases, with cProfile enabled only inside them
+    peak memory is not measured when tracemalloc is already tracing, since its peak cannot be reset
+    """
+
+    def __init__(self, profiling: Optional[Profiling] = None) -> None:
+        self._profiling = profiling or Profiling()
+        self._profile = cProfile.Profile() if self._profiling.cprofile else None
+        self._spans: List[Span] = []
+
+    @property
+    def spans(self) -> List[Span]:
+        return list(self._spans)
+
+    def stats(self) -> Optional[pstats.Stats]:
+        if self._profile is None or not self._spans:
+            return None
+        return pstats.Stats(self._profile)
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        tracing = self._profiling.tracemalloc and not tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.start()
+        if self._profile is not None:
+            self._profile.enable()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start
+            if self._profile is not None:
+                self._profile.disable()
+            peak_memory = None
+            if tracing:
+                _, peak_memory = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+
+            span = Span(name, duration, peak_memory)
+            self._spans.append(span)
+            if self._profiling.callback is not None:
+                self._profiling.callback(span)
@@ -0,0 +1,154 @@
+from collections import Counter
+from typing import Dict, NamedTuple, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from qiskit import QuantumCircuit
+from qiskit.circuit import ControlledGate, Instruction
+
+LEAF_OPERATIONS = {'h', 'x', 'cx', 'ccx', 'mcx', 'swap', 'cswap', 'p', 'cp', 'mcphase', 'measure', 'reset',
+                   'phase_correction'}
+IGNORED_OPERATIONS = {'barrier', 'id'}
+CONTROLLED_NAMES = {
+    'x': ['x', 'cx', 'ccx'],
+    'p': ['p', 'cp'],
+    'swap': ['swap', 'cswap']
+}
+MULTI_CONTROLLED_NAMES = {'x': 'mcx', 'p': 'mcphase'}
+BASE_NAMES = {name: (base, k) for base, names in CONTROLLED_NAMES.items() for k, name in enumerate(names)}
+BASE_NAMES.update({name: (base, None) for base, name in MULTI_CONTROLLED_NAMES.items()})
+# entries kept by each `*_resources` function, bounded since keys include constants when `a` is given
+RESOURCES_CACHE_SIZE = 1024
+
+
+class Resources(NamedTuple):
+    """ resources of a gate in terms of LEAF_OPERATIONS
+    block_depth is the depth of the gate in which every gate constructed by a separate builder
+    (every composite instruction) is scheduled as a whole block, starting when all of its qubits are free;
+    it is an upper bound of the depth of the decomposed gate, whose leaf gates may start earlier
+    """
+    num_qubits: int
+    gates: Dict[str, int]
+    block_depth: int
+
+    @property
+    def size(self) -> int:
+        return sum(self.gates.values())
+
+
+class ResourceCounter:
+    """ counterpart of QuantumCircuit used by `*_resources` functions
+    leaf gates are layered as soon as their qubits are free; appended blocks start when all of their qubits are free
+    """
+
+    def __init__(self, num_qubits: int) -> None:
+        self._num_qubits = num_qubits
+        self._gates = Counter()
+        self._frontier = np.zeros(num_qubits, dtype=np.int64)
+
+    def gate(self, name: str, *qubits: int) -> None:
+        qubits = list(qubits)
+        self._frontier[qubits] = self._frontier[qubits].max() + 1
+        self._gates[name] += 1
+
+    def parallel(self, name: str, qubits: Sequence[int]) -> None:
+        qubits = np.asarray(qubits, dtype=np.int64)
+        self._frontier[qubits] += 1
+        self._gates[name] += len(qubits)
+
+    def append(self, resources: Resources, qubits: Sequence[int], times: int = 1) -> None:
+        qubits = np.asarray(qubits, dtype=np.int64)
+        if len(qubits) != resources.num_qubits:
+            raise ValueError(f'Block on {resources.num_qubits} qubits appended to {len(qubits)} qubits.')
+        if len(qubits) == 0 or times == 0:
+            return
+
+        self._frontier[qubits] = self._frontier[qubits].max() + times * resources.block_depth
+        for name, count in resources.gates.items():
+            self._gates[name] += times * count
+
+    def resources(self) -> Resources:
+        block_depth = int(self._frontier.max()) if self._num_qubits else 0
+        return Resources(self._num_qubits, {name: count for name, count in self._gates.items() if count}, block_depth)
+
+
+def layout(*sizes: int) -> Tuple[np.ndarray, ...]:
+    """ return consecutive qubit indices of registers with given sizes """
+    bounds = np.cumsum([0, *sizes])
+    return tuple(np.arange(start, stop) for start, stop in zip(bounds[:-1], bounds[1:]))
+
+
+def join(*registers: Union[int, Sequence[int]]) -> np.ndarray:
+    """ concatenate qubit indices, counterpart of chaining registers """
+    return np.concatenate([np.asarray(register, dtype=np.int64).reshape(-1) for register in registers])
+
+
+def typical_constant(n: int) -> int:
+    """ constant with every other bit set, used in place of unknown constants """
+    return int('01' * n, base=2) & ((1 << n) - 1)
+
+
+def resolve_constant(constant: Optional[int], n: int) -> int:
+    return typical_constant(n) if constant is None else constant
+
+
+def controlled_name(name: str, num_ctrl_qubits: int) -> str:
+    if num_ctrl_qubits == 0:
+        return name
+    if name not in BASE_NAMES:
+        raise ValueError(f'Cannot add controls to operation {name}.')
+
+    base, controls = BASE_NAMES[name]
+    if controls is None:
+        return name
+
+    controls += num_ctrl_qubits
+    names = CONTROLLED_NAMES[base]
+    if controls < len(names):
+        return names[controls]
+    if base not in MULTI_CONTROLLED_NAMES:
+        raise ValueError(f'Cannot add {num_ctrl_qubits} controls to operation {name}.')
+    return MULTI_CONTROLLED_NAMES[base]
+
+
+def circuit_resources(operation) -> Resources:
+    """ count resources of constructed gate or circuit by walking its definitions
+    used as the reference for `*_resources` functions
+    """
+    return _ResourceWalker().resources(operation)
+
+
+class _ResourceWalker:
+    def __init__(self) -> None:
+        self._cache: Dict[Tuple[int, int], Tuple[Instruction, Resources]] = {}
+
+    def resources(self, operation, num_ctrl_qubits: int = 0) -> Resources:
+        if isinstance(operation, QuantumCircuit):
+            return self._definition_resources(operation, num_ctrl_qubits)
+
+        key = (id(operation), num_ctrl_qubits)
+        if key not in self._cache:
+            if isinstance(operation, ControlledGate) and operation.name not in LEAF_OPERATIONS:
+                resources = self.resources(operation.base_gate, num_ctrl_qubits + operation.num_ctrl_qubits)
+            elif operation.definition is None:
+                raise ValueError(f'Operation {operation.name} has no definition.')
+            else:
+                resources = self._definition_resources(operation.definition, num_ctrl_qubits)
+            self._cache[key] = (operation, resources)
+        return self._cache[key][1]
+
+    def _definition_resources(self, circuit: QuantumCircuit, num_ctrl_qubits: int) -> Resources:
+        controls = list(range(num_ctrl_qubits))
+        indices = {qubit: i + num_ctrl_qubits for i, qubit in enumerate(circuit.qubits)}
+        counter = ResourceCounter(num_ctrl_qubits + circuit.num_qubits)
+
+        for instruction, qargs, _ in circuit.data:
+            if instruction.name in IGNORED_OPERATIONS:
+                continue
+
+            qubits = [*controls, *(indices[qubit] for qubit in qargs)]
+            if instruction.name in LEAF_OPERATIONS:
+                counter.gate(controlled_name(instruction.name, num_ctrl_qubits), *qubits)
+            else:
+                counter.append(self.resources(instruction, num_ctrl_qubits), qubits)
+
+        return counter.resources()